@@ -8,7 +8,8 @@ MAINNET = "mainnet"
 GOERLI = "goerli"
 HOLESKY = "holesky"
 HOODI = "hoodi"
-SUPPORTED_NETWORKS = [MAINNET, GOERLI, HOLESKY, HOODI]
+LOCAL = "local"
+SUPPORTED_NETWORKS = [MAINNET, GOERLI, HOLESKY, HOODI, LOCAL]
 
 
 def get_network_name() -> str:
@@ -32,6 +33,9 @@ elif network_name == HOLESKY:
 elif network_name == HOODI:
     print(f"Using config_hoodi.py addresses")
     from config_hoodi import *
+elif network_name == LOCAL:
+    print(f"Using config_local.py addresses")
+    from config_local import *
 else:
     assert False, f"Unknown network {network_name}"
 
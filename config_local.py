@@ -0,0 +1,10 @@
+# Offline local chain without a fork: the addresses are the ape test accounts
+# and the tokens are the mocks deployed by the tests
+LIDO_DAO_AGENT_ADDRESS = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"  # test account #1
+LIDO_EASY_TRACK_SCRIPT_EXECUTOR_ADDRESS = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"  # test account #2
+
+DAI_TOKEN_ADDRESS = None  # contracts/test/DaiMock.vy is deployed instead
+DAI_TOKEN_HOLDER_ADDRESS = "0x90F79bf6EB2c4f870365E785982E1f101E93b906"  # test account #3
+
+USDT_TOKEN_ADDRESS = None  # contracts/test/UsdtMock.vy is deployed instead
+USDT_TOKEN_HOLDER_ADDRESS = "0x15d34AAf54267DB7D7c367839AAf71A00a2C6A65"  # test account #4
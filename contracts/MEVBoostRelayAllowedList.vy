@@ -61,13 +61,30 @@ owner: address
 # Zero manager means manager is not assigned
 manager: address
 
-# List of the relays. Order might be arbitrary
-relays: DynArray[Relay, MAX_NUM_RELAYS]
+# keccak256 of the URIs of the allowed relays. Order might be arbitrary
+# Only these one-slot entries are moved on the relay removal
+relay_uri_hashes: DynArray[bytes32, MAX_NUM_RELAYS]
+
+# Relay by keccak256 of the relay URI. Not cleared on the relay removal,
+# `relay_index_by_uri_hash` tells if the relay is allowed
+relay_by_uri_hash: HashMap[bytes32, Relay]
+
+# keccak256 of the ABI encoded relay by keccak256 of the relay URI.
+# Allows to update `allowed_list_hash` on the relay removal without reading the whole relay
+relay_hash_by_uri_hash: HashMap[bytes32, bytes32]
 
 # Incremented each time the list of relays is modified.
 # Introduced to facilitate easy versioning of the allowed list
 allowed_list_version: uint256
 
+# XOR of keccak256 of the ABI encoded relays. Does not depend on the relays order,
+# so identifies the content of the allowed list. Zero for the empty list
+allowed_list_hash: bytes32
+
+# Index of the relay in `relay_uri_hashes` plus one, by keccak256 of the relay URI.
+# Zero means there is no relay with the URI
+relay_index_by_uri_hash: HashMap[bytes32, uint256]
+
 
 @external
 def __init__(owner: address):
@@ -82,7 +99,7 @@ def get_relays_amount() -> uint256:
     @notice Return number of the allowed relays
     @return The number of the allowed relays
     """
-    return len(self.relays)
+    return len(self.relay_uri_hashes)
 
 
 @view
@@ -103,16 +120,78 @@ def get_manager() -> address:
 @external
 def get_relays() -> DynArray[Relay, MAX_NUM_RELAYS]:
     """Return list of the allowed relays"""
-    return self.relays
+    # touching the memory of the full-size array is charged even if it stays empty
+    if len(self.relay_uri_hashes) == 0:
+        return empty(DynArray[Relay, MAX_NUM_RELAYS])
+
+    # inlined, an internal function would copy the whole returned array once more
+    relays: DynArray[Relay, MAX_NUM_RELAYS] = []
+    for uri_hash in self.relay_uri_hashes:
+        relays.append(self.relay_by_uri_hash[uri_hash])
+    return relays
+
+
+@view
+@external
+def get_relays_page(offset: uint256, limit: uint256) -> DynArray[Relay, MAX_NUM_RELAYS]:
+    """
+    @notice Return a page of the allowed relays
+    @param offset Index of the first relay in the page
+    @param limit Max number of relays in the page
+    @return Up to `limit` relays starting from `offset`. Empty if `offset` is out of the list
+    """
+    page: DynArray[Relay, MAX_NUM_RELAYS] = []
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    if offset >= num_relays:
+        return page
+
+    for i in range(MAX_NUM_RELAYS):
+        if i >= limit or offset + i >= num_relays:
+            break
+        page.append(self.relay_by_uri_hash[self.relay_uri_hashes[offset + i]])
+    return page
+
+
+@view
+@external
+def get_relay_uris() -> DynArray[String[MAX_STRING_LENGTH], MAX_NUM_RELAYS]:
+    """Return URIs of the allowed relays in the same order as `get_relays`"""
+    uris: DynArray[String[MAX_STRING_LENGTH], MAX_NUM_RELAYS] = []
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    for i in range(MAX_NUM_RELAYS):
+        if i >= num_relays:
+            break
+        # read only the URI, not the whole relay
+        uris.append(self.relay_by_uri_hash[self.relay_uri_hashes[i]].uri)
+    return uris
+
+
+@view
+@external
+def get_relays_by_mandatory(is_mandatory: bool) -> DynArray[Relay, MAX_NUM_RELAYS]:
+    """
+    @notice Return the allowed relays filtered by the mandatory flag
+    @param is_mandatory Return only mandatory relays if true, only optional ones otherwise
+    """
+    relays: DynArray[Relay, MAX_NUM_RELAYS] = []
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    for i in range(MAX_NUM_RELAYS):
+        if i >= num_relays:
+            break
+        # read the whole relay only if it passes the filter
+        uri_hash: bytes32 = self.relay_uri_hashes[i]
+        if self.relay_by_uri_hash[uri_hash].is_mandatory == is_mandatory:
+            relays.append(self.relay_by_uri_hash[uri_hash])
+    return relays
 
 
 @view
 @external
 def get_relay_by_uri(relay_uri: String[MAX_STRING_LENGTH]) -> Relay:
     """Find allowed relay by URI. Revert if no relay found"""
-    index: uint256 = self._find_relay(relay_uri)
-    assert index != max_value(uint256), "no relay with the URI"
-    return self.relays[index]
+    uri_hash: bytes32 = keccak256(relay_uri)
+    assert self.relay_index_by_uri_hash[uri_hash] != 0, "no relay with the URI"
+    return self.relay_by_uri_hash[uri_hash]
 
 
 @view
@@ -125,6 +204,35 @@ def get_allowed_list_version() -> uint256:
     return self.allowed_list_version
 
 
+@view
+@external
+def get_allowed_list_hash() -> bytes32:
+    """
+    @notice Return hash of the allowed list content
+    @dev XOR of keccak256(abi.encode(relay)) of all the allowed relays
+    """
+    return self.allowed_list_hash
+
+
+@view
+@external
+def get_relays_if_changed(known_version: uint256) -> (uint256, DynArray[Relay, MAX_NUM_RELAYS]):
+    """
+    @notice Return the allowed relays only if the allowed list version differs from the known one
+    @param known_version Version of the allowed list known to the caller
+    @return The current allowed list version and the allowed relays,
+            no relays if `known_version` is the current version
+    """
+    version: uint256 = self.allowed_list_version
+    if known_version == version or len(self.relay_uri_hashes) == 0:
+        return version, empty(DynArray[Relay, MAX_NUM_RELAYS])
+
+    relays: DynArray[Relay, MAX_NUM_RELAYS] = []
+    for uri_hash in self.relay_uri_hashes:
+        relays.append(self.relay_by_uri_hash[uri_hash])
+    return version, relays
+
+
 @external
 def add_relay(
     uri: String[MAX_STRING_LENGTH],
@@ -141,22 +249,29 @@ def add_relay(
     @param description Description of the relay in free format
     """
     self._check_sender_is_owner_or_manager()
-    assert uri != empty(String[MAX_STRING_LENGTH]), "relay URI must not be empty"
-    assert len(self.relays) < MAX_NUM_RELAYS, "already max number of relays"
-
-    index: uint256 = self._find_relay(uri)
-    assert index == max_value(uint256), "relay with the URI already exists"
-
-    relay: Relay = Relay({
+    self._bump_version()
+    self._add_relay(Relay({
         uri: uri,
         operator: operator,
         is_mandatory: is_mandatory,
         description: description,
-    })
-    self.relays.append(relay)
+    }))
+
+
+@external
+def add_relays(relays: DynArray[Relay, MAX_NUM_RELAYS]):
+    """
+    @notice Add several relays to the allowed list at once. Can be executed only by
+            the owner or manager. Reverts if any of the relays can not be added.
+            Bumps the allowed list version once for the whole batch.
+    @param relays Relays to add. Must be non-empty
+    """
+    self._check_sender_is_owner_or_manager()
+    assert len(relays) > 0, "empty relays list"
     self._bump_version()
 
-    log RelayAdded(uri, relay)
+    for relay in relays:
+        self._add_relay(relay)
 
 
 @external
@@ -168,19 +283,25 @@ def remove_relay(uri: String[MAX_STRING_LENGTH]):
     @param uri URI of the relay. Must be non-empty
     """
     self._check_sender_is_owner_or_manager()
-    assert uri != empty(String[MAX_STRING_LENGTH]), "relay URI must not be empty"
-
-    num_relays: uint256 = len(self.relays)
-    index: uint256 = self._find_relay(uri)
-    assert index < num_relays, "no relay with the URI"
+    self._bump_version()
+    self._remove_relay(uri)
 
-    if index != (num_relays - 1):
-        self.relays[index] = self.relays[num_relays - 1]
 
-    self.relays.pop()
+@external
+def remove_relays(uris: DynArray[String[MAX_STRING_LENGTH], MAX_NUM_RELAYS]):
+    """
+    @notice Remove several relays from the allowed list at once. Can be executed only by
+            the owner or manager. Reverts if any of the relays can not be removed.
+            Bumps the allowed list version once for the whole batch.
+            Order of the relays might get changed.
+    @param uris URIs of the relays to remove. Must be non-empty
+    """
+    self._check_sender_is_owner_or_manager()
+    assert len(uris) > 0, "empty relays list"
     self._bump_version()
 
-    log RelayRemoved(uri, uri)
+    for uri in uris:
+        self._remove_relay(uri)
 
 
 @external
@@ -252,17 +373,54 @@ def __default__():
     raise
 
 
-@view
 @internal
-def _find_relay(uri: String[MAX_STRING_LENGTH]) -> uint256:
-    index: uint256 = max_value(uint256)
-    i: uint256 = 0
-    for r in self.relays:
-        if r.uri == uri:
-            index = i
-            break
-        i = i + 1
-    return index
+def _add_relay(relay: Relay):
+    assert relay.uri != empty(String[MAX_STRING_LENGTH]), "relay URI must not be empty"
+    assert len(self.relay_uri_hashes) < MAX_NUM_RELAYS, "already max number of relays"
+
+    uri_hash: bytes32 = keccak256(relay.uri)
+    assert self.relay_index_by_uri_hash[uri_hash] == 0, "relay with the URI already exists"
+
+    self.relay_uri_hashes.append(uri_hash)
+    self.relay_index_by_uri_hash[uri_hash] = len(self.relay_uri_hashes)
+    self.relay_by_uri_hash[uri_hash] = relay
+
+    relay_hash: bytes32 = keccak256(_abi_encode(relay))
+    self.relay_hash_by_uri_hash[uri_hash] = relay_hash
+    self._update_allowed_list_hash(relay_hash)
+
+    log RelayAdded(relay.uri, relay)
+
+
+@internal
+def _remove_relay(uri: String[MAX_STRING_LENGTH]):
+    assert uri != empty(String[MAX_STRING_LENGTH]), "relay URI must not be empty"
+
+    uri_hash: bytes32 = keccak256(uri)
+    index: uint256 = self.relay_index_by_uri_hash[uri_hash]
+    assert index != 0, "no relay with the URI"
+    self._update_allowed_list_hash(self.relay_hash_by_uri_hash[uri_hash])
+
+    # swap and pop only the URI hashes, the relays data stays in place
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    if index != num_relays:
+        last_uri_hash: bytes32 = self.relay_uri_hashes[num_relays - 1]
+        self.relay_uri_hashes[index - 1] = last_uri_hash
+        self.relay_index_by_uri_hash[last_uri_hash] = index
+
+    self.relay_uri_hashes.pop()
+    self.relay_index_by_uri_hash[uri_hash] = 0
+
+    log RelayRemoved(uri, uri)
+
+
+@internal
+def _update_allowed_list_hash(relay_hash: bytes32):
+    # XOR is self-inverse, so the same update adds the relay to the hash and removes it from there
+    self.allowed_list_hash = convert(
+        convert(self.allowed_list_hash, uint256) ^ convert(relay_hash, uint256),
+        bytes32
+    )
 
 
 @internal
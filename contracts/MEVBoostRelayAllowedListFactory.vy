@@ -0,0 +1,47 @@
+# @version 0.3.6
+# @title MEV Boost Relay Allowed List Factory
+# @notice Deploys the allowed lists, e.g. per staking module or test environment,
+#         as EIP-1167 minimal proxy clones of MEVBoostRelayAllowedListInitializable.
+# @license MIT
+# @author Lido <info@lido.fi>
+# @dev The clones are not stored, they are enumerated by the AllowedListCreated events.
+
+
+interface AllowedList:
+    def initialize(owner: address): nonpayable
+
+
+# The allowed list clone was deployed and initialized
+event AllowedListCreated:
+    allowed_list: indexed(address)
+    owner: indexed(address)
+
+
+# MEVBoostRelayAllowedListInitializable the clones delegate the calls to
+IMPLEMENTATION: immutable(address)
+
+
+@external
+def __init__(implementation: address):
+    assert implementation.is_contract, "implementation is not a contract"
+    IMPLEMENTATION = implementation
+
+
+@view
+@external
+def get_implementation() -> address:
+    """Return the address of the implementation of the clones"""
+    return IMPLEMENTATION
+
+
+@external
+def create_allowed_list(owner: address) -> address:
+    """
+    @notice Deploy a new allowed list clone owned by `owner`
+    @param owner Address of the owner of the new allowed list. Must be non-zero
+    @return The address of the new allowed list
+    """
+    allowed_list: address = create_minimal_proxy_to(IMPLEMENTATION)
+    AllowedList(allowed_list).initialize(owner)
+    log AllowedListCreated(allowed_list, owner)
+    return allowed_list
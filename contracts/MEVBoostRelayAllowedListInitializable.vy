@@ -0,0 +1,476 @@
+# @version 0.3.6
+# @title MEV Boost Relay Allowed List Initializable
+# @notice Storage of the allowed list MEV-Boost relays.
+#         Implementation of the EIP-1167 minimal proxy clones deployed by
+#         MEVBoostRelayAllowedListFactory, each clone has its own storage and owner.
+# @license MIT
+# @author Lido <info@lido.fi>
+# @dev Same as MEVBoostRelayAllowedList except the owner is set by `initialize`
+#      instead of the constructor, as a clone runs no constructor.
+#      Relay data modification is supposed to be done by remove and add,
+#      to reduce the number of lines of code of the contract.
+
+
+# The relay was added
+event RelayAdded:
+    uri_hash: indexed(String[MAX_STRING_LENGTH])
+    relay: Relay
+
+# The relay was removed
+event RelayRemoved:
+    uri_hash: indexed(String[MAX_STRING_LENGTH])
+    uri: String[MAX_STRING_LENGTH]
+
+# Emitted every time the allowed list is changed
+event AllowedListUpdated:
+    allowed_list_version: indexed(uint256)
+
+# Emitted when the contract owner is changed
+event OwnerChanged:
+    new_owner: indexed(address)
+
+# Emitted when the contract manager is set or dismissed
+# When the manager is dismissed the address is zero
+event ManagerChanged:
+    new_manager: indexed(address)
+
+# The ERC20 token was transferred from the contract to the recipient
+event ERC20Recovered:
+    # the token address
+    token: indexed(address)
+    # the token amount
+    amount: uint256
+    # recipient of the recovery token transfer
+    recipient: indexed(address)
+
+
+struct Relay:
+    uri: String[MAX_STRING_LENGTH]
+    operator: String[MAX_STRING_LENGTH]
+    is_mandatory: bool
+    description: String[MAX_STRING_LENGTH]
+
+
+# Just some sane limit
+MAX_STRING_LENGTH: constant(uint256) = 1024
+
+# Just some sane limit
+MAX_NUM_RELAYS: constant(uint256) = 40
+
+# Can change the allowed list, change the manager and call recovery functions
+owner: address
+
+# Manager can change the allowed list as well as the owner
+# Can be assigned and dismissed by the owner
+# Zero manager means manager is not assigned
+manager: address
+
+# keccak256 of the URIs of the allowed relays. Order might be arbitrary
+# Only these one-slot entries are moved on the relay removal
+relay_uri_hashes: DynArray[bytes32, MAX_NUM_RELAYS]
+
+# Relay by keccak256 of the relay URI. Not cleared on the relay removal,
+# `relay_index_by_uri_hash` tells if the relay is allowed
+relay_by_uri_hash: HashMap[bytes32, Relay]
+
+# keccak256 of the ABI encoded relay by keccak256 of the relay URI.
+# Allows to update `allowed_list_hash` on the relay removal without reading the whole relay
+relay_hash_by_uri_hash: HashMap[bytes32, bytes32]
+
+# Incremented each time the list of relays is modified.
+# Introduced to facilitate easy versioning of the allowed list
+allowed_list_version: uint256
+
+# XOR of keccak256 of the ABI encoded relays. Does not depend on the relays order,
+# so identifies the content of the allowed list. Zero for the empty list
+allowed_list_hash: bytes32
+
+# Index of the relay in `relay_uri_hashes` plus one, by keccak256 of the relay URI.
+# Zero means there is no relay with the URI
+relay_index_by_uri_hash: HashMap[bytes32, uint256]
+
+
+@external
+def __init__():
+    # lock the implementation, only the clones are initialized
+    self.owner = self
+
+
+@external
+def initialize(owner: address):
+    """
+    @notice Set the owner of the clone. Can be called only once,
+            the factory calls it in the clone deployment transaction.
+    @param owner Address of the owner. Must be non-zero
+    """
+    # the owner can never be changed to zero, so the zero owner means not initialized
+    assert self.owner == empty(address), "already initialized"
+    assert owner != empty(address), "zero owner address"
+    self.owner = owner
+
+
+@view
+@external
+def get_relays_amount() -> uint256:
+    """
+    @notice Return number of the allowed relays
+    @return The number of the allowed relays
+    """
+    return len(self.relay_uri_hashes)
+
+
+@view
+@external
+def get_owner() -> address:
+    """Return the address of owner of the contract"""
+    return self.owner
+
+
+@view
+@external
+def get_manager() -> address:
+    """Return the address of manager of the contract"""
+    return self.manager
+
+
+@view
+@external
+def get_relays() -> DynArray[Relay, MAX_NUM_RELAYS]:
+    """Return list of the allowed relays"""
+    # touching the memory of the full-size array is charged even if it stays empty
+    if len(self.relay_uri_hashes) == 0:
+        return empty(DynArray[Relay, MAX_NUM_RELAYS])
+
+    # inlined, an internal function would copy the whole returned array once more
+    relays: DynArray[Relay, MAX_NUM_RELAYS] = []
+    for uri_hash in self.relay_uri_hashes:
+        relays.append(self.relay_by_uri_hash[uri_hash])
+    return relays
+
+
+@view
+@external
+def get_relays_page(offset: uint256, limit: uint256) -> DynArray[Relay, MAX_NUM_RELAYS]:
+    """
+    @notice Return a page of the allowed relays
+    @param offset Index of the first relay in the page
+    @param limit Max number of relays in the page
+    @return Up to `limit` relays starting from `offset`. Empty if `offset` is out of the list
+    """
+    page: DynArray[Relay, MAX_NUM_RELAYS] = []
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    if offset >= num_relays:
+        return page
+
+    for i in range(MAX_NUM_RELAYS):
+        if i >= limit or offset + i >= num_relays:
+            break
+        page.append(self.relay_by_uri_hash[self.relay_uri_hashes[offset + i]])
+    return page
+
+
+@view
+@external
+def get_relay_uris() -> DynArray[String[MAX_STRING_LENGTH], MAX_NUM_RELAYS]:
+    """Return URIs of the allowed relays in the same order as `get_relays`"""
+    uris: DynArray[String[MAX_STRING_LENGTH], MAX_NUM_RELAYS] = []
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    for i in range(MAX_NUM_RELAYS):
+        if i >= num_relays:
+            break
+        # read only the URI, not the whole relay
+        uris.append(self.relay_by_uri_hash[self.relay_uri_hashes[i]].uri)
+    return uris
+
+
+@view
+@external
+def get_relays_by_mandatory(is_mandatory: bool) -> DynArray[Relay, MAX_NUM_RELAYS]:
+    """
+    @notice Return the allowed relays filtered by the mandatory flag
+    @param is_mandatory Return only mandatory relays if true, only optional ones otherwise
+    """
+    relays: DynArray[Relay, MAX_NUM_RELAYS] = []
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    for i in range(MAX_NUM_RELAYS):
+        if i >= num_relays:
+            break
+        # read the whole relay only if it passes the filter
+        uri_hash: bytes32 = self.relay_uri_hashes[i]
+        if self.relay_by_uri_hash[uri_hash].is_mandatory == is_mandatory:
+            relays.append(self.relay_by_uri_hash[uri_hash])
+    return relays
+
+
+@view
+@external
+def get_relay_by_uri(relay_uri: String[MAX_STRING_LENGTH]) -> Relay:
+    """Find allowed relay by URI. Revert if no relay found"""
+    uri_hash: bytes32 = keccak256(relay_uri)
+    assert self.relay_index_by_uri_hash[uri_hash] != 0, "no relay with the URI"
+    return self.relay_by_uri_hash[uri_hash]
+
+
+@view
+@external
+def get_allowed_list_version() -> uint256:
+    """
+    @notice Return version of the allowed list
+    @dev The version is incremented on every relays list update
+    """
+    return self.allowed_list_version
+
+
+@view
+@external
+def get_allowed_list_hash() -> bytes32:
+    """
+    @notice Return hash of the allowed list content
+    @dev XOR of keccak256(abi.encode(relay)) of all the allowed relays
+    """
+    return self.allowed_list_hash
+
+
+@view
+@external
+def get_relays_if_changed(known_version: uint256) -> (uint256, DynArray[Relay, MAX_NUM_RELAYS]):
+    """
+    @notice Return the allowed relays only if the allowed list version differs from the known one
+    @param known_version Version of the allowed list known to the caller
+    @return The current allowed list version and the allowed relays,
+            no relays if `known_version` is the current version
+    """
+    version: uint256 = self.allowed_list_version
+    if known_version == version or len(self.relay_uri_hashes) == 0:
+        return version, empty(DynArray[Relay, MAX_NUM_RELAYS])
+
+    relays: DynArray[Relay, MAX_NUM_RELAYS] = []
+    for uri_hash in self.relay_uri_hashes:
+        relays.append(self.relay_by_uri_hash[uri_hash])
+    return version, relays
+
+
+@external
+def add_relay(
+    uri: String[MAX_STRING_LENGTH],
+    operator: String[MAX_STRING_LENGTH],
+    is_mandatory: bool,
+    description: String[MAX_STRING_LENGTH]
+):
+    """
+    @notice Add relay to the allowed list. Can be executed only by the owner or
+            manager. Reverts if relay with the URI is already allowed.
+    @param uri URI of the relay. Must be non-empty
+    @param operator Name of the relay operator
+    @param is_mandatory If the relay is mandatory for usage for Lido Node Operator
+    @param description Description of the relay in free format
+    """
+    self._check_sender_is_owner_or_manager()
+    self._bump_version()
+    self._add_relay(Relay({
+        uri: uri,
+        operator: operator,
+        is_mandatory: is_mandatory,
+        description: description,
+    }))
+
+
+@external
+def add_relays(relays: DynArray[Relay, MAX_NUM_RELAYS]):
+    """
+    @notice Add several relays to the allowed list at once. Can be executed only by
+            the owner or manager. Reverts if any of the relays can not be added.
+            Bumps the allowed list version once for the whole batch.
+    @param relays Relays to add. Must be non-empty
+    """
+    self._check_sender_is_owner_or_manager()
+    assert len(relays) > 0, "empty relays list"
+    self._bump_version()
+
+    for relay in relays:
+        self._add_relay(relay)
+
+
+@external
+def remove_relay(uri: String[MAX_STRING_LENGTH]):
+    """
+    @notice Remove relay from the allowed list. Can be executed only by the the owner or
+            manager. Reverts if there is no such relay.
+            Order of the relays might get changed.
+    @param uri URI of the relay. Must be non-empty
+    """
+    self._check_sender_is_owner_or_manager()
+    self._bump_version()
+    self._remove_relay(uri)
+
+
+@external
+def remove_relays(uris: DynArray[String[MAX_STRING_LENGTH], MAX_NUM_RELAYS]):
+    """
+    @notice Remove several relays from the allowed list at once. Can be executed only by
+            the owner or manager. Reverts if any of the relays can not be removed.
+            Bumps the allowed list version once for the whole batch.
+            Order of the relays might get changed.
+    @param uris URIs of the relays to remove. Must be non-empty
+    """
+    self._check_sender_is_owner_or_manager()
+    assert len(uris) > 0, "empty relays list"
+    self._bump_version()
+
+    for uri in uris:
+        self._remove_relay(uri)
+
+
+@external
+def change_owner(owner: address):
+    """
+    @notice Change contract owner.
+    @param owner Address of the new owner. Must be non-zero and
+           not same as the current owner.
+    """
+    self._check_sender_is_owner()
+    assert owner != empty(address), "zero owner address"
+    assert owner != self.owner, "same owner"
+
+    self.owner = owner
+    log OwnerChanged(owner)
+
+
+@external
+def set_manager(manager: address):
+    """
+    @notice Set contract manager. Zero address is not allowed.
+            Can update manager if it is already set.
+            Can be called only by the owner.
+    @param manager Address of the new manager
+    """
+    self._check_sender_is_owner()
+    assert manager != empty(address), "zero manager address"
+    assert manager != self.manager, "same manager"
+
+    self.manager = manager
+    log ManagerChanged(manager)
+
+
+@external
+def dismiss_manager():
+    """
+    @notice Dismiss the manager. Reverts if no manager set.
+            Can be called only by the owner.
+    """
+    self._check_sender_is_owner()
+    assert self.manager != empty(address), "no manager set"
+
+    self.manager = empty(address)
+    log ManagerChanged(empty(address))
+
+
+@external
+def recover_erc20(token: address, amount: uint256, recipient: address):
+    """
+    @notice Transfer ERC20 tokens from the contract's balance to the recipient.
+            Can be called only by the owner.
+    @param token Address of the token to recover. Must be non-zero
+    @param amount Amount of the token to recover
+    @param recipient Recipient of the token transfer. Must be non-zero
+    """
+    self._check_sender_is_owner()
+    assert token != empty(address), "zero token address"
+    assert recipient != empty(address), "zero recipient address"
+    assert token.is_contract, "eoa token address"
+
+    if amount > 0:
+        self._safe_erc20_transfer(token, recipient, amount)
+        log ERC20Recovered(token, amount, recipient)
+
+
+@external
+def __default__():
+    """Prevent receiving ether"""
+    raise
+
+
+@internal
+def _add_relay(relay: Relay):
+    assert relay.uri != empty(String[MAX_STRING_LENGTH]), "relay URI must not be empty"
+    assert len(self.relay_uri_hashes) < MAX_NUM_RELAYS, "already max number of relays"
+
+    uri_hash: bytes32 = keccak256(relay.uri)
+    assert self.relay_index_by_uri_hash[uri_hash] == 0, "relay with the URI already exists"
+
+    self.relay_uri_hashes.append(uri_hash)
+    self.relay_index_by_uri_hash[uri_hash] = len(self.relay_uri_hashes)
+    self.relay_by_uri_hash[uri_hash] = relay
+
+    relay_hash: bytes32 = keccak256(_abi_encode(relay))
+    self.relay_hash_by_uri_hash[uri_hash] = relay_hash
+    self._update_allowed_list_hash(relay_hash)
+
+    log RelayAdded(relay.uri, relay)
+
+
+@internal
+def _remove_relay(uri: String[MAX_STRING_LENGTH]):
+    assert uri != empty(String[MAX_STRING_LENGTH]), "relay URI must not be empty"
+
+    uri_hash: bytes32 = keccak256(uri)
+    index: uint256 = self.relay_index_by_uri_hash[uri_hash]
+    assert index != 0, "no relay with the URI"
+    self._update_allowed_list_hash(self.relay_hash_by_uri_hash[uri_hash])
+
+    # swap and pop only the URI hashes, the relays data stays in place
+    num_relays: uint256 = len(self.relay_uri_hashes)
+    if index != num_relays:
+        last_uri_hash: bytes32 = self.relay_uri_hashes[num_relays - 1]
+        self.relay_uri_hashes[index - 1] = last_uri_hash
+        self.relay_index_by_uri_hash[last_uri_hash] = index
+
+    self.relay_uri_hashes.pop()
+    self.relay_index_by_uri_hash[uri_hash] = 0
+
+    log RelayRemoved(uri, uri)
+
+
+@internal
+def _update_allowed_list_hash(relay_hash: bytes32):
+    # XOR is self-inverse, so the same update adds the relay to the hash and removes it from there
+    self.allowed_list_hash = convert(
+        convert(self.allowed_list_hash, uint256) ^ convert(relay_hash, uint256),
+        bytes32
+    )
+
+
+@internal
+def _check_sender_is_owner_or_manager():
+    assert (
+        msg.sender == self.owner
+        or
+        (msg.sender == self.manager and msg.sender != empty(address))
+    ), "msg.sender not owner or manager"
+
+
+@internal
+def _check_sender_is_owner():
+    assert msg.sender == self.owner, "msg.sender not owner"
+
+
+@internal
+def _bump_version():
+   new_version: uint256 = self.allowed_list_version + 1
+   self.allowed_list_version = new_version
+   log AllowedListUpdated(new_version)
+
+
+@internal
+def _safe_erc20_transfer(token: address, recipient: address, amount: uint256):
+    response: Bytes[32] = raw_call(
+        token,
+        concat(
+            method_id("transfer(address,uint256)"),
+            convert(recipient, bytes32),
+            convert(amount, bytes32)
+        ),
+        max_outsize=32
+    )
+    if len(response) > 0:
+        assert convert(response, bool), "erc20 transfer failed"
@@ -0,0 +1,73 @@
+# @version 0.3.6
+# @title Dai mock
+# @notice Minimal ERC20 token following `contracts/interfaces/Dai.json` for the offline tests.
+#         Reverts with the same messages as Dai does.
+# @license MIT
+
+
+event Transfer:
+    src: indexed(address)
+    dst: indexed(address)
+    wad: uint256
+
+event Approval:
+    src: indexed(address)
+    guy: indexed(address)
+    wad: uint256
+
+
+name: public(String[64])
+symbol: public(String[32])
+version: public(String[8])
+decimals: public(uint8)
+totalSupply: public(uint256)
+
+wards: public(HashMap[address, uint256])
+balanceOf: public(HashMap[address, uint256])
+allowance: public(HashMap[address, HashMap[address, uint256]])
+
+
+@external
+def __init__(chainId_: uint256):
+    self.name = "Dai Stablecoin"
+    self.symbol = "DAI"
+    self.version = "1"
+    self.decimals = 18
+    self.wards[msg.sender] = 1
+
+
+@external
+def mint(usr: address, wad: uint256):
+    assert self.wards[msg.sender] == 1, "Dai/not-authorized"
+    self.balanceOf[usr] += wad
+    self.totalSupply += wad
+    log Transfer(empty(address), usr, wad)
+
+
+@external
+def transfer(dst: address, wad: uint256) -> bool:
+    return self._transfer_from(msg.sender, dst, wad)
+
+
+@external
+def transferFrom(src: address, dst: address, wad: uint256) -> bool:
+    return self._transfer_from(src, dst, wad)
+
+
+@external
+def approve(usr: address, wad: uint256) -> bool:
+    self.allowance[msg.sender][usr] = wad
+    log Approval(msg.sender, usr, wad)
+    return True
+
+
+@internal
+def _transfer_from(src: address, dst: address, wad: uint256) -> bool:
+    assert self.balanceOf[src] >= wad, "Dai/insufficient-balance"
+    if src != msg.sender and self.allowance[src][msg.sender] != max_value(uint256):
+        assert self.allowance[src][msg.sender] >= wad, "Dai/insufficient-allowance"
+        self.allowance[src][msg.sender] -= wad
+    self.balanceOf[src] -= wad
+    self.balanceOf[dst] += wad
+    log Transfer(src, dst, wad)
+    return True
@@ -0,0 +1,93 @@
+# @version 0.3.6
+# @title USDT mock
+# @notice Minimal ERC20 token following `contracts/interfaces/Usdt.json` for the offline tests.
+#         As USDT does, `transfer`, `transferFrom` and `approve` return no value
+#         and revert without a message.
+# @license MIT
+
+
+event Transfer:
+    sender: indexed(address)
+    receiver: indexed(address)
+    value: uint256
+
+event Approval:
+    owner: indexed(address)
+    spender: indexed(address)
+    value: uint256
+
+event Issue:
+    amount: uint256
+
+
+name: public(String[64])
+symbol: public(String[32])
+decimals: public(uint256)
+totalSupply: public(uint256)
+owner: public(address)
+
+balances: public(HashMap[address, uint256])
+allowed: public(HashMap[address, HashMap[address, uint256]])
+
+
+@external
+def __init__(_initialSupply: uint256, _name: String[64], _symbol: String[32], _decimals: uint256):
+    self.name = _name
+    self.symbol = _symbol
+    self.decimals = _decimals
+    self.owner = msg.sender
+    self.totalSupply = _initialSupply
+    self.balances[msg.sender] = _initialSupply
+
+
+@view
+@external
+def getOwner() -> address:
+    return self.owner
+
+
+@view
+@external
+def balanceOf(who: address) -> uint256:
+    return self.balances[who]
+
+
+@view
+@external
+def allowance(_owner: address, _spender: address) -> uint256:
+    return self.allowed[_owner][_spender]
+
+
+@external
+def issue(amount: uint256):
+    assert msg.sender == self.owner
+    self.balances[self.owner] += amount
+    self.totalSupply += amount
+    log Issue(amount)
+
+
+@external
+def transfer(_to: address, _value: uint256):
+    self._transfer(msg.sender, _to, _value)
+
+
+@external
+def transferFrom(_from: address, _to: address, _value: uint256):
+    assert self.allowed[_from][msg.sender] >= _value
+    if self.allowed[_from][msg.sender] != max_value(uint256):
+        self.allowed[_from][msg.sender] -= _value
+    self._transfer(_from, _to, _value)
+
+
+@external
+def approve(_spender: address, _value: uint256):
+    self.allowed[msg.sender][_spender] = _value
+    log Approval(msg.sender, _spender, _value)
+
+
+@internal
+def _transfer(_from: address, _to: address, _value: uint256):
+    assert self.balances[_from] >= _value
+    self.balances[_from] -= _value
+    self.balances[_to] += _value
+    log Transfer(_from, _to, _value)
@@ -0,0 +1,39 @@
+import json
+import time
+from pathlib import Path
+
+import click
+
+from utils.compliance import AllowedSegments, ComplianceChecker, DEFAULT_CHUNK_SIZE, load_operators
+from utils.files import atomic_write_text
+from utils.history import HistoryIndex
+
+
+@click.command()
+@click.option("--db", "db_path", default="history.db", show_default=True, help="SQLite history index, see `history`")
+@click.option("--operators", "operators_file", help="CSV file with `pubkey` and `operator` of the validators to check")
+@click.option("--output", "output_file", help="Path of the JSON report, printed if not set")
+@click.option("--chunk-size", default=DEFAULT_CHUNK_SIZE, show_default=True, help="Rows read and checked at once")
+@click.argument("payloads", nargs=-1, required=True)
+def cli(db_path, operators_file, output_file, chunk_size, payloads):
+    """
+    Check the delivered payloads dumps, JSONL or CSV files optionally gzipped, against the allowed list history.
+
+    Every row needs `block_number`, `relay` and `proposer_pubkey` with --operators or `operator` otherwise.
+    """
+    index = HistoryIndex(db_path)
+    segments = AllowedSegments(index.intervals())
+    index.close()
+    checker = ComplianceChecker(segments, load_operators(operators_file) if operators_file else None)
+
+    started = time.perf_counter()
+    for path in payloads:
+        checker.check_file(path, chunk_size)
+    elapsed = max(time.perf_counter() - started, 1e-9)
+
+    report = json.dumps(checker.report(), indent=2)
+    if output_file:
+        atomic_write_text(Path(output_file), report)
+    else:
+        click.echo(report)
+    click.echo(f"Checked {checker.rows} rows in {elapsed:.1f} s, {checker.rows / elapsed:,.0f} rows/s", err=True)
@@ -1,10 +1,53 @@
-from ape import accounts, project
+import os
+
+from ape import convert, project
 from config import LIDO_DAO_AGENT_ADDRESS, get_deployer_account, get_network_name
 
+from utils.deployment import (
+    execute_deployment,
+    fetch_fees,
+    hand_over_ownership,
+    plan_deployment,
+    salt_from_text,
+    save_deployed_address,
+)
+
+MAX_FEE_ENV_VAR = "MAX_FEE"
+DEFAULT_MAX_FEE = "300 gwei"
+SALT_ENV_VAR = "SALT"
+DRY_RUN_ENV_VAR = "DRY_RUN"
+
 
 def main():
-    print(f"\n!!! Current network is {get_network_name()} !!!\n")
+    network_name = get_network_name()
+    print(f"\n!!! Current network is {network_name} !!!\n")
 
     deployer = get_deployer_account()
+    max_fee_ceiling = convert(os.environ.get(MAX_FEE_ENV_VAR, DEFAULT_MAX_FEE), int)
+    salt = salt_from_text(os.environ[SALT_ENV_VAR]) if os.environ.get(SALT_ENV_VAR) else None
+
+    fees = fetch_fees(max_fee_ceiling)
+    # the CREATE2 address depends on the constructor arguments, the owner must be the same on every network
+    owner = deployer.address if salt else LIDO_DAO_AGENT_ADDRESS
+    plan = plan_deployment(project.MEVBoostRelayAllowedList, (owner,), deployer.address, fees, salt=salt)
+    if plan.already_deployed:
+        print(f"Already deployed at {plan.address}")
+    else:
+        print(f"Deploying {'with CREATE2 ' if salt else ''}to {plan.address}")
+        print(
+            f"Gas limit {plan.gas_limit}, max fee {fees.max_fee / 10**9} gwei, priority fee {fees.max_priority_fee / 10**9} gwei"
+        )
+        print(f"Max cost {plan.max_cost / 10**18} ETH")
+    if salt:
+        print(f"The ownership is handed over from the deployer to {LIDO_DAO_AGENT_ADDRESS}")
+    if os.environ.get(DRY_RUN_ENV_VAR):
+        return
+
+    allowed_list = execute_deployment(project.MEVBoostRelayAllowedList, plan, deployer)
+    if salt and hand_over_ownership(allowed_list, LIDO_DAO_AGENT_ADDRESS, deployer, fees):
+        print(f"Owner is changed to {LIDO_DAO_AGENT_ADDRESS}")
 
-    allowed_list = project.MEVBoostRelayAllowedList.deploy(LIDO_DAO_AGENT_ADDRESS, sender=deployer, max_fee="300 gwei")
+    if save_deployed_address(network_name, allowed_list.address):
+        print(f"Deployment address is written to deployed_{network_name}.txt")
+    else:
+        print(f"Deployment address is not written to deployed_{network_name}.txt on a local or forked network")
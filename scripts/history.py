@@ -0,0 +1,81 @@
+import json
+
+import click
+from ape import project
+from ape.cli import ConnectedProviderCommand
+
+from utils.history import HistoryIndex, HistorySyncer
+from utils.syncer import DEFAULT_CONFIRMATIONS
+
+db_option = click.option("--db", "db_path", default="history.db", show_default=True, help="SQLite database path")
+
+
+@click.group()
+def cli():
+    """History index of the allowed list versions"""
+
+
+@cli.command(cls=ConnectedProviderCommand)
+@db_option
+@click.option("--address", required=True, help="Allowed list contract address")
+@click.option("--start-block", default=0, show_default=True, help="Block to start indexing from, e.g. deploy block")
+@click.option(
+    "--confirmations",
+    default=DEFAULT_CONFIRMATIONS,
+    show_default=True,
+    help="Number of the latest blocks left unindexed as they can still be reorged out",
+)
+def sync(db_path, address, start_block, confirmations):
+    """Index the contract logs emitted since the last sync"""
+    index = HistoryIndex(db_path)
+    try:
+        syncer = HistorySyncer(
+            project.MEVBoostRelayAllowedList.at(address), index, start_block, confirmations=confirmations
+        )
+        applied = syncer.sync()
+    finally:
+        index.close()
+    click.echo(f"Applied {applied} logs, synced up to block {syncer.block}, allowed list version {syncer.version}")
+
+
+@cli.command()
+@db_option
+@click.argument("block", type=int)
+def relays_at(db_path, block):
+    """Print the relays allowed at the block"""
+    index = HistoryIndex(db_path)
+    try:
+        result = {
+            "block": block,
+            "version": index.version_at(block),
+            "relays": [relay._asdict() for relay in index.relays_at(block)],
+        }
+    finally:
+        index.close()
+    click.echo(json.dumps(result, indent=2))
+
+
+@cli.command()
+@db_option
+@click.argument("from_block", type=int)
+@click.argument("to_block", type=int)
+def relays_between(db_path, from_block, to_block):
+    """Print the relays allowed at any block of the range with their allowed intervals"""
+    index = HistoryIndex(db_path)
+    try:
+        result = {
+            "from_block": from_block,
+            "to_block": to_block,
+            "versions": [{"version": v, "block": b} for v, b in index.versions_between(from_block, to_block)],
+            "relays": [
+                {
+                    **interval.relay._asdict(),
+                    "added_block": interval.added_block,
+                    "removed_block": interval.removed_block,
+                }
+                for interval in index.relays_between(from_block, to_block)
+            ],
+        }
+    finally:
+        index.close()
+    click.echo(json.dumps(result, indent=2))
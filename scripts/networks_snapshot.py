@@ -0,0 +1,29 @@
+import json
+
+import click
+
+from utils.multi_network import diff_relays, load_deployments, read_all
+
+
+@click.command()
+@click.option("--rpc", "rpc_urls", multiple=True, help="RPC URL of a network as <network>=<url>, overrides env")
+def cli(rpc_urls):
+    """
+    Read the allowed list on every network from deployed_<network>.txt concurrently and diff the relays.
+
+    RPC URLs are taken from RPC_URL_<NETWORK> env variables, RPC_URL for mainnet, or --rpc options.
+    """
+    deployments = load_deployments(rpc_urls=dict(rpc.split("=", 1) for rpc in rpc_urls))
+    snapshots, errors = read_all(deployments)
+
+    result = {
+        "networks": {network: snapshot._asdict() for network, snapshot in snapshots.items()},
+        "errors": errors,
+        "relays_diff": diff_relays(snapshots),
+    }
+    for snapshot in result["networks"].values():
+        snapshot["relays"] = [relay._asdict() for relay in snapshot["relays"]]
+    for relays in result["relays_diff"].values():
+        for network, relay in relays.items():
+            relays[network] = relay._asdict() if relay is not None else None
+    click.echo(json.dumps(result, indent=2))
@@ -0,0 +1,42 @@
+import asyncio
+import json
+from pathlib import Path
+
+import click
+from ape import project
+from ape.cli import ConnectedProviderCommand
+
+from utils.files import atomic_write_text
+from utils.prober import DEFAULT_CONCURRENCY, DEFAULT_SAMPLES, DEFAULT_TIMEOUT, probe_relays, rank_relays
+from utils.relay import Relay
+
+
+def format_ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--address", required=True, help="Allowed list contract address")
+@click.option("--output", "output_file", help="Path of the JSON file to write the ranked relays to")
+@click.option("--samples", default=DEFAULT_SAMPLES, show_default=True, help="Status requests per relay")
+@click.option("--timeout", default=DEFAULT_TIMEOUT, show_default=True, help="Request timeout in seconds")
+@click.option("--concurrency", default=DEFAULT_CONCURRENCY, show_default=True, help="Max open connections")
+@click.option("--max-optional", type=int, help="Max number of optional relays to keep, all by default")
+def cli(address, output_file, samples, timeout, concurrency, max_optional):
+    """Probe the allowed relays status endpoints and rank them by latency. Mandatory relays are never dropped"""
+    relays = [Relay(*relay) for relay in project.MEVBoostRelayAllowedList.at(address).get_relays()]
+    results = asyncio.run(probe_relays(relays, samples, timeout, concurrency))
+
+    for result in sorted(results, key=lambda r: (r.p50 is None, r.p50 or 0)):
+        click.echo(
+            f"{'M' if result.relay.is_mandatory else ' '} p50 {format_ms(result.p50):>8} ms "
+            f"p99 {format_ms(result.p99):>8} ms errors {result.errors} {result.relay.uri}"
+            + (f" ({result.last_error})" if result.last_error else "")
+        )
+
+    ranked = [
+        {**result.relay._asdict(), "p50": result.p50, "p99": result.p99, "errors": result.errors}
+        for result in rank_relays(results, max_optional)
+    ]
+    if output_file:
+        atomic_write_text(Path(output_file), json.dumps(ranked, indent=2))
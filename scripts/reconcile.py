@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+import click
+from ape import project
+from ape.cli import ConnectedProviderCommand
+
+from utils.files import atomic_write_text
+from utils.reconciler import load_desired_relays, reconcile
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--address", required=True, help="Allowed list contract address")
+@click.option("--desired", "desired_file", required=True, help="YAML or JSON file with the desired relays")
+@click.option("--sender", help="Owner or manager address to send the calls from, the owner by default")
+@click.option("--output", "output_file", help="Path of the JSON file to write the planned calls to")
+@click.option(
+    "--max-call-gas", type=int, help="Limit of the estimated gas of a call, half of the block gas limit by default"
+)
+def cli(address, desired_file, sender, output_file, max_call_gas):
+    """
+    Plan the fewest calls bringing the allowed list to the desired relays, matched by URI.
+
+    The calls are verified and their gas is measured on an isolated chain, run on a local network or a fork,
+    e.g. --network :mainnet-fork:foundry. Unchanged relays are never touched.
+    """
+    contract = project.MEVBoostRelayAllowedList.at(address)
+    planned = reconcile(contract, load_desired_relays(desired_file), sender or contract.get_owner(), max_call_gas)
+
+    if not planned:
+        click.echo("The allowed list is already in the desired state")
+    for planned_call in planned:
+        call = planned_call.call
+        count = len(call.args[0]) if call.method in ("add_relays", "remove_relays") else 1
+        click.echo(f"{call.method}: {count} relay(s), {planned_call.gas} gas")
+    click.echo(f"Total: {len(planned)} transaction(s), {sum(p.gas for p in planned)} gas")
+
+    if output_file:
+        plan = [
+            {"to": contract.address, "method": p.call.method, "args": p.call.args, "calldata": p.calldata, "gas": p.gas}
+            for p in planned
+        ]
+        atomic_write_text(Path(output_file), json.dumps(plan, indent=2, ensure_ascii=False))
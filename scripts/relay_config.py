@@ -0,0 +1,69 @@
+import time
+
+import click
+from ape import project
+from ape.cli import ConnectedProviderCommand
+
+from utils.client import CachedAllowedList
+from utils.metrics import InstrumentedContract, Metrics, start_metrics_server
+from utils.relay_config import OUTPUT_FORMATS, PLAIN_FORMAT, RelayConfigGenerator
+
+POLL = "poll"
+SUBSCRIBE = "subscribe"
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--address", required=True, help="Allowed list contract address")
+@click.option("--output", "output_file", required=True, help="Path of the generated relays config")
+@click.option("--format", "output_format", type=click.Choice(OUTPUT_FORMATS), default=PLAIN_FORMAT, show_default=True)
+@click.option("--hook", help="Shell command to run after the config is updated")
+@click.option("--cache", "cache_file", help="Path of the allowed list cache file, to survive restarts")
+@click.option("--mode", type=click.Choice([POLL, SUBSCRIBE]), default=POLL, show_default=True)
+@click.option("--interval", default=60, show_default=True, help="Poll interval in seconds")
+@click.option("--once", is_flag=True, help="Generate the config and exit")
+@click.option("--metrics-port", type=int, help="Serve the RPC metrics for Prometheus at /metrics on this port")
+def cli(address, output_file, output_format, hook, cache_file, mode, interval, once, metrics_port):
+    """
+    Generate mev-boost relays config from the allowed list and keep it up to date.
+
+    In the poll mode every cycle costs a single get_allowed_list_version() call.
+    In the subscribe mode the config is regenerated on AllowedListUpdated events.
+    """
+    contract = project.MEVBoostRelayAllowedList.at(address)
+    metrics = Metrics()
+    if metrics_port is not None:
+        start_metrics_server(metrics, port=metrics_port)
+    allowed_list = CachedAllowedList(InstrumentedContract(contract, metrics), cache_file)
+    generator = RelayConfigGenerator(allowed_list, output_file, output_format, hook)
+
+    def update():
+        if generator.update():
+            click.echo(f"Relays config updated to allowed list version {allowed_list.version}")
+        metrics.set_allowed_list_gauges(contract.address, allowed_list.version, allowed_list.relays)
+
+    if once:
+        update()
+        return
+
+    def update_or_log():
+        # a transient RPC error or a failing hook must not stop the daemon, the update is retried next cycle
+        try:
+            update()
+        except Exception as error:
+            click.echo(f"Relays config update failed: {error!r}", err=True)
+
+    update_or_log()
+    if mode == POLL:
+        while True:
+            time.sleep(interval)
+            update_or_log()
+    else:
+        while True:
+            try:
+                for _ in contract.AllowedListUpdated.poll_logs():
+                    update_or_log()
+            except Exception as error:
+                click.echo(f"Events subscription failed: {error!r}", err=True)
+                time.sleep(interval)
+                # the updates might have been missed while the subscription was down
+                update_or_log()
@@ -0,0 +1,64 @@
+import asyncio
+from pathlib import Path
+
+import click
+from ape import project
+from ape.cli import ConnectedProviderCommand
+
+from utils.client import CachedAllowedList
+from utils.metrics import InstrumentedContract, Metrics, start_metrics_server
+from utils.snapshots import allowed_list_snapshot, publish_snapshot, SnapshotServer
+
+
+async def serve(
+    allowed_list: CachedAllowedList, metrics: Metrics, directory: Path, host: str, port: int, interval: float
+):
+    server = SnapshotServer(directory)
+    http_server = await server.start(host, port)
+    click.echo(
+        f"Serving snapshots of {allowed_list.contract.address} on {host}:{http_server.sockets[0].getsockname()[1]}"
+    )
+
+    while True:
+        # a transient RPC error must not stop the server, the latest snapshot is served and the refresh is retried
+        try:
+            # the RPC calls block, keep them off the event loop serving the requests
+            if await asyncio.to_thread(allowed_list.refresh) or server.snapshot is None:
+                snapshot = allowed_list_snapshot(allowed_list)
+                if server.publish(snapshot):
+                    click.echo(f"Published snapshot {snapshot.hash} of allowed list version {snapshot.version}")
+            metrics.set_allowed_list_gauges(allowed_list.contract.address, allowed_list.version, allowed_list.relays)
+        except Exception as error:
+            click.echo(f"Snapshot refresh failed: {error!r}", err=True)
+        await asyncio.sleep(interval)
+
+
+@click.command(cls=ConnectedProviderCommand)
+@click.option("--address", required=True, help="Allowed list contract address")
+@click.option("--dir", "directory", required=True, help="Directory of the snapshot files")
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8080, show_default=True)
+@click.option("--interval", default=12.0, show_default=True, help="Allowed list version poll interval in seconds")
+@click.option("--once", is_flag=True, help="Publish the snapshot files and exit, e.g. to serve them statically")
+@click.option("--metrics-port", type=int, help="Serve the RPC metrics for Prometheus at /metrics on this port")
+def cli(address, directory, host, port, interval, once, metrics_port):
+    """
+    Publish the allowed list as content-addressed gzipped JSON and CBOR snapshots and serve them over HTTP.
+
+    Node operators poll /latest.json or /latest.cbor with If-None-Match, add ?wait=<seconds> to long-poll.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    metrics = Metrics()
+    allowed_list = CachedAllowedList(InstrumentedContract(project.MEVBoostRelayAllowedList.at(address), metrics))
+
+    if once:
+        allowed_list.refresh()
+        snapshot = allowed_list_snapshot(allowed_list)
+        publish_snapshot(directory, snapshot)
+        click.echo(f"Published snapshot {snapshot.hash} of allowed list version {snapshot.version}")
+        return
+
+    if metrics_port is not None:
+        start_metrics_server(metrics, host, metrics_port)
+    asyncio.run(serve(allowed_list, metrics, directory, host, port, interval))
@@ -1,11 +1,21 @@
 import sys
 import os
+import functools
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from typing import NamedTuple
 import pytest
-from ape import accounts, project
+from ape import accounts, chain, project
+from eth_abi import encode as abi_encode
+from eth_utils import keccak
+from web3 import EthereumTesterProvider, Web3
+from web3.exceptions import ContractLogicError
 from ape.contracts.base import ContractEvent
 from ape.types import ContractLog, AddressType
 from ape.api.transactions import ReceiptAPI
+from ape_ethereum.multicall.constants import MULTICALL3_CODE
 
 sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
 from config import (
@@ -29,47 +39,107 @@ class Relay(NamedTuple):
     description: str
 
 
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def pytest_configure(config):
+    if "PYTEST_XDIST_WORKER" in os.environ:
+        # every xdist worker runs its own local chain. Start the worker's anvil on a port of its own,
+        # otherwise the workers attach to the anvil of the first one at the default port
+        os.environ["APE_FOUNDRY_HOST"] = f"http://127.0.0.1:{free_port()}"
+    elif getattr(config.option, "numprocesses", None):
+        # compile before the workers start, so they do not race writing the build cache
+        project.load_contracts()
+
+
+# The chain state is restored after every test by the ape isolation fixtures,
+# so the stateful fixtures are session-scoped and set up only once.
+# The state created by a test, e.g. the allowed list changes or
+# the funded accounts balances, never leaks into the next test.
+
+
+@functools.cache
 def impersonate_with_gas(address):
+    """
+    @dev Cached, so must be called from session-scoped fixtures only: the balance
+         set inside a test would be reverted with the test changes
+    """
     account = accounts[address]
-    account.balance = 10**18  # impersonated accounts must pay for gas on the fork
+    if account.balance < 10**18:
+        account.balance = 10**18  # impersonated accounts must pay for gas on the fork
     return account
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def deployer():
     return accounts.test_accounts[0]
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def stranger():
     return accounts.test_accounts[9]
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def lido_agent():
     return impersonate_with_gas(LIDO_DAO_AGENT_ADDRESS)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope="session")
 def lido_easy_track_script_executor():
     return impersonate_with_gas(LIDO_EASY_TRACK_SCRIPT_EXECUTOR_ADDRESS)
 
 
-@pytest.fixture()
+@pytest.fixture(scope="session")
 def allowed_list(deployer):
     return project.MEVBoostRelayAllowedList.deploy(LIDO_DAO_AGENT_ADDRESS, sender=deployer)
 
 
-@pytest.fixture(scope="module")
-def dai_token():
+@pytest.fixture(scope="session")
+def allowed_list_factory(deployer):
+    implementation = project.MEVBoostRelayAllowedListInitializable.deploy(sender=deployer)
+    return project.MEVBoostRelayAllowedListFactory.deploy(implementation, sender=deployer)
+
+
+@pytest.fixture(scope="session")
+def dai_token(dai_token_holder):
+    if DAI_TOKEN_ADDRESS is None:
+        # no Dai on the network, e.g. the offline local chain
+        token = project.DaiMock.deploy(chain.chain_id, sender=dai_token_holder)
+        token.mint(dai_token_holder, 10**6 * 10**18, sender=dai_token_holder)
+        return token
     return project.Dai.at(DAI_TOKEN_ADDRESS)
 
 
-@pytest.fixture(scope="module")
-def usdt_token():
+@pytest.fixture(scope="session")
+def usdt_token(usdt_token_holder):
+    if USDT_TOKEN_ADDRESS is None:
+        # no USDT on the network, e.g. the offline local chain
+        return project.UsdtMock.deploy(10**6 * 10**6, "Tether USD", "USDT", 6, sender=usdt_token_holder)
     return project.Usdt.at(USDT_TOKEN_ADDRESS)
 
 
+@pytest.fixture(scope="session")
+def dai_token_holder():
+    return impersonate_with_gas(DAI_TOKEN_HOLDER_ADDRESS)
+
+
+@pytest.fixture(scope="session")
+def usdt_token_holder():
+    return impersonate_with_gas(USDT_TOKEN_HOLDER_ADDRESS)
+
+
+def allowed_list_hash(relays: list[Relay]) -> bytes:
+    """XOR of keccak256 of the ABI encoded relays, supposed to correspond to the contract"""
+    result = 0
+    for relay in relays:
+        result ^= int.from_bytes(keccak(abi_encode(["(string,string,bool,string)"], [tuple(relay)])), "big")
+    return result.to_bytes(32, "big")
+
+
 def assert_single_event(receipt: ReceiptAPI, event: ContractEvent, args: dict):
     logs: list[ContractLog] = list(event.from_receipt(receipt))
     assert len(logs) == 1, f"event '{event.name}' must exist and be single"
@@ -79,23 +149,119 @@ def assert_single_event(receipt: ReceiptAPI, event: ContractEvent, args: dict):
 
 class Helpers:
     dai_token = None
+    dai_token_holder = None
     usdt_token = None
+    usdt_token_holder = None
 
     @staticmethod
     def fund_with_dai(address, amount):
-        dai_holder = impersonate_with_gas(DAI_TOKEN_HOLDER_ADDRESS)
-        assert Helpers.dai_token.balanceOf(dai_holder) >= amount
-        Helpers.dai_token.transfer(address, amount, sender=dai_holder)
+        assert Helpers.dai_token.balanceOf(Helpers.dai_token_holder) >= amount
+        Helpers.dai_token.transfer(address, amount, sender=Helpers.dai_token_holder)
 
     @staticmethod
     def fund_with_usdt(address, amount):
-        usdt_holder = impersonate_with_gas(USDT_TOKEN_HOLDER_ADDRESS)
-        assert Helpers.usdt_token.balanceOf(usdt_holder) >= amount
-        Helpers.usdt_token.transfer(address, amount, sender=usdt_holder)
+        assert Helpers.usdt_token.balanceOf(Helpers.usdt_token_holder) >= amount
+        Helpers.usdt_token.transfer(address, amount, sender=Helpers.usdt_token_holder)
 
 
-@pytest.fixture(scope="module")
-def helpers(dai_token, usdt_token):
+@pytest.fixture(scope="session")
+def helpers(dai_token, dai_token_holder, usdt_token, usdt_token_holder):
     Helpers.dai_token = dai_token
+    Helpers.dai_token_holder = dai_token_holder
     Helpers.usdt_token = usdt_token
+    Helpers.usdt_token_holder = usdt_token_holder
     return Helpers
+
+
+class LocalRpcNode:
+    """
+    Separate in-process chain served over HTTP JSON-RPC, stands in for a network node.
+    Supports only the methods used by the allowed list readers and counts HTTP round trips.
+    """
+
+    def __init__(self):
+        self.web3 = Web3(EthereumTesterProvider())
+        self.deployer = self.web3.eth.accounts[0]
+        self.round_trips = 0
+        self.requests: list[str] = []
+        self._lock = threading.Lock()
+
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with node._lock:
+                    node.round_trips += 1
+                    reply = [node.handle(r) for r in body] if isinstance(body, list) else node.handle(body)
+                data = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def deploy_allowed_list(self, owner=None):
+        """Deploy the allowed list owned by `owner`, the node deployer by default"""
+        contract_type = project.MEVBoostRelayAllowedList.contract_type
+        abi = [item.model_dump(mode="json", by_alias=True) for item in contract_type.abi]
+        factory = self.web3.eth.contract(abi=abi, bytecode=contract_type.deployment_bytecode.bytecode)
+        tx_hash = factory.constructor(owner or self.deployer).transact({"from": self.deployer})
+        address = self.web3.eth.get_transaction_receipt(tx_hash).contractAddress
+        return self.web3.eth.contract(address=address, abi=abi)
+
+    def deploy_multicall3(self) -> str:
+        """Deploy Multicall3 runtime code shipped with ape, return its address"""
+        # constructor returning the code appended to it: push2 size, dup1, push2 13, push1 0, codecopy, push1 0, return
+        constructor = bytes.fromhex(f"61{len(MULTICALL3_CODE):04x}80" + "61000d" + "6000" + "39" + "6000" + "f3")
+        tx_hash = self.web3.eth.send_transaction({"from": self.deployer, "data": constructor + MULTICALL3_CODE})
+        return self.web3.eth.get_transaction_receipt(tx_hash).contractAddress
+
+    def handle(self, request: dict) -> dict:
+        method, params = request["method"], request.get("params", [])
+        self.requests.append(method)
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            if method == "eth_chainId":
+                reply["result"] = hex(self.web3.eth.chain_id)
+            elif method == "eth_blockNumber":
+                reply["result"] = hex(self.web3.eth.block_number)
+            elif method == "eth_call":
+                tx = {"to": params[0]["to"], "data": params[0].get("data") or params[0].get("input")}
+                block = params[1] if len(params) > 1 else "latest"
+                block = int(block, 16) if block.startswith("0x") else block
+                reply["result"] = Web3.to_hex(self.web3.eth.call(tx, block_identifier=block))
+            else:
+                reply["error"] = {"code": -32601, "message": f"method {method} not supported"}
+        except ContractLogicError as error:
+            reply["error"] = {"code": 3, "message": str(error), "data": error.data}
+        return reply
+
+
+@pytest.fixture()
+def local_rpc_nodes():
+    """Factory of the stand-in network nodes, stopped at the test teardown"""
+    nodes = []
+
+    def start() -> LocalRpcNode:
+        node = LocalRpcNode()
+        nodes.append(node)
+        return node
+
+    yield start
+    for node in nodes:
+        node.close()
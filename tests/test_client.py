@@ -0,0 +1,89 @@
+"""
+Tests for the caching reader of MEV Boost Relays Allowed List
+"""
+
+import json
+
+from ape import chain, project
+from conftest import Relay
+from utils.client import CachedAllowedList
+
+TEST_RELAY0 = Relay("https://relay-0.test", "Relay Operator #0", True, "")
+TEST_RELAY1 = Relay("https://relay-1.test", "Relay Operator #1", False, "Optional relay")
+
+
+def test_relays_are_refetched_only_on_version_change(allowed_list, lido_agent):
+    client = CachedAllowedList(allowed_list)
+    assert client.get_relays() == []
+    assert (client.hits, client.misses) == (0, 1)
+
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+    assert client.get_relays() == [TEST_RELAY0]
+    assert client.get_relays() == [TEST_RELAY0]
+    assert client.get_relays() == [TEST_RELAY0]
+    assert (client.hits, client.misses) == (2, 2)
+    assert client.version == 1
+
+    allowed_list.add_relay(*TEST_RELAY1, sender=lido_agent)
+    allowed_list.remove_relay(TEST_RELAY0.uri, sender=lido_agent)
+    assert client.refresh()
+    assert not client.refresh()
+    assert client.relays == [TEST_RELAY1]
+    assert (client.hits, client.misses) == (3, 3)
+    assert client.version == 3
+
+
+def test_by_uri(allowed_list, lido_agent):
+    allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_agent)
+    client = CachedAllowedList(allowed_list)
+    assert client.by_uri(TEST_RELAY0.uri) is None, "cache must not be filled before the first refresh"
+
+    client.refresh()
+    assert client.by_uri(TEST_RELAY0.uri) == TEST_RELAY0
+    assert client.by_uri(TEST_RELAY1.uri) == TEST_RELAY1
+    assert client.by_uri("https://unknown.test") is None
+
+    allowed_list.remove_relay(TEST_RELAY0.uri, sender=lido_agent)
+    client.refresh()
+    assert client.by_uri(TEST_RELAY0.uri) is None
+
+
+def test_cache_file(allowed_list, lido_agent, tmp_path):
+    cache_file = tmp_path / "allowed_list.json"
+    allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_agent)
+
+    CachedAllowedList(allowed_list, cache_file).refresh()
+    assert cache_file.exists()
+
+    client = CachedAllowedList(allowed_list, cache_file)
+    assert client.version == 1
+    assert client.by_uri(TEST_RELAY1.uri) == TEST_RELAY1
+    assert client.get_relays() == [TEST_RELAY0, TEST_RELAY1]
+    assert (client.hits, client.misses) == (1, 0), "relays must be served from the cache file"
+
+    allowed_list.remove_relay(TEST_RELAY1.uri, sender=lido_agent)
+    assert client.get_relays() == [TEST_RELAY0]
+    assert CachedAllowedList(allowed_list, cache_file).relays == [TEST_RELAY0]
+
+
+def test_cache_file_of_another_contract_is_ignored(allowed_list, deployer, lido_agent, tmp_path):
+    cache_file = tmp_path / "allowed_list.json"
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+    CachedAllowedList(allowed_list, cache_file).refresh()
+
+    another_list = project.MEVBoostRelayAllowedList.deploy(lido_agent, sender=deployer)
+    client = CachedAllowedList(another_list, cache_file)
+    assert client.version is None
+    assert client.get_relays() == []
+
+
+def test_cache_file_of_another_chain_is_ignored(allowed_list, lido_agent, tmp_path):
+    cache_file = tmp_path / "allowed_list.json"
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+    CachedAllowedList(allowed_list, cache_file).refresh()
+    assert json.loads(cache_file.read_text())["chain_id"] == chain.chain_id
+
+    # e.g. a CREATE2 deployment at the same address on another network
+    client = CachedAllowedList(allowed_list, cache_file, chain_id=chain.chain_id + 1)
+    assert client.version is None
+    assert client.get_relays() == [TEST_RELAY0]
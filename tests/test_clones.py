@@ -0,0 +1,102 @@
+"""
+Tests for the allowed list clones deployed by MEV Boost Relays Allowed List Factory
+"""
+
+from pathlib import Path
+
+from ape import chain, project, reverts
+from conftest import assert_single_event, Relay, ZERO_ADDRESS
+from utils.clones import create_allowed_list, deploy_factory, get_clones, is_clone, minimal_proxy_code
+
+RELAY0 = Relay("https://relay-0.test", "Relay Operator #0", True, "")
+RELAY1 = Relay("https://relay-1.test", "Relay Operator #1", False, "")
+CONTRACTS_DIR = Path(__file__).parent.parent / "contracts"
+
+
+def contract_blocks(name: str) -> tuple[list[str], list[str]]:
+    """
+    Top level blocks of the contract source after the header comment, separated by two empty lines,
+    split into the ownership setup blocks, the constructor and `initialize`, and all the others
+    """
+    header, body = (CONTRACTS_DIR / f"{name}.vy").read_text().split("\n\n", 1)
+    assert header.startswith("# @version 0.3.6\n")
+    setup, others = [], []
+    for block in body.split("\n\n\n"):
+        (setup if "def __init__(" in block or "def initialize(" in block else others).append(block)
+    return setup, others
+
+
+def test_initializable_list_has_the_same_interface():
+    full_abi = project.MEVBoostRelayAllowedList.contract_type.abi
+    initializable_abi = project.MEVBoostRelayAllowedListInitializable.contract_type.abi
+    assert [abi for abi in full_abi if abi.type != "constructor"] == [
+        abi for abi in initializable_abi if abi.type != "constructor" and getattr(abi, "name", None) != "initialize"
+    ]
+
+
+def test_initializable_list_has_the_same_code():
+    # the initializable list is a copy, so every change of the audited list must be copied there as is
+    setup, blocks = contract_blocks("MEVBoostRelayAllowedList")
+    initializable_setup, initializable_blocks = contract_blocks("MEVBoostRelayAllowedListInitializable")
+    assert len(setup) == 1 and len(initializable_setup) == 2
+    assert initializable_blocks == blocks
+
+
+def test_create_clones(allowed_list_factory, lido_agent, stranger, deployer):
+    implementation = allowed_list_factory.get_implementation()
+    start_block = chain.blocks.head.number
+    first = create_allowed_list(allowed_list_factory, lido_agent, sender=stranger)
+    second = create_allowed_list(allowed_list_factory, stranger, sender=stranger)
+
+    assert first.address != second.address
+    assert bytes(chain.provider.get_code(first.address)) == minimal_proxy_code(implementation)
+    assert is_clone(second.address, implementation)
+    assert not is_clone(implementation, implementation)
+    assert first.get_owner() == lido_agent
+    assert second.get_owner() == stranger
+
+    clones = get_clones(allowed_list_factory, start_block)
+    assert [(c.address, c.owner) for c in clones] == [(first.address, lido_agent), (second.address, stranger)]
+    assert [c.address for c in get_clones(allowed_list_factory, start_block, owner=stranger)] == [second.address]
+
+
+def test_clones_have_own_storage(allowed_list_factory, lido_agent, stranger):
+    first = create_allowed_list(allowed_list_factory, lido_agent, sender=stranger)
+    second = create_allowed_list(allowed_list_factory, stranger, sender=stranger)
+
+    receipt = first.add_relay(*RELAY0, sender=lido_agent)
+    assert_single_event(receipt, first.AllowedListUpdated, {"allowed_list_version": 1})
+    second.add_relays([RELAY0, RELAY1], sender=stranger)
+    second.remove_relay(RELAY0.uri, sender=stranger)
+
+    assert first.get_relays() == [RELAY0]
+    assert second.get_relays() == [RELAY1]
+    assert (first.get_allowed_list_version(), second.get_allowed_list_version()) == (1, 2)
+    with reverts("msg.sender not owner or manager"):
+        first.add_relay(*RELAY1, sender=stranger)
+
+    first.set_manager(stranger, sender=lido_agent)
+    first.add_relay(*RELAY1, sender=stranger)
+    assert second.get_manager() == ZERO_ADDRESS
+
+
+def test_clone_initialized_once(allowed_list_factory, lido_agent, stranger):
+    clone = create_allowed_list(allowed_list_factory, lido_agent, sender=stranger)
+    with reverts("already initialized"):
+        clone.initialize(stranger, sender=stranger)
+    with reverts("zero owner address"):
+        allowed_list_factory.create_allowed_list(ZERO_ADDRESS, sender=stranger)
+
+
+def test_implementation_is_locked(allowed_list_factory, stranger):
+    implementation = project.MEVBoostRelayAllowedListInitializable.at(allowed_list_factory.get_implementation())
+    assert implementation.get_owner() == implementation.address
+    with reverts("already initialized"):
+        implementation.initialize(stranger, sender=stranger)
+
+
+def test_factory_implementation_must_be_contract(deployer, stranger):
+    with reverts("implementation is not a contract"):
+        project.MEVBoostRelayAllowedListFactory.deploy(stranger, sender=deployer)
+    factory = deploy_factory(deployer)
+    assert is_clone(create_allowed_list(factory, stranger, sender=stranger).address, factory.get_implementation())
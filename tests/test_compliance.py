@@ -0,0 +1,233 @@
+"""
+Tests for the streaming compliance checker of the delivered payloads
+"""
+
+import csv
+import gzip
+import json
+import os
+import random
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+from conftest import Relay
+from utils.compliance import AllowedSegments, ComplianceChecker, read_chunks, relay_key
+from utils.history import HistoryIndex, RelayInterval
+
+SYNTHETIC_ROWS = 5_000
+# the throughput and memory benchmarks depend on the machine, so they run only on demand, e.g. COMPLIANCE_ROWS=5000000
+BENCHMARK_ROWS = int(os.environ.get("COMPLIANCE_ROWS", 0))
+benchmark = pytest.mark.skipif(not BENCHMARK_ROWS, reason="set COMPLIANCE_ROWS to run the benchmarks")
+FIELDS = ["block_number", "relay", "proposer_pubkey", "operator"]
+
+
+def relay(host: str, is_mandatory: bool = False, pubkey: str = "0xab") -> Relay:
+    return Relay(f"https://{pubkey}@{host}", f"{host} operator", is_mandatory, "")
+
+
+def test_relay_key():
+    assert relay_key("https://0xabc@Boost-Relay.Flashbots.net/") == "boost-relay.flashbots.net"
+    assert relay_key("boost-relay.flashbots.net") == "boost-relay.flashbots.net"
+    assert relay_key("http://relay.test:8080/path") == "relay.test"
+
+
+def allowed_at(intervals: list[RelayInterval], host: str, block: int) -> tuple[bool, bool]:
+    """Reference check, a linear scan of the intervals"""
+    matching = [
+        i
+        for i in intervals
+        if relay_key(i.relay.uri) == host
+        and i.added_block <= block
+        and (i.removed_block is None or block < i.removed_block)
+    ]
+    return bool(matching), any(i.relay.is_mandatory for i in matching)
+
+
+def random_intervals(rng: random.Random, hosts: list[str]) -> list[RelayInterval]:
+    intervals = []
+    for host in hosts:
+        block = rng.randint(0, 50)
+        for _ in range(rng.randint(1, 4)):
+            # different URIs of the same host may overlap, and a relay may be removed in the block it was added
+            added = max(block + rng.randint(-5, 20), 0)
+            removed = added + rng.randint(0, 30) if rng.random() < 0.8 else None
+            intervals.append(RelayInterval(relay(host, rng.random() < 0.3, f"0x{rng.randrange(8)}"), added, removed))
+            block = added + 10
+    return intervals
+
+
+def test_segments_lookup_matches_intervals_scan():
+    rng = random.Random(1)
+    hosts = [f"relay-{i}.test" for i in range(8)]
+    for _ in range(20):
+        intervals = random_intervals(rng, hosts)
+        segments = AllowedSegments(intervals)
+        queried_hosts = [rng.choice(hosts + ["never-allowed.test"]) for _ in range(2000)]
+        blocks = np.array([rng.randint(-1, 200) for _ in range(2000)], dtype=np.int64)
+        allowed, mandatory = segments.lookup(segments.relay_ids_of(queried_hosts), blocks)
+        expected = [allowed_at(intervals, host, int(block)) for host, block in zip(queried_hosts, blocks)]
+        assert list(zip(allowed.tolist(), mandatory.tolist())) == expected
+
+    empty = AllowedSegments([])
+    assert empty.lookup(empty.relay_ids_of(["relay.test"]), np.array([1])) == (np.array([False]), np.array([False]))
+
+
+def test_history_intervals(tmp_path):
+    index = HistoryIndex(tmp_path / "history.db")
+    index.add_relay(relay("a.test"), 10)
+    index.add_relay(relay("b.test", True), 10)
+    index.remove_relay(relay("a.test").uri, 20)
+    index.add_relay(relay("c.test"), 30)
+    index.remove_relay(relay("c.test").uri, 30)
+    index.commit()
+    assert index.intervals() == [
+        RelayInterval(relay("a.test"), 10, 20),
+        RelayInterval(relay("b.test", True), 10, None),
+    ]
+
+
+def write_rows(path, rows: list[dict]):
+    if path.name.removesuffix(".gz").endswith(".csv"):
+        with gzip.open(path, "wt", newline="") if path.suffix == ".gz" else open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def test_check_files(tmp_path):
+    intervals = [
+        RelayInterval(relay("a.test", True), 100, 200),
+        RelayInterval(relay("b.test"), 100, None),
+    ]
+    rows = [
+        # allowed at the parent block only, the proposer could not know about the removal
+        {"block_number": 200, "relay": "a.test", "proposer_pubkey": "0x01", "operator": "Op A"},
+        {"block_number": 150, "relay": "B.test", "proposer_pubkey": "0x01", "operator": "Op A"},
+        # added in the parent block
+        {"block_number": 101, "relay": "a.test", "proposer_pubkey": "0x02", "operator": "Op B"},
+        # not yet allowed at the parent block
+        {"block_number": 100, "relay": "b.test", "proposer_pubkey": "0x02", "operator": "Op B"},
+        {"block_number": 201, "relay": "a.test", "proposer_pubkey": "0x02", "operator": "Op B"},
+        {"block_number": 300, "relay": "unknown.test", "proposer_pubkey": "0x02", "operator": "Op B"},
+        {"block_number": 300, "relay": "b.test", "proposer_pubkey": "0x03", "operator": "Op C"},
+    ]
+    expected_operators = {
+        "Op A": {
+            "rows": 2,
+            "violations": 0,
+            "mandatory_coverage": 0.5,
+            "violations_by_relay": {},
+            "first_violation_block": None,
+            "last_violation_block": None,
+        },
+        "Op B": {
+            "rows": 4,
+            "violations": 3,
+            "mandatory_coverage": 0.25,
+            "violations_by_relay": {"a.test": 1, "b.test": 1, "unknown.test": 1},
+            "first_violation_block": 100,
+            "last_violation_block": 300,
+        },
+        "Op C": {
+            "rows": 1,
+            "violations": 0,
+            "mandatory_coverage": 0.0,
+            "violations_by_relay": {},
+            "first_violation_block": None,
+            "last_violation_block": None,
+        },
+    }
+    for name in ["payloads.jsonl", "payloads.csv", "payloads.csv.gz"]:
+        write_rows(tmp_path / name, rows)
+        checker = ComplianceChecker(AllowedSegments(intervals))
+        # the chunks split the rows of the operators
+        checker.check_file(tmp_path / name, chunk_size=3)
+        assert checker.report() == {"rows": 7, "skipped_rows": 0, "violations": 3, "operators": expected_operators}
+
+    # only the validators of the known operators are checked
+    checker = ComplianceChecker(AllowedSegments(intervals), {"0x02": "Op B", "0X01": "Op A"})
+    checker.check_file(tmp_path / "payloads.jsonl", chunk_size=2)
+    report = checker.report()
+    assert (report["rows"], report["skipped_rows"]) == (7, 1)
+    assert report["operators"] == {"Op A": expected_operators["Op A"], "Op B": expected_operators["Op B"]}
+
+
+def write_synthetic_dump(path, num_rows: int, rng: random.Random) -> list[RelayInterval]:
+    """Payloads of 30 operators through 15 relays changing over time, every 1000th row violates"""
+    hosts = [f"relay-{i}.mev.test" for i in range(15)]
+    intervals = [RelayInterval(relay(host, i < 5), 0, None) for i, host in enumerate(hosts[:10])]
+    # the relay picked after the block 1000 stays allowed, the others come and go
+    intervals.append(RelayInterval(relay(hosts[10]), 1000, None))
+    intervals += [RelayInterval(relay(host), 1000 * i, 1000 * i + 200_000) for i, host in enumerate(hosts[11:], 1)]
+    pubkeys = [f"0x{i:096x}" for i in range(300)]
+
+    block = 0
+    with open(path, "w") as f:
+        f.write(",".join(FIELDS) + "\n")
+        for i in range(num_rows):
+            block += rng.random() < 0.5
+            if i % 1000 == 999:
+                host = "not-allowed.mev.test"
+            else:
+                host = hosts[rng.randrange(10)] if block < 1000 or rng.random() < 0.6 else hosts[10]
+            pubkey = rng.choice(pubkeys)
+            f.write(f"{block + 1},{host},{pubkey},Operator #{int(pubkey, 16) % 30}\n")
+    return intervals
+
+
+def test_check_synthetic_dump(tmp_path):
+    path = tmp_path / "payloads.csv"
+    intervals = write_synthetic_dump(path, SYNTHETIC_ROWS, random.Random(3))
+    checker = ComplianceChecker(AllowedSegments(intervals))
+    checker.check_file(path, chunk_size=SYNTHETIC_ROWS // 3)
+
+    report = checker.report()
+    assert report["rows"] == SYNTHETIC_ROWS
+    assert report["violations"] == SYNTHETIC_ROWS // 1000
+    assert len(report["operators"]) == 30
+    assert sum(operator["rows"] for operator in report["operators"].values()) == SYNTHETIC_ROWS
+
+
+@benchmark
+def test_throughput_on_synthetic_dump(tmp_path, record_testsuite_property):
+    path = tmp_path / "payloads.csv"
+    intervals = write_synthetic_dump(path, BENCHMARK_ROWS, random.Random(3))
+    checker = ComplianceChecker(AllowedSegments(intervals))
+    started = time.perf_counter()
+    checker.check_file(path)
+    elapsed = time.perf_counter() - started
+
+    report = checker.report()
+    assert (report["rows"], report["violations"]) == (BENCHMARK_ROWS, BENCHMARK_ROWS // 1000)
+    record_testsuite_property("compliance_rows_per_second", round(BENCHMARK_ROWS / elapsed))
+    record_testsuite_property("compliance_file_mib", round(path.stat().st_size / 2**20))
+    assert BENCHMARK_ROWS / elapsed > 100_000, f"{BENCHMARK_ROWS / elapsed:,.0f} rows/s"
+
+
+@benchmark
+def test_memory_is_flat(tmp_path, record_testsuite_property):
+    rng = random.Random(4)
+    peaks = []
+    for num_rows in [50_000, 200_000]:
+        path = tmp_path / f"payloads-{num_rows}.csv"
+        intervals = write_synthetic_dump(path, num_rows, rng)
+        checker = ComplianceChecker(AllowedSegments(intervals))
+        tracemalloc.start()
+        checker.check_file(path, chunk_size=10_000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    record_testsuite_property("compliance_peak_memory_mib", [round(peak / 2**20, 1) for peak in peaks])
+    assert peaks[1] < peaks[0] * 1.5, f"peak memory {peaks[0]} bytes for 50k rows, {peaks[1]} bytes for 200k rows"
+
+
+def test_read_chunks(tmp_path):
+    path = tmp_path / "payloads.jsonl"
+    path.write_text('{"block_number": 1, "relay": "a.test"}\n\n{"block_number": "2", "relay": "b.test"}\n')
+    assert list(read_chunks(path, ["block_number", "relay", "operator"], chunk_size=1)) == [
+        {"block_number": [1], "relay": ["a.test"], "operator": [""]},
+        {"block_number": ["2"], "relay": ["b.test"], "operator": [""]},
+    ]
@@ -0,0 +1,135 @@
+"""
+Tests for the cost-optimized deployment of MEV Boost Relays Allowed List
+"""
+
+import pytest
+from ape import chain, networks, project
+from ape.contracts import ContractContainer
+from conftest import LIDO_DAO_AGENT_ADDRESS
+from eth_utils import keccak
+from ethpm_types import ContractType
+from web3.utils.address import get_create2_address
+from utils.deployment import (
+    execute_deployment,
+    Fees,
+    fetch_fees,
+    hand_over_ownership,
+    plan_deployment,
+    salt_from_text,
+    save_deployed_address,
+    suggest_fees,
+    write_deployed_address,
+)
+
+GWEI = 10**9
+# runtime code of the deterministic deployment proxy: CREATE2 with the first 32 bytes of the calldata as salt
+DEPLOYMENT_PROXY_RUNTIME = bytes.fromhex(
+    "7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffe0"
+    "3601600081602082378035828234f58015156039578182fd5b8082525050506014600cf3"
+)
+
+
+def deploy_runtime(deployer, runtime: bytes) -> str:
+    """Deploy the runtime code as is, with init code copying it to the memory and returning"""
+    init_code = bytes.fromhex(f"60{len(runtime):02x}80600b6000396000f3") + runtime
+    contract_type = ContractType(abi=[], deploymentBytecode={"bytecode": "0x" + init_code.hex()})
+    return ContractContainer(contract_type).deploy(sender=deployer).address
+
+
+def test_suggest_fees():
+    base_fees = [10 * GWEI, 12 * GWEI, 11 * GWEI]
+    rewards = [[3 * GWEI], [1 * GWEI], [], [2 * GWEI]]
+    assert suggest_fees(base_fees, rewards, 300 * GWEI) == (24 * GWEI, 2 * GWEI)
+    # the ceiling caps the max fee, and the priority fee too
+    assert suggest_fees(base_fees, rewards, 20 * GWEI) == (20 * GWEI, 2 * GWEI)
+    assert suggest_fees(base_fees, rewards, 12 * GWEI) == (12 * GWEI, 1 * GWEI)
+    # no rewards in the history, e.g. empty blocks
+    assert suggest_fees(base_fees, [], 300 * GWEI) == (22 * GWEI, 0)
+    with pytest.raises(RuntimeError):
+        suggest_fees(base_fees, rewards, 11 * GWEI)
+
+
+def test_salt_from_text():
+    assert salt_from_text("0x" + "ab" * 32) == b"\xab" * 32
+    assert salt_from_text("allowed-list-v1") == keccak(text="allowed-list-v1")
+
+
+def test_deploy(deployer, tmp_path):
+    fees = fetch_fees(300 * GWEI)
+    assert 0 < fees.max_fee <= 300 * GWEI
+
+    plan = plan_deployment(project.MEVBoostRelayAllowedList, (LIDO_DAO_AGENT_ADDRESS,), deployer.address, fees)
+    balance = deployer.balance
+    allowed_list = execute_deployment(project.MEVBoostRelayAllowedList, plan, deployer)
+    assert allowed_list.address == plan.address
+    assert allowed_list.get_owner() == LIDO_DAO_AGENT_ADDRESS
+
+    receipt = chain.provider.get_receipt(allowed_list.txn_hash)
+    assert receipt.gas_limit == plan.gas_limit
+    assert receipt.gas_used <= plan.gas_limit
+    assert balance - deployer.balance <= plan.max_cost
+
+    write_deployed_address("local", allowed_list.address, tmp_path)
+    assert (tmp_path / "deployed_local.txt").read_text().strip() == allowed_list.address
+
+
+def test_deploy_with_create2(deployer, stranger):
+    factory = deploy_runtime(deployer, DEPLOYMENT_PROXY_RUNTIME)
+    salt = salt_from_text("allowed-list")
+    fees = fetch_fees(300 * GWEI)
+
+    # the deployer is the initial owner, so the address is the same on every network with the same deployer
+    plan = plan_deployment(project.MEVBoostRelayAllowedList, (deployer.address,), deployer.address, fees, salt, factory)
+    init_code = project.MEVBoostRelayAllowedList.contract_type.deployment_bytecode.to_bytes() + bytes(
+        project.MEVBoostRelayAllowedList.constructor.encode_input(deployer.address)
+    )
+    assert plan.address == get_create2_address(factory, "0x" + salt.hex(), "0x" + init_code.hex())
+
+    allowed_list = execute_deployment(project.MEVBoostRelayAllowedList, plan, deployer)
+    assert allowed_list.address == plan.address
+    assert allowed_list.get_owner() == deployer.address
+    receipt = hand_over_ownership(allowed_list, LIDO_DAO_AGENT_ADDRESS, deployer, fees)
+    assert allowed_list.OwnerChanged.from_receipt(receipt)[0].new_owner == LIDO_DAO_AGENT_ADDRESS
+    assert allowed_list.get_owner() == LIDO_DAO_AGENT_ADDRESS
+
+    # the address does not depend on the deployer nonce, a rerun finds the contract and the owner in place
+    again = plan_deployment(
+        project.MEVBoostRelayAllowedList, (deployer.address,), deployer.address, fees, salt, factory
+    )
+    assert again.already_deployed and again.address == plan.address
+    assert execute_deployment(project.MEVBoostRelayAllowedList, again, deployer).address == plan.address
+    assert hand_over_ownership(allowed_list, LIDO_DAO_AGENT_ADDRESS, deployer, fees) is None
+    with pytest.raises(RuntimeError):
+        hand_over_ownership(allowed_list, stranger.address, deployer, fees)
+
+    with pytest.raises(RuntimeError):
+        plan_deployment(
+            project.MEVBoostRelayAllowedList, (deployer.address,), deployer.address, fees, salt, deployer.address
+        )
+
+
+def test_save_deployed_address(tmp_path):
+    address = "0xF95f069F9AD107938F6ba802a3da87892298610E"
+    deployed_file = tmp_path / "deployed_mainnet.txt"
+    deployed_file.write_text(address + "\n")
+    throwaway = "0x" + "11" * 20
+
+    # a fork rehearsal or a local run never overwrites the committed address
+    assert not save_deployed_address("mainnet", throwaway, networks.ethereum.get_network("mainnet-fork"), tmp_path)
+    assert not save_deployed_address("mainnet", throwaway, root=tmp_path)
+    assert deployed_file.read_text() == address + "\n"
+
+    assert save_deployed_address("mainnet", throwaway, networks.ethereum.get_network("mainnet"), tmp_path)
+    assert deployed_file.read_text() == throwaway + "\n"
+
+
+def test_deploy_above_balance(deployer):
+    plan = plan_deployment(
+        project.MEVBoostRelayAllowedList, (LIDO_DAO_AGENT_ADDRESS,), deployer.address, fetch_fees(300 * GWEI)
+    )
+    # nothing is sent if the deployer may be unable to pay the max fee
+    expensive_plan = plan._replace(fees=Fees(deployer.balance // plan.gas_limit + 1, 0))
+    nonce = deployer.nonce
+    with pytest.raises(RuntimeError):
+        execute_deployment(project.MEVBoostRelayAllowedList, expensive_plan, deployer)
+    assert deployer.nonce == nonce
@@ -0,0 +1,166 @@
+"""
+Gas benchmarks for MEV Boost Relays Allowed List
+"""
+
+from ape import chain, project
+from conftest import Relay
+
+MAX_RELAYS_NUM = 40  # supposed to correspond to the limit in the contract
+MAX_STRING_LENGTH = 1024  # supposed to correspond to the limit in the contract
+
+# Relays lookup is done through the URI hash index, so the cost must not depend on the list size
+LOOKUP_GAS_TOLERANCE = 100
+
+
+def make_relay(i: int) -> Relay:
+    """Relays with the URIs of the same length, so the gas differs only due to the list size"""
+    return Relay(f"https://relay-{i:02d}.mev-boost-relays.test", f"Relay Operator #{i:02d}", False, "")
+
+
+def test_relay_lookup_gas_is_flat(allowed_list, lido_agent):
+    add_gas = []
+    lookup_gas = []
+    for i in range(MAX_RELAYS_NUM):
+        receipt = allowed_list.add_relay(*make_relay(i), sender=lido_agent)
+        add_gas.append(receipt.gas_used)
+        # the most recently added relay is the worst case for a linear scan
+        lookup_gas.append(allowed_list.get_relay_by_uri.estimate_gas_cost(make_relay(i).uri))
+
+    print("\nrelays | add_relay gas | get_relay_by_uri gas")
+    for i in range(MAX_RELAYS_NUM):
+        print(f"{i + 1:6} | {add_gas[i]:13} | {lookup_gas[i]:20}")
+
+    assert max(lookup_gas) - min(lookup_gas) <= LOOKUP_GAS_TOLERANCE
+    # the first relay initializes the list length and version storage slots, skip it
+    assert max(add_gas[1:]) - min(add_gas[1:]) <= LOOKUP_GAS_TOLERANCE
+
+
+def test_remove_relay_keeps_lookup_index(allowed_list, lido_agent):
+    relays = [make_relay(i) for i in range(MAX_RELAYS_NUM)]
+    for relay in relays:
+        allowed_list.add_relay(*relay, sender=lido_agent)
+
+    # remove the first, a middle and the last relay, so the last relay gets moved around
+    for i in [0, MAX_RELAYS_NUM // 2, MAX_RELAYS_NUM - 1]:
+        allowed_list.remove_relay(make_relay(i).uri, sender=lido_agent)
+        relays.remove(make_relay(i))
+
+    assert sorted(tuple(r) for r in allowed_list.get_relays()) == sorted(relays)
+    for relay in relays:
+        assert allowed_list.get_relay_by_uri(relay.uri) == relay
+
+    # removed relay can be added back and found by the URI
+    allowed_list.add_relay(*make_relay(0), sender=lido_agent)
+    assert allowed_list.get_relay_by_uri(make_relay(0).uri) == make_relay(0)
+
+
+def test_batch_gas_per_relay(allowed_list, deployer, lido_agent):
+    batch_size = 5
+    relays = [make_relay(i) for i in range(batch_size)]
+
+    single_add_gas = sum(allowed_list.add_relay(*relay, sender=lido_agent).gas_used for relay in relays)
+    single_remove_gas = sum(allowed_list.remove_relay(relay.uri, sender=lido_agent).gas_used for relay in relays)
+
+    # popped relays leave their data in the storage, use a fresh contract to compare on the same terms
+    batch_list = project.MEVBoostRelayAllowedList.deploy(lido_agent, sender=deployer)
+    batch_add_gas = batch_list.add_relays(relays, sender=lido_agent).gas_used
+    batch_remove_gas = batch_list.remove_relays([relay.uri for relay in relays], sender=lido_agent).gas_used
+
+    print(f"\n{batch_size} relays | single gas per relay | batch gas per relay")
+    print(f"add       | {single_add_gas // batch_size:20} | {batch_add_gas // batch_size:19}")
+    print(f"remove    | {single_remove_gas // batch_size:20} | {batch_remove_gas // batch_size:19}")
+
+    assert batch_add_gas < single_add_gas
+    assert batch_remove_gas < single_remove_gas
+    assert batch_list.get_allowed_list_version() == 2
+
+
+def make_full_relay(i: int) -> Relay:
+    """Relay with all the strings of the max length"""
+    return Relay(
+        uri=f"https://relay-{i:02d}.test/".ljust(MAX_STRING_LENGTH, "x"),
+        operator=f"Relay Operator #{i:02d}".ljust(MAX_STRING_LENGTH, "x"),
+        is_mandatory=i % 4 == 0,
+        description=f"Relay #{i:02d}".ljust(MAX_STRING_LENGTH, "x"),
+    )
+
+
+def call_response_size(contract, method: str, *args) -> int:
+    calldata = getattr(contract, method).encode_input(*args)
+    return len(chain.provider.web3.eth.call({"to": contract.address, "data": calldata}))
+
+
+def test_projected_views_at_full_capacity(allowed_list, lido_agent):
+    for i in range(0, MAX_RELAYS_NUM, 10):
+        allowed_list.add_relays([make_full_relay(j) for j in range(i, i + 10)], sender=lido_agent)
+
+    views = [
+        ("get_relays", ()),
+        ("get_relays_page", (0, 10)),
+        ("get_relay_uris", ()),
+        ("get_relays_by_mandatory", (True,)),
+    ]
+    sizes = {}
+    gas = {}
+    for method, args in views:
+        sizes[method] = call_response_size(allowed_list, method, *args)
+        gas[method] = getattr(allowed_list, method).estimate_gas_cost(*args)
+
+    print(f"\n{'view':24} | response bytes | gas")
+    for method, _ in views:
+        print(f"{method:24} | {sizes[method]:14} | {gas[method]}")
+
+    for method, _ in views[1:]:
+        assert sizes[method] < sizes["get_relays"] / 2
+        assert gas[method] < gas["get_relays"] / 2
+
+
+def test_conditional_fetch_at_full_capacity(allowed_list, lido_agent):
+    for i in range(0, MAX_RELAYS_NUM, 10):
+        allowed_list.add_relays([make_full_relay(j) for j in range(i, i + 10)], sender=lido_agent)
+    version = allowed_list.get_allowed_list_version()
+
+    full_size = call_response_size(allowed_list, "get_relays")
+    changed_size = call_response_size(allowed_list, "get_relays_if_changed", version - 1)
+    unchanged_size = call_response_size(allowed_list, "get_relays_if_changed", version)
+    unchanged_gas = allowed_list.get_relays_if_changed.estimate_gas_cost(version)
+
+    print(f"\nget_relays: {full_size} bytes, get_relays_if_changed: {changed_size} bytes changed,")
+    print(f"{unchanged_size} bytes and {unchanged_gas} gas unchanged")
+
+    # version, offset and length of the empty array
+    assert unchanged_size == 3 * 32
+    assert changed_size == full_size + 32
+
+
+def test_clone_deploy_gas(allowed_list_factory, deployer, lido_agent):
+    full_list = project.MEVBoostRelayAllowedList.deploy(lido_agent, sender=deployer)
+    full_deploy_gas = chain.provider.get_receipt(full_list.txn_hash).gas_used
+    receipt = allowed_list_factory.create_allowed_list(lido_agent, sender=deployer)
+    clone_deploy_gas = receipt.gas_used
+    (log,) = allowed_list_factory.AllowedListCreated.from_receipt(receipt)
+    clone = project.MEVBoostRelayAllowedListInitializable.at(log.allowed_list)
+    # the implementation and the factory are deployed once for all the clones
+    implementation_gas = chain.provider.get_receipt(
+        project.MEVBoostRelayAllowedListInitializable.at(allowed_list_factory.get_implementation()).txn_hash
+    ).gas_used
+    factory_gas = chain.provider.get_receipt(allowed_list_factory.txn_hash).gas_used
+
+    # every call to the clone is delegated to the implementation
+    full_add_gas = full_list.add_relay(*make_relay(0), sender=lido_agent).gas_used
+    clone_add_gas = clone.add_relay(*make_relay(0), sender=lido_agent).gas_used
+    full_view_gas = full_list.get_relays.estimate_gas_cost()
+    clone_view_gas = clone.get_relays.estimate_gas_cost()
+
+    print(f"\n{'':22} | {'full':>9} | {'clone':>9}")
+    print(f"{'deploy':22} | {full_deploy_gas:9} | {clone_deploy_gas:9}")
+    print(f"{'add_relay':22} | {full_add_gas:9} | {clone_add_gas:9}")
+    print(f"{'get_relays':22} | {full_view_gas:9} | {clone_view_gas:9}")
+    print(f"implementation and factory, once: {implementation_gas + factory_gas}")
+    print(f"clones break even after {(implementation_gas + factory_gas) // (full_deploy_gas - clone_deploy_gas) + 1}")
+
+    assert clone_deploy_gas * 10 < full_deploy_gas
+    # the delegatecall to the cold implementation account
+    assert clone_add_gas - full_add_gas < 3000
+    # the proxy also copies the return data to its own memory
+    assert clone_view_gas < full_view_gas * 1.1
@@ -0,0 +1,113 @@
+"""
+Gas benchmarks of every MEV Boost Relays Allowed List entry point, checked against the committed snapshot.
+
+Fails if any number regresses more than GAS_SNAPSHOT_TOLERANCE compared to the snapshot of the provider
+in tests/gas_snapshots, e.g. local-test.json or mainnet-fork-foundry.json, skipped if there is none.
+The gas depends on the provider, e.g. on the hardfork it runs, so the snapshots are kept per provider.
+Run with UPDATE_GAS_SNAPSHOT=1 to rewrite the snapshot after an intended change.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+from ape import chain, project
+from conftest import Relay
+
+GAS_SNAPSHOTS_DIR = Path(__file__).parent / "gas_snapshots"
+UPDATE_GAS_SNAPSHOT_ENV_VAR = "UPDATE_GAS_SNAPSHOT"
+GAS_SNAPSHOT_TOLERANCE = 0.01
+
+MAX_RELAYS_NUM = 40  # supposed to correspond to the limit in the contract
+MAX_STRING_LENGTH = 1024  # supposed to correspond to the limit in the contract
+
+LIST_SIZES = [0, 1, 20, MAX_RELAYS_NUM - 1, MAX_RELAYS_NUM]
+STRING_LENGTHS = [32, 256, MAX_STRING_LENGTH]
+
+
+def make_relay(i: int, length: int) -> Relay:
+    """Relay with all the strings of the given length"""
+    return Relay(
+        uri=f"https://relay-{i:02d}.test/".ljust(length, "x"),
+        operator=f"operator #{i:02d}".ljust(length, "x"),
+        is_mandatory=i % 2 == 0,
+        description=f"description #{i:02d}".ljust(length, "x"),
+    )
+
+
+def measure_tx(send) -> int:
+    """Gas used by the transaction, the chain state is reverted afterwards"""
+    snapshot = chain.snapshot()
+    gas_used = send().gas_used
+    chain.restore(snapshot)
+    return gas_used
+
+
+def measure_gas(allowed_list, deployer, lido_agent) -> dict[str, int]:
+    contract_type = project.MEVBoostRelayAllowedList.contract_type
+    deployed = project.MEVBoostRelayAllowedList.deploy(lido_agent, sender=deployer)
+    gas = {
+        "deploy/gas": chain.provider.get_receipt(deployed.txn_hash).gas_used,
+        "deploy/initcode_size": len(contract_type.deployment_bytecode.to_bytes()),
+        "deploy/runtime_size": len(contract_type.runtime_bytecode.to_bytes()),
+    }
+
+    for length in STRING_LENGTHS:
+        allowed_list = project.MEVBoostRelayAllowedList.deploy(lido_agent, sender=deployer)
+        relays = []
+        for size in LIST_SIZES:
+            # batches of max length relays must fit into the block gas limit
+            for i in range(len(relays), size, 5):
+                new_relays = [make_relay(j, length) for j in range(i, min(i + 5, size))]
+                allowed_list.add_relays(new_relays, sender=lido_agent)
+                relays += new_relays
+            key = f"size={size}/length={length}"
+
+            if size < MAX_RELAYS_NUM:
+                new_relay = make_relay(size, length)
+                gas[f"add_relay/{key}"] = measure_tx(lambda: allowed_list.add_relay(*new_relay, sender=lido_agent))
+            if size > 0:
+                for position, index in [("first", 0), ("middle", size // 2), ("last", size - 1)]:
+                    uri = relays[index].uri
+                    gas[f"remove_relay/{position}/{key}"] = measure_tx(
+                        lambda: allowed_list.remove_relay(uri, sender=lido_agent)
+                    )
+                gas[f"get_relay_by_uri/{key}"] = allowed_list.get_relay_by_uri.estimate_gas_cost(relays[-1].uri)
+            gas[f"get_relays/{key}"] = allowed_list.get_relays.estimate_gas_cost()
+
+    return gas
+
+
+def gas_snapshot_file() -> Path:
+    """Snapshot of the connected provider, e.g. tests/gas_snapshots/mainnet-fork-foundry.json"""
+    return GAS_SNAPSHOTS_DIR / f"{chain.provider.network.name}-{chain.provider.name}.json"
+
+
+def test_gas_snapshot(allowed_list, deployer, lido_agent):
+    snapshot_file = gas_snapshot_file()
+    update = os.environ.get(UPDATE_GAS_SNAPSHOT_ENV_VAR)
+    if not update and not snapshot_file.exists():
+        pytest.skip(f"no gas snapshot {snapshot_file.name} of the provider, run with {UPDATE_GAS_SNAPSHOT_ENV_VAR}=1")
+
+    gas = measure_gas(allowed_list, deployer, lido_agent)
+
+    if update:
+        snapshot_file.write_text(json.dumps(gas, indent=2) + "\n")
+        return
+
+    snapshot = json.loads(snapshot_file.read_text())
+    regressions = []
+    print(f"\n{'benchmark':48} | {'snapshot':>9} | {'current':>9} | change")
+    for key, value in gas.items():
+        expected = snapshot.get(key)
+        if expected is None:
+            regressions.append(f"{key}: not in the snapshot")
+            continue
+        change = (value - expected) / expected
+        print(f"{key:48} | {expected:9} | {value:9} | {change:+.2%}")
+        if change > GAS_SNAPSHOT_TOLERANCE:
+            regressions.append(f"{key}: {expected} -> {value} ({change:+.2%})")
+
+    update_hint = f"gas regressed beyond the tolerance, run with {UPDATE_GAS_SNAPSHOT_ENV_VAR}=1 if intended"
+    assert not regressions, update_hint + ":\n" + "\n".join(regressions)
@@ -0,0 +1,163 @@
+"""
+Tests for the SQLite history index of MEV Boost Relays Allowed List
+"""
+
+import json
+import os
+import random
+import time
+
+from ape import chain
+from click.testing import CliRunner
+from conftest import Relay
+from scripts.history import cli
+from utils.history import ALLOWED_AT_QUERY, ALLOWED_BETWEEN_QUERY, HistoryIndex, HistorySyncer
+
+SYNTHETIC_VERSIONS = 5000
+MAX_RELAYS_NUM = 40  # supposed to correspond to the limit in the contract
+MAX_QUERY_LATENCY = 0.01
+# wall clock timing is flaky on loaded machines, so it is measured only on demand
+MEASURE_QUERY_LATENCY_ENV_VAR = "MEASURE_QUERY_LATENCY"
+
+
+def test_history_matches_contract(allowed_list, lido_agent, tmp_path):
+    relay = lambda i: Relay(f"uri #{i}", f"operator #{i}", i % 2 == 0, "")  # noqa: E731
+    updates = [
+        lambda: allowed_list.add_relays([relay(0), relay(1), relay(2)], sender=lido_agent),
+        lambda: allowed_list.remove_relay(relay(1).uri, sender=lido_agent),
+        lambda: allowed_list.add_relay(*relay(3), sender=lido_agent),
+        lambda: allowed_list.remove_relays([relay(0).uri, relay(3).uri], sender=lido_agent),
+        # edit is remove and add
+        lambda: allowed_list.remove_relay(relay(2).uri, sender=lido_agent),
+        lambda: allowed_list.add_relay(*relay(2)._replace(description="edited"), sender=lido_agent),
+    ]
+    start_block = chain.blocks.head.number
+    expected = {start_block: []}
+    index = HistoryIndex(tmp_path / "history.db")
+    for i, update in enumerate(updates):
+        block = update().block_number
+        expected[block] = sorted(Relay(*r) for r in allowed_list.get_relays())
+        # sync incrementally halfway
+        if i == len(updates) // 2:
+            HistorySyncer(allowed_list, index, confirmations=0).sync()
+    HistorySyncer(allowed_list, index, confirmations=0).sync()
+
+    for block, relays in expected.items():
+        assert sorted(index.relays_at(block)) == relays
+        assert index.version_at(block) == allowed_list.get_allowed_list_version(block_id=block)
+    assert index.relays_at(start_block - 1) == []
+
+    versions = index.versions_between(start_block, chain.blocks.head.number)
+    assert [version for version, _ in versions] == list(range(1, len(updates) + 1))
+
+    intervals = index.relays_between(start_block, chain.blocks.head.number)
+    assert sorted({interval.relay.uri for interval in intervals}) == ["uri #0", "uri #1", "uri #2", "uri #3"]
+    assert len([interval for interval in intervals if interval.removed_block is None]) == 1
+    index.close()
+
+
+def test_unconfirmed_blocks_are_not_indexed(allowed_list, lido_agent, tmp_path):
+    index = HistoryIndex(tmp_path / "history.db")
+    block = allowed_list.add_relay("uri", "operator", True, "", sender=lido_agent).block_number
+    syncer = HistorySyncer(allowed_list, index, confirmations=1)
+    syncer.sync()
+    assert syncer.block == block - 1
+    assert index.relays_at(block) == []
+
+    chain.mine()
+    syncer.sync()
+    assert syncer.block == block
+    assert index.relays_at(block) == [Relay("uri", "operator", True, "")]
+    index.close()
+
+
+def test_cli_queries(allowed_list, lido_agent, tmp_path):
+    db_path = str(tmp_path / "history.db")
+    block = allowed_list.add_relay("uri", "operator", True, "", sender=lido_agent).block_number
+    index = HistoryIndex(db_path)
+    HistorySyncer(allowed_list, index, confirmations=0).sync()
+    index.close()
+
+    result = CliRunner().invoke(cli, ["relays-at", "--db", db_path, str(block)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {
+        "block": block,
+        "version": 1,
+        "relays": [{"uri": "uri", "operator": "operator", "is_mandatory": True, "description": ""}],
+    }
+
+    result = CliRunner().invoke(cli, ["relays-between", "--db", db_path, "0", str(block)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["relays"][0]["added_block"] == block
+
+
+def test_queries_search_the_intervals_index(tmp_path):
+    index = HistoryIndex(tmp_path / "history.db")
+    for query in [ALLOWED_AT_QUERY, ALLOWED_BETWEEN_QUERY]:
+        plan = index.db.execute(f"EXPLAIN QUERY PLAN {query}", {"block": 1, "from_block": 1, "to_block": 2}).fetchall()
+        steps = [step[-1] for step in plan]
+        # R*Tree index number 2 is a search by the constraints on the coordinates, 1 is a lookup by id
+        assert any(step.startswith("SCAN relay_interval_spans VIRTUAL TABLE INDEX 2:") for step in steps), steps
+        assert "SEARCH relay_intervals USING INTEGER PRIMARY KEY (rowid=?)" in steps, steps
+    index.close()
+
+
+def test_index_of_an_older_database_is_filled(tmp_path):
+    db_path = tmp_path / "history.db"
+    index = HistoryIndex(db_path)
+    index.add_relay(Relay("uri #0", "operator", True, ""), 10)
+    index.add_relay(Relay("uri #1", "operator", False, ""), 20)
+    index.remove_relay("uri #0", 30)
+    index.db.execute("DROP TABLE relay_interval_spans")
+    index.commit()
+    index.close()
+
+    index = HistoryIndex(db_path)
+    assert sorted(index.relays_at(25)) == [
+        Relay("uri #0", "operator", True, ""),
+        Relay("uri #1", "operator", False, ""),
+    ]
+    assert index.relays_at(30) == [Relay("uri #1", "operator", False, "")]
+    index.close()
+
+
+def test_queries_on_synthetic_history(tmp_path):
+    rng = random.Random(7)
+    index = HistoryIndex(tmp_path / "history.db")
+    allowed: dict[str, Relay] = {}
+    snapshots = []
+    block = 0
+    next_id = 0
+    for version in range(1, SYNTHETIC_VERSIONS + 1):
+        block += rng.randint(1, 100)
+        if allowed and (len(allowed) == MAX_RELAYS_NUM or rng.random() < 0.5):
+            uri = rng.choice(list(allowed))
+            del allowed[uri]
+            index.remove_relay(uri, block)
+        else:
+            relay = Relay(f"https://relay-{next_id}.test", f"operator #{next_id % 10}", rng.random() < 0.2, "")
+            next_id += 1
+            allowed[relay.uri] = relay
+            index.add_relay(relay, block)
+        index.set_version(version, block)
+        snapshots.append((block, version, sorted(allowed.values())))
+    index.commit()
+
+    queries = rng.sample(snapshots, 1000)
+    started = time.perf_counter()
+    for block, version, relays in queries:
+        assert sorted(index.relays_at(block)) == relays
+        assert index.version_at(block) == version
+    point_latency = (time.perf_counter() - started) / len(queries)
+
+    started = time.perf_counter()
+    for block, _, _ in queries:
+        index.relays_between(block, block + 10_000)
+    range_latency = (time.perf_counter() - started) / len(queries)
+
+    print(f"\n{SYNTHETIC_VERSIONS} versions, {next_id} relay intervals")
+    print(f"point-in-time query: {point_latency * 1000:.3f} ms, range query: {range_latency * 1000:.3f} ms")
+    if os.environ.get(MEASURE_QUERY_LATENCY_ENV_VAR):
+        assert point_latency < MAX_QUERY_LATENCY
+        assert range_latency < MAX_QUERY_LATENCY
+    index.close()
@@ -0,0 +1,124 @@
+"""
+Tests for the RPC and gas instrumentation of the allowed list contract calls
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+from ape import chain, reverts
+from ape.contracts.base import ContractCallHandler
+from conftest import Relay
+from utils.client import CachedAllowedList
+from utils.metrics import Histogram, InstrumentedContract, Metrics, PROMETHEUS_CONTENT_TYPE, start_metrics_server
+
+ADDRESS = "0xF95f069F9AD107938F6ba802a3da87892298610E"
+RELAY0 = Relay("https://relay-0.test", "Relay Operator #0", True, "")
+RELAY1 = Relay("https://relay-1.test", "Relay Operator #1", False, "")
+
+
+def test_histogram():
+    histogram = Histogram((1, 10))
+    for value in [0.5, 1, 5, 10, 11]:
+        histogram.observe(value)
+    # the bounds are inclusive
+    assert histogram.cumulative_counts() == [2, 4, 5]
+    assert (histogram.sum, histogram.count) == (27.5, 5)
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.record_call("get_relays", 0.02, 320)
+    metrics.record_call("get_relays", 0.2, 320)
+    metrics.record_transaction("add_relay", 1.5, 120_000)
+    metrics.record_error("add_relay", 0.01)
+    metrics.set_allowed_list_gauges(ADDRESS, 3, [RELAY0, RELAY1])
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE allowed_list_calls_total counter" in lines
+    assert 'allowed_list_calls_total{method="get_relays"} 2' in lines
+    assert 'allowed_list_calls_total{method="add_relay"} 2' in lines
+    assert 'allowed_list_call_errors_total{method="add_relay"} 1' in lines
+    assert "# TYPE allowed_list_call_duration_seconds histogram" in lines
+    assert 'allowed_list_call_duration_seconds_bucket{method="get_relays",le="0.025"} 1' in lines
+    assert 'allowed_list_call_duration_seconds_bucket{method="get_relays",le="+Inf"} 2' in lines
+    assert 'allowed_list_call_response_bytes_sum{method="get_relays"} 640' in lines
+    assert 'allowed_list_transaction_gas_used_bucket{method="add_relay",le="100000"} 0' in lines
+    assert 'allowed_list_transaction_gas_used_bucket{method="add_relay",le="250000"} 1' in lines
+    assert 'allowed_list_transaction_gas_used_count{method="add_relay"} 1' in lines
+    assert "# TYPE allowed_list_version gauge" in lines
+    assert f'allowed_list_version{{address="{ADDRESS}"}} 3' in lines
+    assert f'allowed_list_relays{{address="{ADDRESS}"}} 2' in lines
+    assert f'allowed_list_mandatory_relays{{address="{ADDRESS}"}} 1' in lines
+
+
+def test_instrumented_contract(allowed_list, lido_agent, stranger):
+    metrics = Metrics()
+    contract = InstrumentedContract(allowed_list, metrics)
+
+    receipt = contract.add_relays([RELAY0, RELAY1], sender=lido_agent)
+    assert metrics.gas_used["add_relays"].sum == receipt.gas_used
+    with reverts("msg.sender not owner or manager"):
+        contract.remove_relay(RELAY0.uri, sender=stranger)
+    assert metrics.errors == {"remove_relay": 1}
+
+    # the results are decoded the same way as without the instrumentation
+    assert contract.get_relays() == allowed_list.get_relays()
+    assert contract.get_relay_by_uri(RELAY1.uri) == allowed_list.get_relay_by_uri(RELAY1.uri)
+    assert contract.get_relays_if_changed(0) == allowed_list.get_relays_if_changed(0)
+    assert contract.get_allowed_list_version() == 1
+    assert contract.address == allowed_list.address
+
+    calldata = allowed_list.get_relays.encode_input()
+    response = chain.provider.web3.eth.call({"to": allowed_list.address, "data": calldata})
+    assert metrics.response_bytes["get_relays"].sum == len(response)
+    assert metrics.calls == {
+        "add_relays": 1,
+        "remove_relay": 1,
+        "get_relays": 1,
+        "get_relay_by_uri": 1,
+        "get_relays_if_changed": 1,
+        "get_allowed_list_version": 1,
+    }
+    assert all(histogram.count == metrics.calls[method] for method, histogram in metrics.latency.items())
+
+
+def test_overloaded_call_is_decoded_with_the_called_abi(allowed_list, lido_agent):
+    allowed_list.add_relays([RELAY0, RELAY1], sender=lido_agent)
+    # both overloads take a single argument, ape calls the last one matching the number of the arguments
+    handler = ContractCallHandler(
+        allowed_list, [allowed_list.get_relay_by_uri.abis[0], allowed_list.get_relays_if_changed.abis[0]]
+    )
+    metrics = Metrics()
+    contract = InstrumentedContract(allowed_list, metrics)
+    assert contract._call("get_relays_if_changed", handler, (0,), {}) == handler(0)
+    assert metrics.calls == {"get_relays_if_changed": 1}
+
+
+def test_cached_client_metrics(allowed_list, lido_agent):
+    allowed_list.add_relays([RELAY0, RELAY1], sender=lido_agent)
+    metrics = Metrics()
+    client = CachedAllowedList(InstrumentedContract(allowed_list, metrics))
+    client.refresh()
+    client.refresh()
+    assert metrics.calls == {"get_allowed_list_version": 2, "get_relays": 1}
+
+    metrics.set_allowed_list_gauges(allowed_list.address, client.version, client.relays)
+    assert metrics.gauges[("version", allowed_list.address)] == 1
+    assert metrics.gauges[("relays", allowed_list.address)] == 2
+    assert metrics.gauges[("mandatory_relays", allowed_list.address)] == 1
+
+
+def test_metrics_server():
+    metrics = Metrics()
+    metrics.set_allowed_list_gauges(ADDRESS, 1, [RELAY0])
+    server = start_metrics_server(metrics, port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+            assert response.read().decode() == metrics.render()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/")
+    finally:
+        server.shutdown()
@@ -0,0 +1,72 @@
+"""
+Tests for the multi-network reader, with local chains standing in for the networks
+"""
+
+import socket
+
+from conftest import Relay, ZERO_ADDRESS
+from utils.multi_network import diff_relays, load_deployments, read_all, PROJECT_ROOT
+
+RELAY0 = Relay("https://relay-0.test", "Relay Operator #0", True, "")
+RELAY1 = Relay("https://relay-1.test", "Relay Operator #1", False, "")
+RELAY2 = Relay("https://relay-2.test", "Relay Operator #2", False, "")
+
+
+def write_network(root, network: str, address: str, owner: str | None = None, manager: str = ZERO_ADDRESS):
+    (root / f"deployed_{network}.txt").write_text(address + "\n")
+    if owner is not None:
+        (root / f"config_{network}.py").write_text(
+            f'LIDO_DAO_AGENT_ADDRESS = "{owner}"\nLIDO_EASY_TRACK_SCRIPT_EXECUTOR_ADDRESS = "{manager}"\n'
+        )
+
+
+def test_load_project_deployments():
+    deployments = {d.network: d for d in load_deployments(PROJECT_ROOT)}
+    assert {"mainnet", "holesky", "hoodi"} <= set(deployments)
+    mainnet = deployments["mainnet"]
+    assert mainnet.address == (PROJECT_ROOT / "deployed_mainnet.txt").read_text().strip()
+    assert mainnet.config.LIDO_DAO_AGENT_ADDRESS == "0x3e40D73EB977Dc6a537aF587D48316feE66E9C8c"
+
+
+def test_read_all_networks(local_rpc_nodes, tmp_path):
+    alpha, beta = local_rpc_nodes(), local_rpc_nodes()
+    alpha_list, beta_list = alpha.deploy_allowed_list(), beta.deploy_allowed_list()
+
+    alpha_list.functions.add_relays([RELAY0, RELAY1]).transact({"from": alpha.deployer})
+    edited_relay1 = RELAY1._replace(is_mandatory=True)
+    beta_list.functions.add_relays([RELAY0, edited_relay1, RELAY2]).transact({"from": beta.deployer})
+    beta_list.functions.set_manager(beta.web3.eth.accounts[1]).transact({"from": beta.deployer})
+
+    write_network(tmp_path, "alpha", alpha_list.address, owner=alpha.deployer)
+    write_network(tmp_path, "beta", beta_list.address, owner=beta.deployer)
+    write_network(tmp_path, "gamma", ZERO_ADDRESS)
+    deployments = load_deployments(tmp_path, {"alpha": alpha.url, "beta": beta.url})
+
+    snapshots, errors = read_all(deployments)
+    assert errors == {"gamma": "no RPC URL configured"}
+    assert snapshots["alpha"].relays == [RELAY0, RELAY1]
+    assert snapshots["alpha"].version == 1
+    assert snapshots["alpha"].owner == alpha.deployer
+    assert snapshots["alpha"].config_mismatches == []
+    assert snapshots["beta"].relays == [RELAY0, edited_relay1, RELAY2]
+    assert snapshots["beta"].manager == beta.web3.eth.accounts[1]
+    assert len(snapshots["beta"].config_mismatches) == 1, "manager differs from the config"
+
+    assert diff_relays(snapshots) == {
+        RELAY1.uri: {"alpha": RELAY1, "beta": edited_relay1},
+        RELAY2.uri: {"alpha": None, "beta": RELAY2},
+    }
+
+
+def test_unreachable_network_is_reported(local_rpc_nodes, tmp_path):
+    node = local_rpc_nodes()
+    allowed_list = node.deploy_allowed_list()
+    write_network(tmp_path, "alpha", allowed_list.address)
+    write_network(tmp_path, "beta", allowed_list.address)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{s.getsockname()[1]}"
+
+    snapshots, errors = read_all(load_deployments(tmp_path, {"alpha": node.url, "beta": dead_url}))
+    assert set(snapshots) == {"alpha"}
+    assert set(errors) == {"beta"}
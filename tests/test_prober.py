@@ -0,0 +1,102 @@
+"""
+Tests for the relay health prober, against local stand-in relays
+"""
+
+import asyncio
+
+import pytest
+from conftest import free_port, Relay
+from utils.prober import parse_relay_uri, percentile, probe_relays, rank_relays, RelayEndpoint
+
+PUBKEY = "0xb124d80a00b80815397b4e7f1f05377ccc83aeeceb6be87963ba3649f1e6efa32ca870a88845917ec3f26a8e2aa25c77"
+
+
+async def start_relay(delay: float = 0.0, status: int = 200, chunked: bool = False, hang: bool = False):
+    """Stand-in relay serving the status endpoint over keep-alive connections"""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        while await reader.readline():
+            while await reader.readline() not in (b"\r\n", b""):
+                pass
+            if hang:
+                await asyncio.sleep(3600)
+            await asyncio.sleep(delay)
+            if chunked:
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\n{{}}\r\n0\r\n\r\n".encode()
+                )
+            else:
+                writer.write(f"HTTP/1.1 {status} OK\r\nContent-Length: 2\r\n\r\n{{}}".encode())
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    server.connections = connections
+    return server, server.sockets[0].getsockname()[1]
+
+
+def relay(port: int, is_mandatory: bool = False) -> Relay:
+    return Relay(f"http://{PUBKEY}@127.0.0.1:{port}", f"operator {port}", is_mandatory, "")
+
+
+def test_parse_relay_uri():
+    assert parse_relay_uri(f"https://{PUBKEY}@relay.test") == RelayEndpoint("https", PUBKEY, "relay.test", 443)
+    assert parse_relay_uri(f"http://{PUBKEY}@relay.test:8080") == RelayEndpoint("http", PUBKEY, "relay.test", 8080)
+    with pytest.raises(ValueError):
+        parse_relay_uri("relay.test")
+
+
+def test_percentile():
+    assert percentile([], 50) is None
+    assert percentile([3.0], 99) == 3.0
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+
+
+def test_probe_and_rank():
+    async def run():
+        fast, fast_port = await start_relay(delay=0.0)
+        slow, slow_port = await start_relay(delay=0.05, chunked=True)
+        slow_mandatory, slow_mandatory_port = await start_relay(delay=0.1)
+        failing, failing_port = await start_relay(status=500)
+        hanging, hanging_port = await start_relay(hang=True)
+        relays = [
+            relay(slow_mandatory_port, is_mandatory=True),
+            relay(failing_port),
+            relay(slow_port),
+            relay(hanging_port, is_mandatory=True),
+            relay(fast_port),
+            relay(free_port()),
+        ]
+        results = await probe_relays(relays, samples=3, timeout=0.5, concurrency=2)
+
+        # a single keep-alive connection per relay
+        assert len(fast.connections) == 1
+        assert len(slow.connections) == 1
+        for server in [fast, slow, slow_mandatory, failing, hanging]:
+            server.close()
+        return relays, results
+
+    relays, results = asyncio.run(run())
+    by_port = {parse_relay_uri(r.relay.uri).port: r for r in results}
+    assert [r.relay for r in results] == relays
+
+    reachable = [r for r in results if r.is_reachable]
+    assert [r.relay for r in reachable] == [relays[0], relays[2], relays[4]]
+    for result in reachable:
+        assert len(result.latencies) == 3 and result.errors == 0
+        assert result.p50 <= result.p99
+    assert results[2].p50 >= 0.05
+    for result in results:
+        if not result.is_reachable:
+            assert result.errors == 3 and result.last_error
+
+    ranked = [r.relay for r in rank_relays(results)]
+    assert ranked == [relays[4], relays[2], relays[0], relays[3]], "unreachable mandatory relay must be kept last"
+
+    ranked = [r.relay for r in rank_relays(results, max_optional=0)]
+    assert ranked == [relays[0], relays[3]], "mandatory relays must never be dropped"
+    assert by_port[parse_relay_uri(relays[3].uri).port].last_error == "TimeoutError"
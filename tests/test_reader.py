@@ -0,0 +1,216 @@
+"""
+Tests for the stdlib only reader CLI, with a local chain standing in for the network
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from eth_abi import encode as abi_encode
+from eth_utils import function_signature_to_4byte_selector
+from conftest import free_port, Relay
+from utils.reader import (
+    decode_aggregate,
+    encode_aggregate,
+    GET_ALLOWED_LIST_VERSION_SELECTOR,
+    GET_MANAGER_SELECTOR,
+    GET_OWNER_SELECTOR,
+    GET_RELAYS_AMOUNT_SELECTOR,
+    GET_RELAYS_SELECTOR,
+    main,
+    PROJECT_ROOT,
+    read_allowed_list,
+)
+from utils.rpc import http_post, split_url
+
+STARTUP_RUNS = 5
+MAX_STARTUP_TIME = 0.1
+# wall clock timing is flaky on loaded machines, so it is measured only on demand
+MEASURE_STARTUP_TIME_ENV_VAR = "MEASURE_STARTUP_TIME"
+HEAVY_MODULES = ["ape", "click", "config", "eth_abi", "eth_utils", "urllib.request", "web3"]
+
+RELAY0 = Relay("https://relay-0.test", "Relay Operator ж", True, "🙂")
+RELAY1 = Relay("https://relay-1.test", "Relay Operator #1", False, "")
+
+
+def run_reader(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "utils.reader", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60
+    )
+
+
+def test_selectors():
+    assert GET_OWNER_SELECTOR == function_signature_to_4byte_selector("get_owner()")
+    assert GET_MANAGER_SELECTOR == function_signature_to_4byte_selector("get_manager()")
+    assert GET_ALLOWED_LIST_VERSION_SELECTOR == function_signature_to_4byte_selector("get_allowed_list_version()")
+    assert GET_RELAYS_AMOUNT_SELECTOR == function_signature_to_4byte_selector("get_relays_amount()")
+    assert GET_RELAYS_SELECTOR == function_signature_to_4byte_selector("get_relays()")
+
+
+def test_aggregate_encoding():
+    target = "0x" + "ab" * 20
+    calls_data = [GET_OWNER_SELECTOR, b"", bytes(range(40))]
+    assert encode_aggregate(target, calls_data) == function_signature_to_4byte_selector(
+        "aggregate((address,bytes)[])"
+    ) + abi_encode(["(address,bytes)[]"], [[(target, data) for data in calls_data]])
+    assert decode_aggregate(abi_encode(["uint256", "bytes[]"], [7, calls_data])) == (7, calls_data)
+    with pytest.raises(ValueError):
+        decode_aggregate(abi_encode(["uint256", "bytes[]"], [7, calls_data])[:-32])
+
+
+def deploy_with_relays(node):
+    allowed_list = node.deploy_allowed_list()
+    allowed_list.functions.add_relays([RELAY0, RELAY1]).transact({"from": node.deployer})
+    allowed_list.functions.set_manager(node.web3.eth.accounts[1]).transact({"from": node.deployer})
+    return allowed_list
+
+
+def expected_state(node, allowed_list, block: int) -> dict:
+    return {
+        "address": allowed_list.address,
+        "block": block,
+        "owner": node.deployer.lower(),
+        "manager": node.web3.eth.accounts[1].lower(),
+        "version": 1,
+        "relays_amount": 2,
+        "relays": [RELAY0, RELAY1],
+    }
+
+
+def test_read_with_multicall_in_one_round_trip(local_rpc_nodes):
+    node = local_rpc_nodes()
+    allowed_list = deploy_with_relays(node)
+    multicall = node.deploy_multicall3()
+    block = node.web3.eth.block_number
+
+    node.round_trips = 0
+    state = read_allowed_list(node.url, allowed_list.address, multicall=multicall)
+    assert node.round_trips == 1
+    # Multicall3 returns the number of the block the calls run in
+    assert state._asdict() == expected_state(node, allowed_list, block)
+
+    # changes after the pinned block are not seen
+    allowed_list.functions.remove_relay(RELAY0.uri).transact({"from": node.deployer})
+    node.round_trips = 0
+    assert read_allowed_list(node.url, allowed_list.address, block, multicall).relays == [RELAY0, RELAY1]
+    assert node.round_trips == 1
+
+
+def test_read_with_batch_in_one_round_trip(local_rpc_nodes):
+    node = local_rpc_nodes()
+    allowed_list = deploy_with_relays(node)
+    block = node.web3.eth.block_number
+    allowed_list.functions.remove_relay(RELAY0.uri).transact({"from": node.deployer})
+
+    node.round_trips = 0
+    state = read_allowed_list(node.url, allowed_list.address, block, multicall=None)
+    assert node.round_trips == 1
+    assert state._asdict() == expected_state(node, allowed_list, block)
+
+    # the latest block number takes one more round trip
+    node.round_trips = 0
+    assert read_allowed_list(node.url, allowed_list.address, multicall=None).relays == [RELAY1]
+    assert node.round_trips == 2
+
+
+def test_read_falls_back_to_batch_without_multicall(local_rpc_nodes):
+    node = local_rpc_nodes()
+    allowed_list = deploy_with_relays(node)
+    block = node.web3.eth.block_number
+
+    # default Multicall3 address has no code on the local chain
+    state = read_allowed_list(node.url, allowed_list.address)
+    assert state._asdict() == expected_state(node, allowed_list, block)
+    assert node.requests[-7:] == ["eth_call", "eth_blockNumber"] + ["eth_call"] * 5
+
+
+def test_reader_cli(local_rpc_nodes, tmp_path):
+    node = local_rpc_nodes()
+    allowed_list = deploy_with_relays(node)
+    multicall = node.deploy_multicall3()
+    (tmp_path / "deployed_test.txt").write_text(allowed_list.address + "\n")
+    block = node.web3.eth.block_number
+
+    result = run_reader(
+        "--rpc-url",
+        node.url,
+        "--network",
+        "test",
+        "--root",
+        str(tmp_path),
+        "--multicall",
+        multicall,
+        "--block",
+        str(block),
+    )
+    assert result.returncode == 0, result.stderr
+    expected = expected_state(node, allowed_list, block)
+    expected["relays"] = [RELAY0._asdict(), RELAY1._asdict()]
+    assert json.loads(result.stdout) == expected
+
+    result = run_reader("--rpc-url", node.url, "--address", allowed_list.address, "--no-multicall")
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout) == expected
+
+
+def test_reader_cli_errors(tmp_path, capsys):
+    assert main(["--rpc-url", f"http://127.0.0.1:{free_port()}", "--address", "0x" + "00" * 20]) == 1
+    assert main(["--rpc-url", "http://127.0.0.1:1", "--network", "missing", "--root", str(tmp_path)]) == 1
+    assert main(["--rpc-url", "ws://127.0.0.1:1", "--address", "0x" + "00" * 20]) == 1
+    assert capsys.readouterr().err.count("error:") == 3
+    with pytest.raises(SystemExit):
+        main(["--rpc-url", "http://127.0.0.1:1"])
+
+
+def test_split_url():
+    assert split_url("http://127.0.0.1:8545") == ("http", "127.0.0.1", 8545, "/", None)
+    assert split_url("https://node.test/v3/key?x=1") == ("https", "node.test", 443, "/v3/key?x=1", None)
+    assert split_url("http://user:pass@[::1]:80/rpc") == ("http", "::1", 80, "/rpc", "user:pass")
+    with pytest.raises(ValueError):
+        split_url("node.test:8545")
+
+
+def test_http_post_chunked_response():
+    server = socket.create_server(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+
+    def respond():
+        connection, _ = server.accept()
+        with connection:
+            connection.recv(65536)
+            connection.sendall(
+                b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n4\r\n{"a"\r\n3\r\n: 1\r\n1\r\n}\r\n0\r\n\r\n'
+            )
+
+    thread = threading.Thread(target=respond)
+    thread.start()
+    try:
+        assert http_post(f"http://127.0.0.1:{port}", b"{}") == b'{"a": 1}'
+    finally:
+        thread.join()
+        server.close()
+
+
+def test_reader_imports_no_heavy_modules():
+    code = f"import sys, utils.reader; print([m for m in {HEAVY_MODULES} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True)
+    assert result.stdout.strip() == "[]", result.stderr
+
+
+@pytest.mark.skipif(
+    not os.environ.get(MEASURE_STARTUP_TIME_ENV_VAR), reason=f"set {MEASURE_STARTUP_TIME_ENV_VAR}=1 to measure"
+)
+def test_reader_startup_time():
+    startup_times = []
+    for _ in range(STARTUP_RUNS):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import utils.reader"], cwd=PROJECT_ROOT, check=True)
+        startup_times.append(time.perf_counter() - started)
+
+    startup_time = min(startup_times)
+    assert startup_time < MAX_STARTUP_TIME, f"reader startup: {startup_time * 1000:.1f} ms"
@@ -0,0 +1,195 @@
+"""
+Tests for the declarative reconciler of MEV Boost Relays Allowed List
+"""
+
+import json
+import random
+
+import pytest
+from ape import chain, reverts
+from conftest import Relay
+from utils.reconciler import (
+    Call,
+    CALL_GAS,
+    estimate_add_gas,
+    estimate_remove_gas,
+    load_desired_relays,
+    parse_desired_relays,
+    plan_calls,
+    reconcile,
+    simulate_calls,
+)
+
+MAX_RELAYS_NUM = 40  # supposed to correspond to the limit in the contract
+MAX_STRING_LENGTH = 1024  # supposed to correspond to the limit in the contract
+
+
+def relay(i: int, description: str = "") -> Relay:
+    return Relay(f"https://relay-{i}.test", f"Relay Operator #{i}", i % 2 == 0, description)
+
+
+def test_plan_calls():
+    current = [relay(0), relay(1), relay(2)]
+    assert plan_calls(current, current) == []
+    # the order of the relays does not matter
+    assert plan_calls(current, list(reversed(current))) == []
+    assert plan_calls(current, current + [relay(3)]) == [Call("add_relay", tuple(relay(3)))]
+    assert plan_calls(current, [relay(1)]) == [Call("remove_relays", ([relay(2).uri, relay(0).uri],))]
+    # an edit is a remove and an add, the unchanged relays are not touched
+    edited = relay(1, "edited")
+    assert plan_calls(current, [relay(0), edited, relay(2), relay(3)]) == [
+        Call("remove_relay", (relay(1).uri,)),
+        Call("add_relays", ([tuple(edited), tuple(relay(3))],)),
+    ]
+
+
+def max_length_relay(i: int) -> Relay:
+    return Relay(
+        f"https://relay-{i:02d}.test/".ljust(MAX_STRING_LENGTH, "x"),
+        f"operator #{i:02d}".ljust(MAX_STRING_LENGTH, "x"),
+        i % 2 == 0,
+        f"description #{i:02d}".ljust(MAX_STRING_LENGTH, "x"),
+    )
+
+
+def test_plan_calls_splits_batches_by_gas():
+    relays = [max_length_relay(i) for i in range(15)]
+    add_gas = estimate_add_gas(relays[0])
+    # 6 max length relays per call fit into 15M gas
+    max_gas = CALL_GAS + 6 * add_gas
+    assert plan_calls([], relays, max_gas) == [
+        Call("add_relays", ([tuple(relay) for relay in relays[:6]],)),
+        Call("add_relays", ([tuple(relay) for relay in relays[6:12]],)),
+        Call("add_relays", ([tuple(relay) for relay in relays[12:]],)),
+    ]
+    # a batch of one is a single relay call
+    assert plan_calls([], relays[:7], max_gas)[-1] == Call("add_relay", tuple(relays[6]))
+
+    remove_gas = estimate_remove_gas(relays[0].uri)
+    assert plan_calls(relays[:5], [], CALL_GAS + 2 * remove_gas) == [
+        Call("remove_relays", ([relays[4].uri, relays[3].uri],)),
+        Call("remove_relays", ([relays[2].uri, relays[1].uri],)),
+        Call("remove_relay", (relays[0].uri,)),
+    ]
+    with pytest.raises(ValueError, match="single relay call exceeds"):
+        plan_calls([], relays, CALL_GAS + add_gas - 1)
+
+
+def test_load_desired_relays(tmp_path):
+    relays = [relay(0), relay(1, "ж 🙂")]
+    json_file = tmp_path / "relays.json"
+    json_file.write_text(json.dumps([r._asdict() for r in relays]))
+    assert load_desired_relays(json_file) == relays
+
+    yaml_file = tmp_path / "relays.yaml"
+    yaml_file.write_text(
+        "relays:\n"
+        "  - uri: https://relay-0.test\n"
+        "    operator: 'Relay Operator #0'\n"
+        "    is_mandatory: true\n"
+        '    description: ""\n'
+        "  - uri: https://relay-1.test\n"
+        "    operator: 'Relay Operator #1'\n"
+        "    is_mandatory: false\n"
+        "    description: ж 🙂\n"
+    )
+    assert load_desired_relays(yaml_file) == relays
+
+
+@pytest.mark.parametrize(
+    "entries",
+    [
+        {"relay": []},
+        [{"uri": "https://relay-0.test", "operator": "", "is_mandatory": True}],
+        [{**relay(0)._asdict(), "extra": 1}],
+        [{**relay(0)._asdict(), "is_mandatory": "yes"}],
+        [{**relay(0)._asdict(), "uri": ""}],
+        [{**relay(0)._asdict(), "description": "x" * 1025}],
+        [relay(0)._asdict(), relay(0)._asdict()],
+        [relay(i)._asdict() for i in range(MAX_RELAYS_NUM + 1)],
+    ],
+)
+def test_invalid_desired_relays(entries):
+    with pytest.raises(ValueError):
+        parse_desired_relays(entries)
+
+
+def test_reconcile_random_states(allowed_list, lido_agent):
+    rng = random.Random(0)
+    for _ in range(5):
+        current = [relay(i) for i in rng.sample(range(60), rng.randrange(MAX_RELAYS_NUM + 1))]
+        desired = [
+            relay(i, "edited" if rng.random() < 0.2 else "")
+            for i in rng.sample(range(60), rng.randrange(MAX_RELAYS_NUM + 1))
+        ]
+        if current:
+            allowed_list.add_relays(current, sender=lido_agent)
+        version = allowed_list.get_allowed_list_version()
+
+        planned = reconcile(allowed_list, desired, lido_agent.address)
+        assert len(planned) <= 2
+        assert all(p.gas > 0 for p in planned)
+        # the simulation leaves the chain as it was
+        assert allowed_list.get_allowed_list_version() == version
+
+        # sending the planned calldata brings the list to the desired state, touching only the changed relays
+        receipts = [lido_agent.transfer(allowed_list, 0, data=p.calldata) for p in planned]
+        assert sorted(Relay(*r) for r in allowed_list.get_relays()) == sorted(desired)
+        assert [r.gas_used for r in receipts] == [p.gas for p in planned]
+        removed = [log.uri for r in receipts for log in allowed_list.RelayRemoved.from_receipt(r)]
+        assert sorted(removed) == sorted(r.uri for r in current if r not in desired)
+        assert reconcile(allowed_list, desired, lido_agent.address) == []
+        # start the next state from the empty list
+        if desired:
+            allowed_list.remove_relays([r.uri for r in desired], sender=lido_agent)
+
+
+def test_reconcile_max_length_relays(allowed_list, lido_agent):
+    relays = [max_length_relay(i) for i in range(15)]
+    gas_limit = chain.blocks.head.gas_limit
+    # a single call adding all the relays would never fit into a block
+    assert CALL_GAS + sum(estimate_add_gas(relay) for relay in relays) > gas_limit
+
+    planned = reconcile(allowed_list, relays, lido_agent.address)
+    assert [p.call.method for p in planned] == ["add_relays"] * 3
+    for p in planned:
+        batch = [Relay(*relay) for relay in p.call.args[0]]
+        # the estimate is an upper bound of the gas used, the call takes at most half of the block
+        assert p.gas <= CALL_GAS + sum(estimate_add_gas(relay) for relay in batch) <= gas_limit // 2
+
+    allowed_list.add_relays(relays[:5], sender=lido_agent)
+    allowed_list.add_relays(relays[5:10], sender=lido_agent)
+    planned = reconcile(allowed_list, [], lido_agent.address)
+    assert [p.call.method for p in planned] == ["remove_relays"]
+    assert planned[0].gas <= CALL_GAS + 10 * estimate_remove_gas(relays[0].uri)
+
+
+def test_simulation_keeps_outer_snapshots(allowed_list, lido_agent):
+    # taken at the same block as the simulation snapshot
+    snapshot = chain.snapshot()
+    reconcile(allowed_list, [relay(0)], lido_agent.address)
+    allowed_list.add_relay(*relay(1), sender=lido_agent)
+    chain.restore(snapshot)
+    assert allowed_list.get_relays() == []
+
+
+def test_simulation_raises_call_errors(allowed_list, lido_agent, stranger):
+    version = allowed_list.get_allowed_list_version()
+    calls = [Call("add_relay", tuple(relay(0))), Call("remove_relay", (relay(1).uri,))]
+    with reverts("no relay with the URI"):
+        simulate_calls(allowed_list, calls, lido_agent.address)
+    with reverts("msg.sender not owner or manager"):
+        simulate_calls(allowed_list, calls, stranger.address)
+    assert allowed_list.get_relays() == []
+    assert allowed_list.get_allowed_list_version() == version
+
+
+def test_single_relay_call_is_cheaper_than_batch(allowed_list, lido_agent):
+    # the list never gets empty, so the calls change the same storage slots
+    allowed_list.add_relay(*relay(0), sender=lido_agent)
+    single_add_gas = allowed_list.add_relay(*relay(1), sender=lido_agent).gas_used
+    batch_add_gas = allowed_list.add_relays([relay(2)], sender=lido_agent).gas_used
+    batch_remove_gas = allowed_list.remove_relays([relay(2).uri], sender=lido_agent).gas_used
+    single_remove_gas = allowed_list.remove_relay(relay(1).uri, sender=lido_agent).gas_used
+    assert single_add_gas < batch_add_gas
+    assert single_remove_gas < batch_remove_gas
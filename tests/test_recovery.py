@@ -2,7 +2,11 @@
 Tests for MEV Boost Relays Allowed List
 """
 
-from ape import reverts
+import json
+from pathlib import Path
+
+import pytest
+from ape import project, reverts
 from conftest import (
     assert_single_event,
     ZERO_ADDRESS,
@@ -108,3 +112,27 @@ def test_recover_erc20_with_incorrect_non_token_token_address(allowed_list, stra
 
     with reverts():
         allowed_list.recover_erc20(non_token_contract, 10**18, stranger, sender=lido_agent)
+
+
+def abi_signatures(abi: list[dict]) -> set[tuple]:
+    return {
+        (
+            entry["type"],
+            entry.get("name"),
+            tuple(i["type"] for i in entry.get("inputs", [])),
+            tuple(o["type"] for o in entry.get("outputs", [])),
+            entry.get("stateMutability"),
+        )
+        for entry in abi
+        if entry["type"] in ("constructor", "function", "event")
+    }
+
+
+@pytest.mark.parametrize("mock, interface", [("DaiMock", "Dai"), ("UsdtMock", "Usdt")])
+def test_token_mock_follows_interface(mock, interface):
+    """The offline tests use the mocks instead of the real tokens, so the mocks must not diverge from them"""
+    interface_abi = json.loads(
+        (Path(__file__).parent.parent / "contracts/interfaces" / f"{interface}.json").read_text()
+    )
+    mock_abi = [entry.model_dump(mode="json") for entry in project.get_contract(mock).contract_type.abi]
+    assert abi_signatures(mock_abi) <= abi_signatures(interface_abi)
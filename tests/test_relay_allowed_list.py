@@ -2,9 +2,11 @@
 Tests for MEV Boost Relays Allowed List
 """
 
+import pytest
 from ape import reverts, project, accounts
 from ape.managers.converters import HexConverter
 from conftest import (
+    allowed_list_hash,
     assert_single_event,
     suppress_3rd_party_deprecation_warnings,
     Relay,
@@ -102,8 +104,14 @@ def test_manager_can_remove_relay(allowed_list, lido_agent, lido_easy_track_scri
 def test_zero_msg_sender_as_manager(allowed_list):
     assert allowed_list.get_manager() == ZERO_ADDRESS
 
+    try:
+        zero_sender = accounts[ZERO_ADDRESS]
+    except KeyError:
+        # e.g. the offline local chain
+        pytest.skip("the provider does not support impersonating the zero address")
+
     with reverts("msg.sender not owner or manager"):
-        allowed_list.add_relay(*TEST_RELAY0, sender=accounts[ZERO_ADDRESS])
+        allowed_list.add_relay(*TEST_RELAY0, sender=zero_sender)
 
 
 @suppress_3rd_party_deprecation_warnings
@@ -216,6 +224,20 @@ def test_remove_middle_relay(allowed_list, lido_agent):
     assert allowed_list.get_allowed_list_version() == MAX_RELAYS_NUM + 1
 
 
+def test_add_removed_relay_with_other_data(allowed_list, lido_agent):
+    allowed_list.add_relay(*TEST_RELAY1, sender=lido_agent)
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+    allowed_list.remove_relay(TEST_RELAY1.uri, sender=lido_agent)
+
+    # the data of the removed relay stays in the storage, must not leak into the re-added one
+    edited_relay = TEST_RELAY1._replace(operator="Op", is_mandatory=False, description="")
+    allowed_list.add_relay(*edited_relay, sender=lido_agent)
+
+    assert allowed_list.get_relay_by_uri(TEST_RELAY1.uri) == edited_relay
+    assert allowed_list.get_relays() == [TEST_RELAY0, edited_relay]
+    assert allowed_list.get_allowed_list_hash() == allowed_list_hash([TEST_RELAY0, edited_relay])
+
+
 @suppress_3rd_party_deprecation_warnings
 def test_stranger_cannot_add_relay(allowed_list, stranger):
     assert allowed_list.get_owner() != stranger
@@ -230,3 +252,197 @@ def test_stranger_cannot_remove_relay(allowed_list, stranger):
 
     with reverts("msg.sender not owner or manager"):
         allowed_list.remove_relay("arbitrary uri", sender=stranger)
+
+
+def test_add_relays(allowed_list, lido_agent):
+    receipt = allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_agent)
+    logs = list(allowed_list.RelayAdded.from_receipt(receipt))
+    assert [Relay(*log.relay) for log in logs] == [TEST_RELAY0, TEST_RELAY1]
+    assert [log.uri_hash for log in logs] == [TEST_RELAY0_URI_HASH, TEST_RELAY1_URI_HASH]
+    assert_single_event(receipt, allowed_list.AllowedListUpdated, {"allowed_list_version": 1})
+
+    assert allowed_list.get_relays() == [TEST_RELAY0, TEST_RELAY1]
+    assert allowed_list.get_relay_by_uri(TEST_RELAY1.uri) == TEST_RELAY1
+    assert allowed_list.get_allowed_list_version() == 1
+
+
+def test_remove_relays(allowed_list, lido_agent):
+    test_relays = [Relay(f"uri #{i}", "", bool(i % 2), "") for i in range(5)]
+    allowed_list.add_relays(test_relays, sender=lido_agent)
+
+    receipt = allowed_list.remove_relays(["uri #0", "uri #3"], sender=lido_agent)
+    logs = list(allowed_list.RelayRemoved.from_receipt(receipt))
+    assert [log.uri for log in logs] == ["uri #0", "uri #3"]
+    assert_single_event(receipt, allowed_list.AllowedListUpdated, {"allowed_list_version": 2})
+
+    assert sorted(tuple(r) for r in allowed_list.get_relays()) == [test_relays[1], test_relays[2], test_relays[4]]
+    for relay in [test_relays[1], test_relays[2], test_relays[4]]:
+        assert allowed_list.get_relay_by_uri(relay.uri) == relay
+    assert allowed_list.get_allowed_list_version() == 2
+
+
+def test_manager_can_add_and_remove_relays(allowed_list, lido_agent, lido_easy_track_script_executor):
+    with reverts("msg.sender not owner or manager"):
+        allowed_list.add_relays([TEST_RELAY0], sender=lido_easy_track_script_executor)
+    allowed_list.set_manager(lido_easy_track_script_executor, sender=lido_agent)
+
+    allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_easy_track_script_executor)
+    allowed_list.remove_relays([TEST_RELAY0.uri], sender=lido_easy_track_script_executor)
+    assert allowed_list.get_relays() == [TEST_RELAY1]
+
+
+@suppress_3rd_party_deprecation_warnings
+def test_stranger_cannot_add_or_remove_relays(allowed_list, stranger):
+    with reverts("msg.sender not owner or manager"):
+        allowed_list.add_relays([TEST_RELAY0], sender=stranger)
+
+    with reverts("msg.sender not owner or manager"):
+        allowed_list.remove_relays([TEST_RELAY0.uri], sender=stranger)
+
+
+@suppress_3rd_party_deprecation_warnings
+def test_add_or_remove_empty_relays_list(allowed_list, lido_agent):
+    with reverts("empty relays list"):
+        allowed_list.add_relays([], sender=lido_agent)
+
+    with reverts("empty relays list"):
+        allowed_list.remove_relays([], sender=lido_agent)
+
+
+@suppress_3rd_party_deprecation_warnings
+def test_add_relays_is_atomic(allowed_list, lido_agent):
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+
+    with reverts("relay with the URI already exists"):
+        allowed_list.add_relays([TEST_RELAY1, TEST_RELAY0], sender=lido_agent)
+
+    with reverts("relay with the URI already exists"):
+        allowed_list.add_relays([TEST_RELAY1, TEST_RELAY1], sender=lido_agent)
+
+    with reverts("relay URI must not be empty"):
+        allowed_list.add_relays([TEST_RELAY1, Relay("", "", False, "")], sender=lido_agent)
+
+    assert allowed_list.get_relays() == [TEST_RELAY0]
+    assert allowed_list.get_allowed_list_version() == 1
+
+
+def test_allowed_list_updated_is_logged_before_relay_events(allowed_list, lido_agent):
+    # the order of the original contract, the log consumers may rely on it
+    updates = [
+        (lambda: allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent), ["RelayAdded"]),
+        (lambda: allowed_list.add_relays([TEST_RELAY1], sender=lido_agent), ["RelayAdded"]),
+        (lambda: allowed_list.remove_relay(TEST_RELAY0.uri, sender=lido_agent), ["RelayRemoved"]),
+        (lambda: allowed_list.remove_relays([TEST_RELAY1.uri], sender=lido_agent), ["RelayRemoved"]),
+    ]
+    for update, relay_events in updates:
+        assert [log.event_name for log in update().events] == ["AllowedListUpdated"] + relay_events
+
+
+@suppress_3rd_party_deprecation_warnings
+def test_remove_relays_is_atomic(allowed_list, lido_agent):
+    allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_agent)
+
+    with reverts("no relay with the URI"):
+        allowed_list.remove_relays([TEST_RELAY0.uri, "non-presenting uri"], sender=lido_agent)
+
+    with reverts("no relay with the URI"):
+        allowed_list.remove_relays([TEST_RELAY0.uri, TEST_RELAY0.uri], sender=lido_agent)
+
+    assert allowed_list.get_relays() == [TEST_RELAY0, TEST_RELAY1]
+    assert allowed_list.get_allowed_list_version() == 1
+
+
+@suppress_3rd_party_deprecation_warnings
+def test_add_too_many_relays_in_batch(allowed_list, lido_agent):
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+    test_relays = [Relay(f"uri #{i}", "", bool(i % 2), "") for i in range(MAX_RELAYS_NUM)]
+
+    with reverts("already max number of relays"):
+        allowed_list.add_relays(test_relays, sender=lido_agent)
+
+    assert allowed_list.get_relays() == [TEST_RELAY0]
+
+
+def test_get_relays_page(allowed_list, lido_agent):
+    assert allowed_list.get_relays_page(0, MAX_RELAYS_NUM) == []
+
+    test_relays = [Relay(f"uri #{i}", f"operator #{i}", bool(i % 2), "") for i in range(7)]
+    allowed_list.add_relays(test_relays, sender=lido_agent)
+
+    assert allowed_list.get_relays_page(0, 3) == test_relays[0:3]
+    assert allowed_list.get_relays_page(3, 3) == test_relays[3:6]
+    assert allowed_list.get_relays_page(6, 3) == test_relays[6:7]
+    assert allowed_list.get_relays_page(7, 3) == []
+    assert allowed_list.get_relays_page(2, 0) == []
+    assert allowed_list.get_relays_page(0, 2**256 - 1) == test_relays
+    assert allowed_list.get_relays_page(2**256 - 1, 2**256 - 1) == []
+
+
+def test_get_relay_uris(allowed_list, lido_agent):
+    assert allowed_list.get_relay_uris() == []
+
+    allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_agent)
+    assert allowed_list.get_relay_uris() == [TEST_RELAY0.uri, TEST_RELAY1.uri]
+
+    allowed_list.remove_relay(TEST_RELAY0.uri, sender=lido_agent)
+    assert allowed_list.get_relay_uris() == [TEST_RELAY1.uri]
+
+
+def test_get_relays_by_mandatory(allowed_list, lido_agent):
+    assert allowed_list.get_relays_by_mandatory(True) == []
+    assert allowed_list.get_relays_by_mandatory(False) == []
+
+    test_relays = [Relay(f"uri #{i}", "", i % 3 == 0, "") for i in range(7)]
+    allowed_list.add_relays(test_relays, sender=lido_agent)
+
+    assert allowed_list.get_relays_by_mandatory(True) == [r for r in test_relays if r.is_mandatory]
+    assert allowed_list.get_relays_by_mandatory(False) == [r for r in test_relays if not r.is_mandatory]
+
+
+def test_allowed_list_hash(allowed_list, lido_agent):
+    assert allowed_list.get_allowed_list_hash() == bytes(32)
+
+    allowed_list.add_relay(*TEST_RELAY0, sender=lido_agent)
+    assert allowed_list.get_allowed_list_hash() == allowed_list_hash([TEST_RELAY0])
+
+    allowed_list.add_relay(*TEST_RELAY1, sender=lido_agent)
+    assert allowed_list.get_allowed_list_hash() == allowed_list_hash([TEST_RELAY0, TEST_RELAY1])
+
+    # the hash depends on the content only, not on the order or the history of changes
+    allowed_list.remove_relays([TEST_RELAY0.uri, TEST_RELAY1.uri], sender=lido_agent)
+    assert allowed_list.get_allowed_list_hash() == bytes(32)
+    allowed_list.add_relays([TEST_RELAY1, TEST_RELAY0], sender=lido_agent)
+    assert allowed_list.get_allowed_list_hash() == allowed_list_hash([TEST_RELAY0, TEST_RELAY1])
+
+    # relay edit changes the hash
+    edited_relay = TEST_RELAY0._replace(description="edited")
+    allowed_list.remove_relay(TEST_RELAY0.uri, sender=lido_agent)
+    allowed_list.add_relay(*edited_relay, sender=lido_agent)
+    assert allowed_list.get_allowed_list_hash() == allowed_list_hash([edited_relay, TEST_RELAY1])
+    assert allowed_list.get_allowed_list_hash() != allowed_list_hash([TEST_RELAY0, TEST_RELAY1])
+
+
+def test_get_relays_if_changed(allowed_list, lido_agent):
+    version, relays = allowed_list.get_relays_if_changed(0)
+    assert version == 0
+    assert relays == []
+
+    allowed_list.add_relays([TEST_RELAY0, TEST_RELAY1], sender=lido_agent)
+
+    version, relays = allowed_list.get_relays_if_changed(0)
+    assert version == 1
+    assert relays == [TEST_RELAY0, TEST_RELAY1]
+
+    version, relays = allowed_list.get_relays_if_changed(1)
+    assert version == 1
+    assert relays == [], "no relays must be returned for the current version"
+
+    allowed_list.remove_relay(TEST_RELAY0.uri, sender=lido_agent)
+    version, relays = allowed_list.get_relays_if_changed(1)
+    assert version == 2
+    assert relays == [TEST_RELAY1]
+
+    allowed_list.remove_relay(TEST_RELAY1.uri, sender=lido_agent)
+    version, relays = allowed_list.get_relays_if_changed(2)
+    assert version == 3
+    assert relays == [], "no relays must be returned for the emptied list"
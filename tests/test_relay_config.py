@@ -0,0 +1,108 @@
+"""
+Tests for the mev-boost relays config generator
+"""
+
+import subprocess
+
+import pytest
+from conftest import Relay
+from utils.client import CachedAllowedList
+from utils.relay_config import ENV_FORMAT, RelayConfigGenerator, render_relays_config
+
+TEST_RELAYS = [
+    Relay("https://b-optional.test", "", False, ""),
+    Relay("https://c-mandatory.test", "", True, ""),
+    Relay("https://a-optional.test", "", False, ""),
+    Relay("https://d-mandatory.test", "", True, ""),
+]
+
+
+def test_render_relays_config():
+    assert render_relays_config([]) == "\n"
+    assert render_relays_config(TEST_RELAYS) == (
+        "https://c-mandatory.test,https://d-mandatory.test,https://a-optional.test,https://b-optional.test\n"
+    )
+    assert (
+        render_relays_config(TEST_RELAYS[:2], ENV_FORMAT) == "RELAYS=https://c-mandatory.test,https://b-optional.test\n"
+    )
+
+    with pytest.raises(ValueError):
+        render_relays_config(TEST_RELAYS, "yaml")
+
+
+def test_config_is_regenerated_on_version_change(allowed_list, lido_agent, tmp_path):
+    output_file = tmp_path / "relays.txt"
+    hook_marker = tmp_path / "hook_calls"
+    allowed_list.add_relays(TEST_RELAYS[:2], sender=lido_agent)
+
+    client = CachedAllowedList(allowed_list)
+    generator = RelayConfigGenerator(client, output_file, hook=f"echo called >> {hook_marker}")
+    assert generator.update()
+    assert output_file.read_text() == render_relays_config(TEST_RELAYS[:2])
+    assert hook_marker.read_text() == "called\n"
+
+    # steady state costs a single version call per cycle, no relays fetch
+    for _ in range(3):
+        assert not generator.update()
+    assert (client.hits, client.misses) == (3, 1)
+
+    allowed_list.add_relay(*TEST_RELAYS[2], sender=lido_agent)
+    assert generator.update()
+    assert output_file.read_text() == render_relays_config(TEST_RELAYS[:3])
+    assert hook_marker.read_text() == "called\n" * 2
+    assert not list(tmp_path.glob("*.tmp")), "temporary file must be renamed"
+
+
+def test_config_is_not_rewritten_if_relays_are_the_same(allowed_list, lido_agent, tmp_path):
+    output_file = tmp_path / "relays.txt"
+    hook_marker = tmp_path / "hook_calls"
+    allowed_list.add_relays(TEST_RELAYS, sender=lido_agent)
+    generator = RelayConfigGenerator(CachedAllowedList(allowed_list), output_file, hook=f"echo called >> {hook_marker}")
+    assert generator.update()
+
+    # the version moves, but the relays order change only must not touch the config
+    allowed_list.remove_relay(TEST_RELAYS[0].uri, sender=lido_agent)
+    allowed_list.add_relay(*TEST_RELAYS[0], sender=lido_agent)
+    assert not generator.update()
+    assert hook_marker.read_text() == "called\n"
+
+
+def test_missing_config_is_generated(allowed_list, lido_agent, tmp_path):
+    output_file = tmp_path / "relays.txt"
+    allowed_list.add_relay(*TEST_RELAYS[0], sender=lido_agent)
+    generator = RelayConfigGenerator(CachedAllowedList(allowed_list), output_file)
+    assert generator.update()
+
+    output_file.unlink()
+    assert generator.update(), "config must be restored even if the version has not changed"
+    assert output_file.read_text() == render_relays_config(TEST_RELAYS[:1])
+
+
+def test_failed_hook_is_retried(allowed_list, lido_agent, tmp_path):
+    output_file = tmp_path / "relays.txt"
+    hook_marker = tmp_path / "hook_calls"
+    broken_hook = tmp_path / "broken"
+    hook = f"test ! -e {broken_hook} && echo called >> {hook_marker}"
+    allowed_list.add_relay(*TEST_RELAYS[0], sender=lido_agent)
+    generator = RelayConfigGenerator(CachedAllowedList(allowed_list), output_file, hook=hook)
+    assert generator.update()
+
+    broken_hook.touch()
+    allowed_list.add_relay(*TEST_RELAYS[1], sender=lido_agent)
+    with pytest.raises(subprocess.CalledProcessError):
+        generator.update()
+    # the config is written, but not applied until the hook succeeds
+    assert output_file.read_text() == render_relays_config(TEST_RELAYS[:2])
+    with pytest.raises(subprocess.CalledProcessError):
+        generator.update()
+
+    # the restarted generator sees the same config on disk and still runs the hook
+    broken_hook.unlink()
+    generator = RelayConfigGenerator(CachedAllowedList(allowed_list), output_file, hook=hook)
+    assert generator.update()
+    assert hook_marker.read_text() == "called\n" * 2
+
+    # once applied, a restart does not run the hook again
+    generator = RelayConfigGenerator(CachedAllowedList(allowed_list), output_file, hook=hook)
+    assert not generator.update()
+    assert hook_marker.read_text() == "called\n" * 2
@@ -0,0 +1,111 @@
+"""
+Tests for the fast decoder of the relays returned by MEV Boost Relays Allowed List
+"""
+
+import random
+import time
+
+import pytest
+from ape import chain
+from eth_abi import encode as abi_encode
+from conftest import Relay
+from utils.relay_decoder import decode_relays, decode_relays_if_changed
+
+MAX_RELAYS_NUM = 40  # supposed to correspond to the limit in the contract
+MAX_STRING_LENGTH = 1024
+RELAYS_ABI_TYPE = "(string,string,bool,string)[]"
+DECODE_ROUNDS = 50
+
+
+def random_string(rng: random.Random, max_length: int) -> str:
+    # multibyte characters make the byte length differ from the string length
+    return "".join(rng.choice("az09:/@.-éж€🙂") for _ in range(rng.randrange(max_length + 1)))
+
+
+def random_relays(rng: random.Random, count: int) -> list[Relay]:
+    return [
+        Relay(random_string(rng, 64), random_string(rng, 64), rng.random() < 0.5, random_string(rng, 64))
+        for _ in range(count)
+    ]
+
+
+def encode_relays(relays: list[Relay]) -> bytes:
+    return abi_encode([RELAYS_ABI_TYPE], [[tuple(relay) for relay in relays]])
+
+
+def eth_call_params(allowed_list, data) -> dict:
+    return {"to": allowed_list.address, "data": data}
+
+
+@pytest.mark.parametrize("count", [0, 1, 7, MAX_RELAYS_NUM])
+def test_decode_relays_matches_abi_encoding(count):
+    relays = random_relays(random.Random(count), count)
+    assert decode_relays(encode_relays(relays)) == relays
+    assert decode_relays_if_changed(abi_encode(["uint256", RELAYS_ABI_TYPE], [count, relays])) == (count, relays)
+
+
+def test_decode_contract_return_data(allowed_list, lido_agent):
+    relays = [Relay(f"uri #{i}", f"operator ж #{i}", i % 2 == 0, "🙂" * i) for i in range(3)]
+    allowed_list.add_relays(relays, sender=lido_agent)
+
+    get_relays = allowed_list.get_relays
+    get_relays_if_changed = allowed_list.get_relays_if_changed
+    assert (
+        decode_relays(chain.provider.web3.eth.call(eth_call_params(allowed_list, get_relays.encode_input()))) == relays
+    )
+    assert decode_relays_if_changed(
+        chain.provider.web3.eth.call(eth_call_params(allowed_list, get_relays_if_changed.encode_input(0)))
+    ) == (1, relays)
+    # unchanged version returns no relays
+    assert decode_relays_if_changed(
+        chain.provider.web3.eth.call(eth_call_params(allowed_list, get_relays_if_changed.encode_input(1)))
+    ) == (1, [])
+
+
+def test_decode_relays_rejects_malformed_data():
+    data = encode_relays([Relay("uri", "operator", True, "description")])
+
+    with pytest.raises(ValueError):
+        decode_relays(b"")
+    with pytest.raises(ValueError):
+        # truncated string
+        decode_relays(data[:-40])
+    with pytest.raises(ValueError):
+        # array length over the data
+        decode_relays(data[:32] + (2).to_bytes(32, "big") + data[64:])
+    with pytest.raises(ValueError):
+        # is_mandatory is not a bool, it is the third word of the relay tuple
+        invalid_bool = 64 + 32 + 2 * 32
+        decode_relays(data[:invalid_bool] + (2).to_bytes(32, "big") + data[invalid_bool + 32 :])
+    with pytest.raises(ValueError):
+        # string offset over the data
+        decode_relays(data[:96] + (2**64).to_bytes(32, "big") + data[128:])
+
+
+def test_decode_relays_benchmark(allowed_list, lido_agent):
+    relays = [
+        Relay(f"{i:04}".ljust(MAX_STRING_LENGTH, "u"), "o" * MAX_STRING_LENGTH, i % 2 == 0, "d" * MAX_STRING_LENGTH)
+        for i in range(MAX_RELAYS_NUM)
+    ]
+    for i in range(0, MAX_RELAYS_NUM, 10):
+        allowed_list.add_relays(relays[i : i + 10], sender=lido_agent)
+    get_relays = allowed_list.get_relays
+    data = chain.provider.web3.eth.call(eth_call_params(allowed_list, get_relays.encode_input()))
+    ecosystem = chain.provider.network.ecosystem
+
+    (ape_relays,) = ecosystem.decode_returndata(get_relays.abis[0], data)
+    assert decode_relays(data) == [Relay(*relay) for relay in ape_relays] == relays
+
+    started = time.perf_counter()
+    for _ in range(DECODE_ROUNDS):
+        decode_relays(data)
+    fast_latency = (time.perf_counter() - started) / DECODE_ROUNDS
+
+    started = time.perf_counter()
+    for _ in range(DECODE_ROUNDS):
+        ecosystem.decode_returndata(get_relays.abis[0], data)
+    ape_latency = (time.perf_counter() - started) / DECODE_ROUNDS
+
+    print(f"\n{MAX_RELAYS_NUM} relays, {len(data)} bytes of get_relays() return data")
+    print(f"fast decoder: {fast_latency * 1000:.3f} ms, ape decoder: {ape_latency * 1000:.3f} ms")
+    assert fast_latency < ape_latency
@@ -0,0 +1,189 @@
+"""
+Tests for the snapshot publisher and its HTTP server
+"""
+
+import asyncio
+import gzip
+import json
+
+import pytest
+from conftest import Relay
+from scripts.snapshot_server import serve
+from utils import cbor
+from utils.client import CachedAllowedList
+from utils.metrics import Metrics
+from utils.snapshots import (
+    allowed_list_snapshot,
+    build_snapshot,
+    CBOR_FORMAT,
+    JSON_FORMAT,
+    load_latest_snapshot,
+    publish_snapshot,
+    SnapshotServer,
+)
+
+ADDRESS = "0xF95f069F9AD107938F6ba802a3da87892298610E"
+RELAY0 = Relay("https://relay-0.test", "Relay Operator ж", True, "🙂")
+RELAY1 = Relay("https://relay-1.test", "Relay Operator #1", False, "")
+
+
+def test_cbor():
+    # examples from RFC 8949 Appendix A
+    assert cbor.encode(0) == bytes.fromhex("00")
+    assert cbor.encode(24) == bytes.fromhex("1818")
+    assert cbor.encode(1000000) == bytes.fromhex("1a000f4240")
+    assert cbor.encode(18446744073709551615) == bytes.fromhex("1bffffffffffffffff")
+    assert cbor.encode(-1000) == bytes.fromhex("3903e7")
+    assert cbor.encode("ü") == bytes.fromhex("62c3bc")
+    assert cbor.encode([1, [2, 3], [4, 5]]) == bytes.fromhex("8301820203820405")
+    assert cbor.encode({"a": 1, "b": [2, 3]}) == bytes.fromhex("a26161016162820203")
+    # the map keys are sorted by the encoded bytes, not by the insertion order
+    assert cbor.encode({"b": [2, 3], "a": 1}) == bytes.fromhex("a26161016162820203")
+
+    value = {"relays": [RELAY0._asdict(), None, False, b"\x00\x01", -(2**63), 2**64 - 1], "version": 1}
+    assert cbor.decode(cbor.encode(value)) == value
+    with pytest.raises(ValueError):
+        cbor.decode(cbor.encode(value)[:-1])
+    with pytest.raises(ValueError):
+        cbor.decode(cbor.encode(value) + b"\x00")
+    with pytest.raises(TypeError):
+        cbor.encode(1.5)
+
+
+def test_snapshot_is_content_addressed():
+    snapshot = build_snapshot(ADDRESS, 3, [RELAY0, RELAY1])
+    # the order of the relays in the contract does not matter
+    assert build_snapshot(ADDRESS, 3, [RELAY1, RELAY0]) == snapshot
+    assert build_snapshot(ADDRESS, 4, [RELAY0, RELAY1]).hash != snapshot.hash
+
+    content = {"address": ADDRESS, "version": 3, "relays": [RELAY0._asdict(), RELAY1._asdict()]}
+    assert json.loads(gzip.decompress(snapshot.files[JSON_FORMAT])) == content
+    assert cbor.decode(gzip.decompress(snapshot.files[CBOR_FORMAT])) == content
+    assert len(gzip.decompress(snapshot.files[CBOR_FORMAT])) < len(gzip.decompress(snapshot.files[JSON_FORMAT]))
+
+
+async def http_get(port: int, path: str, headers: dict | None = None) -> tuple[int, dict, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"GET {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    response = await reader.read()
+    writer.close()
+
+    head, _, body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode().split("\r\n")
+    response_headers = {name.lower(): value.strip() for name, _, value in (h.partition(":") for h in header_lines)}
+    return int(status_line.split()[1]), response_headers, body
+
+
+def test_server(tmp_path):
+    first = build_snapshot(ADDRESS, 1, [RELAY0])
+    second = build_snapshot(ADDRESS, 2, [RELAY0, RELAY1])
+
+    async def run():
+        server = SnapshotServer(tmp_path)
+        http_server = await server.start()
+        port = http_server.sockets[0].getsockname()[1]
+
+        assert (await http_get(port, "/latest.json"))[0] == 503
+        assert server.publish(first)
+        assert not server.publish(first)
+
+        status, headers, body = await http_get(port, "/latest.json", {"Accept-Encoding": "gzip"})
+        assert status == 200
+        assert headers["content-encoding"] == "gzip"
+        assert body == first.files[JSON_FORMAT]
+        etag = headers["etag"]
+
+        # unchanged snapshot costs no body
+        status, headers, body = await http_get(port, "/latest.json", {"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert (status, body) == (304, b"")
+        # the identity encoding is a different representation
+        status, headers, body = await http_get(port, "/latest.json", {"If-None-Match": etag})
+        assert status == 200 and "content-encoding" not in headers
+        assert body == gzip.decompress(first.files[JSON_FORMAT])
+
+        status, headers, body = await http_get(port, "/latest.cbor")
+        assert status == 200 and headers["content-type"] == "application/cbor"
+        assert cbor.decode(body)["version"] == 1
+
+        # long-poll ends with a 304 on timeout
+        conditional = {"Accept-Encoding": "gzip", "If-None-Match": etag}
+        assert (await http_get(port, "/latest.json?wait=0.1", conditional))[0] == 304
+
+        # and with the new snapshot as soon as it is published
+        long_poll = asyncio.create_task(http_get(port, "/latest.json?wait=30", conditional))
+        await asyncio.sleep(0.2)
+        assert not long_poll.done()
+        server.publish(second)
+        status, headers, body = await asyncio.wait_for(long_poll, 5)
+        assert status == 200 and headers["etag"] != etag
+        assert body == second.files[JSON_FORMAT]
+
+        # previous snapshots stay available by hash and never change
+        status, headers, body = await http_get(port, f"/{first.hash}.json", {"Accept-Encoding": "gzip"})
+        assert status == 200 and "immutable" in headers["cache-control"]
+        assert body == first.files[JSON_FORMAT]
+        assert (await http_get(port, f"/{first.hash}.json", {"If-None-Match": f'"{first.hash}.json"'}))[0] == 304
+        assert (await http_get(port, f"/{'0' * 64}.json"))[0] == 404
+        assert (await http_get(port, "/../latest.json"))[0] == 404
+        assert (await http_get(port, "/latest.json?wait=x"))[0] == 400
+
+        http_server.close()
+        await http_server.wait_closed()
+
+    asyncio.run(run())
+    # a restarted server continues with the latest snapshot
+    assert load_latest_snapshot(tmp_path) == second
+
+
+def test_idle_connection_is_closed(tmp_path):
+    async def run():
+        server = SnapshotServer(tmp_path, read_timeout=0.1)
+        http_server = await server.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", http_server.sockets[0].getsockname()[1])
+        # an unfinished request head
+        writer.write(b"GET /latest.json HTTP/1.1\r\n")
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        writer.close()
+        http_server.close()
+        await http_server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_serve_retries_failed_refresh(allowed_list, lido_agent, tmp_path):
+    allowed_list.add_relays([RELAY0, RELAY1], sender=lido_agent)
+    client = CachedAllowedList(allowed_list)
+    refresh = client.refresh
+    calls = []
+
+    def failing_once_refresh():
+        calls.append(None)
+        if len(calls) == 1:
+            raise ConnectionError("RPC is down")
+        return refresh()
+
+    client.refresh = failing_once_refresh
+
+    async def run():
+        server = asyncio.create_task(serve(client, Metrics(), tmp_path, "127.0.0.1", 0, 0.05))
+        for _ in range(100):
+            if load_latest_snapshot(tmp_path) is not None:
+                break
+            await asyncio.sleep(0.05)
+        assert not server.done(), "server must keep running after the failed refresh"
+        server.cancel()
+
+    asyncio.run(run())
+    assert len(calls) >= 2
+    assert load_latest_snapshot(tmp_path) == build_snapshot(allowed_list.address, 1, [RELAY0, RELAY1])
+
+
+def test_publish_contract_snapshot(allowed_list, lido_agent, tmp_path):
+    allowed_list.add_relays([RELAY0, RELAY1], sender=lido_agent)
+    client = CachedAllowedList(allowed_list)
+    client.refresh()
+
+    publish_snapshot(tmp_path, allowed_list_snapshot(client))
+    assert load_latest_snapshot(tmp_path) == build_snapshot(allowed_list.address, 1, [RELAY0, RELAY1])
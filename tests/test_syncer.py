@@ -0,0 +1,110 @@
+"""
+Tests for the event-sourced sync of MEV Boost Relays Allowed List
+"""
+
+import random
+
+import pytest
+from ape import chain
+from conftest import Relay
+from utils.syncer import AllowedListSyncer
+
+MAX_RELAYS_NUM = 40  # supposed to correspond to the limit in the contract
+
+
+def random_updates(allowed_list, lido_agent, rng: random.Random, steps: int, next_id: list[int]):
+    """Random mix of single and batched adds and removes"""
+    for _ in range(steps):
+        uris = [relay.uri for relay in allowed_list.get_relays()]
+        if uris and (len(uris) == MAX_RELAYS_NUM or rng.random() < 0.4):
+            to_remove = rng.sample(uris, rng.randint(1, min(3, len(uris))))
+            if len(to_remove) == 1:
+                allowed_list.remove_relay(to_remove[0], sender=lido_agent)
+            else:
+                allowed_list.remove_relays(to_remove, sender=lido_agent)
+        else:
+            to_add = []
+            for _ in range(rng.randint(1, min(3, MAX_RELAYS_NUM - len(uris)))):
+                to_add.append(Relay(f"uri #{next_id[0]}", f"operator #{rng.randint(0, 5)}", rng.random() < 0.3, ""))
+                next_id[0] += 1
+            if len(to_add) == 1:
+                allowed_list.add_relay(*to_add[0], sender=lido_agent)
+            else:
+                allowed_list.add_relays(to_add, sender=lido_agent)
+
+
+def assert_synced(syncer, allowed_list):
+    assert syncer.relays == [Relay(*relay) for relay in allowed_list.get_relays()]
+    assert syncer.version == allowed_list.get_allowed_list_version()
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_replay_matches_contract(allowed_list, lido_agent, seed):
+    rng = random.Random(seed)
+    next_id = [0]
+    syncer = AllowedListSyncer(allowed_list, chunk_size=4)
+
+    random_updates(allowed_list, lido_agent, rng, 15, next_id)
+    syncer.sync()
+    assert_synced(syncer, allowed_list)
+
+    # incremental sync applies only the new logs
+    random_updates(allowed_list, lido_agent, rng, 15, next_id)
+    syncer.sync()
+    assert_synced(syncer, allowed_list)
+
+    assert syncer.sync() == 0
+
+
+def test_checkpoint(allowed_list, lido_agent, tmp_path):
+    checkpoint_file = tmp_path / "checkpoint.json"
+    confirmations = 3
+    rng = random.Random(4)
+    next_id = [0]
+
+    random_updates(allowed_list, lido_agent, rng, 10, next_id)
+    syncer = AllowedListSyncer(allowed_list, checkpoint_file, confirmations=confirmations)
+    syncer.sync()
+    assert syncer.block == chain.blocks.head.number
+    assert_synced(syncer, allowed_list)
+    confirmed_block = chain.blocks.head.number - confirmations
+
+    random_updates(allowed_list, lido_agent, rng, 10, next_id)
+    syncer = AllowedListSyncer(allowed_list, checkpoint_file, confirmations=confirmations)
+    assert syncer.block == confirmed_block, "checkpoint must be kept the confirmations behind the head"
+    assert syncer.relays == [Relay(*relay) for relay in allowed_list.get_relays(block_id=confirmed_block)]
+    # 10 updates, each emits at least one relay log and a single version log
+    assert syncer.sync() >= 20
+    assert_synced(syncer, allowed_list)
+
+
+def test_checkpoint_of_another_chain_is_ignored(allowed_list, lido_agent, tmp_path):
+    checkpoint_file = tmp_path / "checkpoint.json"
+    random_updates(allowed_list, lido_agent, random.Random(6), 5, [0])
+    AllowedListSyncer(allowed_list, checkpoint_file, confirmations=0).sync()
+
+    syncer = AllowedListSyncer(allowed_list, checkpoint_file, chain_id=chain.chain_id + 1)
+    assert syncer.block == -1
+    assert syncer.relays == []
+
+
+def test_chunk_size_adapts_to_node_limits(allowed_list, lido_agent, monkeypatch):
+    max_block_range = 3
+    rng = random.Random(5)
+    random_updates(allowed_list, lido_agent, rng, 20, [0])
+
+    syncer = AllowedListSyncer(allowed_list, chunk_size=64)
+    get_logs = syncer._get_logs
+    requested_ranges = []
+
+    def limited_get_logs(from_block, to_block):
+        requested_ranges.append(to_block - from_block + 1)
+        if to_block - from_block + 1 > max_block_range:
+            raise ValueError("block range is too wide")
+        return get_logs(from_block, to_block)
+
+    monkeypatch.setattr(syncer, "_get_logs", limited_get_logs)
+    syncer.sync()
+    assert_synced(syncer, allowed_list)
+    assert requested_ranges[0] > max_block_range
+    assert min(requested_ranges) >= 2, "chunk must be halved only as much as needed"
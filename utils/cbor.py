@@ -0,0 +1,105 @@
+"""
+Minimal deterministic CBOR (RFC 8949) codec, stdlib only
+
+Covers the types of the allowed list snapshots: maps, arrays, text and byte
+strings, integers, booleans and null. Encoding follows the core deterministic
+rules: the shortest argument form, definite lengths and the map keys sorted
+by their encoded bytes, so equal values always encode to equal bytes.
+"""
+
+UNSIGNED_INT = 0
+NEGATIVE_INT = 1
+BYTE_STRING = 2
+TEXT_STRING = 3
+ARRAY = 4
+MAP = 5
+SIMPLE = 7
+
+FALSE = 20
+TRUE = 21
+NULL = 22
+
+
+def _head(major_type: int, argument: int) -> bytes:
+    if argument < 24:
+        return bytes([major_type << 5 | argument])
+    for additional_info, size in ((24, 1), (25, 2), (26, 4), (27, 8)):
+        if argument < 1 << (8 * size):
+            return bytes([major_type << 5 | additional_info]) + argument.to_bytes(size, "big")
+    raise ValueError(f"integer {argument} does not fit in 64 bits")
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return bytes([SIMPLE << 5 | NULL])
+    if isinstance(value, bool):
+        return bytes([SIMPLE << 5 | (TRUE if value else FALSE)])
+    if isinstance(value, int):
+        return _head(UNSIGNED_INT, value) if value >= 0 else _head(NEGATIVE_INT, -1 - value)
+    if isinstance(value, bytes):
+        return _head(BYTE_STRING, len(value)) + value
+    if isinstance(value, str):
+        data = value.encode()
+        return _head(TEXT_STRING, len(data)) + data
+    if isinstance(value, (list, tuple)):
+        return _head(ARRAY, len(value)) + b"".join(encode(item) for item in value)
+    if isinstance(value, dict):
+        items = sorted((encode(key), encode(item)) for key, item in value.items())
+        return _head(MAP, len(items)) + b"".join(key + item for key, item in items)
+    raise TypeError(f"cannot encode {type(value).__name__} to CBOR")
+
+
+def decode(data: bytes):
+    value, position = _decode_at(memoryview(data), 0)
+    if position != len(data):
+        raise ValueError(f"{len(data) - position} bytes left after the CBOR value")
+    return value
+
+
+def _read(view: memoryview, position: int, size: int) -> memoryview:
+    if position + size > len(view):
+        raise ValueError(f"CBOR value at {position} is out of {len(view)} bytes")
+    return view[position : position + size]
+
+
+def _decode_at(view: memoryview, position: int) -> tuple[object, int]:
+    initial_byte = _read(view, position, 1)[0]
+    major_type, additional_info = initial_byte >> 5, initial_byte & 0x1F
+    position += 1
+
+    if major_type == SIMPLE:
+        simple = {FALSE: False, TRUE: True, NULL: None}
+        if additional_info not in simple:
+            raise ValueError(f"unsupported CBOR simple value {additional_info} at {position - 1}")
+        return simple[additional_info], position
+
+    if additional_info < 24:
+        argument = additional_info
+    elif additional_info <= 27:
+        size = 1 << (additional_info - 24)
+        argument = int.from_bytes(_read(view, position, size), "big")
+        position += size
+    else:
+        raise ValueError(f"unsupported CBOR additional info {additional_info} at {position - 1}")
+
+    if major_type == UNSIGNED_INT:
+        return argument, position
+    if major_type == NEGATIVE_INT:
+        return -1 - argument, position
+    if major_type == BYTE_STRING:
+        return bytes(_read(view, position, argument)), position + argument
+    if major_type == TEXT_STRING:
+        return str(_read(view, position, argument), "utf-8"), position + argument
+    if major_type == ARRAY:
+        items = []
+        for _ in range(argument):
+            item, position = _decode_at(view, position)
+            items.append(item)
+        return items, position
+    if major_type == MAP:
+        items = {}
+        for _ in range(argument):
+            key, position = _decode_at(view, position)
+            items[key], position = _decode_at(view, position)
+        return items, position
+    raise ValueError(f"unsupported CBOR major type {major_type} at {position - 1}")
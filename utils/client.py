@@ -0,0 +1,83 @@
+"""
+Version-aware caching reader of the MEV Boost Relay Allowed List
+
+The allowed list changes rarely, so instead of fetching and decoding the whole
+`get_relays()` response on every read, the client asks for the cheap
+`get_allowed_list_version()` and refetches the relays only when the version moves.
+"""
+
+import json
+from pathlib import Path
+
+from ape import chain
+
+from utils.files import atomic_write_text
+from utils.relay import Relay
+
+
+class CachedAllowedList:
+    def __init__(self, contract, cache_file: str | Path | None = None, chain_id: int | None = None):
+        """
+        @param contract The allowed list contract, e.g. `project.MEVBoostRelayAllowedList.at(address)`
+        @param cache_file Optional path of the JSON file to persist the cache between runs
+        @param chain_id Chain of the contract, the connected one by default. The cache file is keyed by
+               the chain and the address, as a CREATE2 deployment has the same address on every chain
+        """
+        self.contract = contract
+        self.chain_id = chain_id if chain_id is not None else chain.chain_id
+        self.cache_file = Path(cache_file) if cache_file is not None else None
+        self.version: int | None = None
+        self.relays: list[Relay] = []
+        self._relays_by_uri: dict[str, Relay] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load_cache_file()
+
+    def refresh(self) -> bool:
+        """Refetch the relays if the allowed list version moved. Return True if refetched"""
+        # read the version before the relays, so a concurrent update leaves the cache stale
+        # by the version and gets refetched on the next call instead of being missed
+        version = self.contract.get_allowed_list_version()
+        if version == self.version:
+            self.hits += 1
+            return False
+
+        self.misses += 1
+        self._set(version, [Relay(*relay) for relay in self.contract.get_relays()])
+        self._save_cache_file()
+        return True
+
+    def get_relays(self) -> list[Relay]:
+        """Return the allowed relays, refetching them only if the allowed list version moved"""
+        self.refresh()
+        return list(self.relays)
+
+    def by_uri(self, uri: str) -> Relay | None:
+        """Return the cached relay with the URI or None. Does not refresh the cache"""
+        return self._relays_by_uri.get(uri)
+
+    def _set(self, version: int, relays: list[Relay]):
+        self.version = version
+        self.relays = relays
+        self._relays_by_uri = {relay.uri: relay for relay in relays}
+
+    def _load_cache_file(self):
+        if self.cache_file is None or not self.cache_file.exists():
+            return
+
+        cache = json.loads(self.cache_file.read_text())
+        if cache.get("chain_id") != self.chain_id or cache["address"] != self.contract.address:
+            return
+        self._set(cache["version"], [Relay(*relay) for relay in cache["relays"]])
+
+    def _save_cache_file(self):
+        if self.cache_file is None:
+            return
+
+        cache = {
+            "chain_id": self.chain_id,
+            "address": self.contract.address,
+            "version": self.version,
+            "relays": self.relays,
+        }
+        atomic_write_text(self.cache_file, json.dumps(cache))
@@ -0,0 +1,60 @@
+"""
+Allowed list clones
+
+Deploys the allowed lists as EIP-1167 minimal proxy clones through
+MEVBoostRelayAllowedListFactory and enumerates them by the factory events.
+A clone costs a small fraction of a full deployment, every call to it pays
+for one extra delegatecall instead.
+"""
+
+from typing import NamedTuple
+
+from ape import chain, project
+
+# EIP-1167 runtime code with the implementation address in the middle
+MINIMAL_PROXY_PREFIX = bytes.fromhex("363d3d373d3d3d363d73")
+MINIMAL_PROXY_SUFFIX = bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+
+
+class Clone(NamedTuple):
+    address: str
+    owner: str
+    block_number: int
+
+
+def minimal_proxy_code(implementation: str) -> bytes:
+    """Runtime code of the EIP-1167 clone of the implementation"""
+    return MINIMAL_PROXY_PREFIX + bytes.fromhex(implementation.removeprefix("0x")) + MINIMAL_PROXY_SUFFIX
+
+
+def deploy_factory(sender):
+    """Deploy the implementation and the factory of the allowed list clones"""
+    implementation = project.MEVBoostRelayAllowedListInitializable.deploy(sender=sender)
+    return project.MEVBoostRelayAllowedListFactory.deploy(implementation, sender=sender)
+
+
+def create_allowed_list(factory, owner: str, sender):
+    """
+    @notice Deploy a new allowed list clone owned by `owner`
+    @return The allowed list contract instance
+    """
+    receipt = factory.create_allowed_list(owner, sender=sender)
+    (log,) = factory.AllowedListCreated.from_receipt(receipt)
+    return project.MEVBoostRelayAllowedListInitializable.at(log.allowed_list)
+
+
+def get_clones(factory, start_block: int = 0, owner: str | None = None) -> list[Clone]:
+    """
+    @notice Enumerate the allowed lists created by the factory, in the creation order
+    @param start_block Block to search the events from, e.g. the factory deployment block
+    @param owner Return only the clones created for the owner if set
+    @dev The owner is the initial one, the clone owner might be changed later
+    """
+    search_topics = {"owner": owner} if owner else None
+    logs = factory.AllowedListCreated.range(start_block, chain.blocks.head.number + 1, search_topics=search_topics)
+    return [Clone(log.allowed_list, log.owner, log.block_number) for log in logs]
+
+
+def is_clone(address: str, implementation: str) -> bool:
+    """Tell if the code at the address is the minimal proxy of the implementation"""
+    return bytes(chain.provider.get_code(address)) == minimal_proxy_code(implementation)
@@ -0,0 +1,249 @@
+"""
+Streaming compliance checker of the delivered payloads against the allowed list history
+
+Reads payload delivery rows exported from the relay data APIs, JSONL or CSV,
+in fixed size chunks and checks every row's relay against the relays allowed
+at the parent of the row's block, when the proposer chose the relays. The
+allowed history from `utils/history.py` is flattened into sorted
+non-overlapping segments per relay, so a chunk is joined with a single
+`numpy.searchsorted`. Only the per-operator counters are kept between chunks,
+the memory stays flat whatever the dump size.
+
+Relays are matched by the host of the URI, as the relay APIs do not know the
+allowed list URIs with the relay public keys.
+"""
+
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+from itertools import islice
+from operator import itemgetter
+from typing import Iterator
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from utils.history import RelayInterval
+
+BLOCK_NUMBER_FIELD = "block_number"
+RELAY_FIELD = "relay"
+PROPOSER_PUBKEY_FIELD = "proposer_pubkey"
+OPERATOR_FIELD = "operator"
+DEFAULT_CHUNK_SIZE = 100_000
+
+# key of a segment lookup is the relay id in the high bits and the block number in the low ones
+BLOCK_BITS = 40
+NO_RELAY = -1
+
+
+def relay_key(uri: str) -> str:
+    """Lowercase host of the relay URI, or of the bare host name as the relay APIs report it"""
+    uri = uri.strip().lower()
+    return (urlsplit(uri if "://" in uri else "//" + uri).hostname or "").rstrip(".")
+
+
+class AllowedSegments:
+    """
+    Non-overlapping block segments of the allowed relays, sorted by the relay and the start block.
+    A segment tells if any relay with the host was allowed, and if any of those was mandatory
+    """
+
+    def __init__(self, intervals: list[RelayInterval]):
+        events: dict[str, list[tuple[int, int, int]]] = {}
+        for interval in intervals:
+            end = interval.removed_block if interval.removed_block is not None else 1 << BLOCK_BITS
+            if interval.added_block < end:
+                mandatory = int(interval.relay.is_mandatory)
+                key_events = events.setdefault(relay_key(interval.relay.uri), [])
+                key_events += [(interval.added_block, 1, mandatory), (end, -1, -mandatory)]
+
+        self.relay_ids = {key: relay_id for relay_id, key in enumerate(sorted(events))}
+        starts, ends, mandatory = [], [], []
+        for key, relay_id in self.relay_ids.items():
+            # sweep the interval bounds, several URIs of the same host may be allowed at once
+            allowed_count = mandatory_count = 0
+            key_events = sorted(events[key])
+            for i, (block, allowed_change, mandatory_change) in enumerate(key_events):
+                allowed_count += allowed_change
+                mandatory_count += mandatory_change
+                next_block = key_events[i + 1][0] if i + 1 < len(key_events) else block
+                if allowed_count > 0 and next_block > block:
+                    starts.append((relay_id << BLOCK_BITS) + block)
+                    ends.append((relay_id << BLOCK_BITS) + next_block)
+                    mandatory.append(mandatory_count > 0)
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.mandatory = np.array(mandatory, dtype=bool)
+
+    def relay_ids_of(self, relays: list[str]) -> np.ndarray:
+        """Ids of the relays, NO_RELAY for the relays never allowed. Pass the distinct relays, see `factorize`"""
+        return np.array([self.relay_ids.get(relay_key(relay), NO_RELAY) for relay in relays], dtype=np.int64)
+
+    def lookup(self, relay_ids: np.ndarray, blocks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        @notice Check the relays at the blocks, vectorized
+        @return If the relay was allowed at the block, and if it was mandatory
+        """
+        keys = (relay_ids << BLOCK_BITS) + blocks
+        if len(self.starts) == 0:
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=bool)
+
+        index = np.searchsorted(self.starts, keys, side="right") - 1
+        # a key before the first segment gets the index -1, clip it and reject by the index check.
+        # A negative block would fall into the segments of the previous relay
+        safe_index = np.maximum(index, 0)
+        allowed = (relay_ids != NO_RELAY) & (blocks >= 0) & (index >= 0) & (keys < self.ends[safe_index])
+        return allowed, allowed & self.mandatory[safe_index]
+
+
+def factorize(values: list) -> tuple[list, np.ndarray]:
+    """
+    @notice Encode the values as the indices of the distinct values
+    @dev A dict is faster than sorting with `numpy.unique` for the few distinct strings of a chunk
+    """
+    codes: dict = {}
+    indices = [codes.setdefault(value, len(codes)) for value in values]
+    return list(codes), np.array(indices, dtype=np.int64)
+
+
+def _open_text(path: Path):
+    return io.TextIOWrapper(gzip.open(path), encoding="utf-8") if path.suffix == ".gz" else open(path, encoding="utf-8")
+
+
+def read_chunks(path: str | Path, fields: list[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict[str, list]]:
+    """
+    @notice Read the rows of a `.jsonl` or `.csv` file, optionally gzipped, in chunks of columns
+    @param fields Names of the columns to read, a missing column is read as empty strings
+    """
+    path = Path(path)
+    is_csv = path.name.removesuffix(".gz").endswith(".csv")
+    with _open_text(path) as f:
+        if is_csv:
+            reader = csv.reader(f)
+            header = next(reader)
+            present = [field for field in fields if field in header]
+            # a single getter per row, the columns are picked in C
+            rows = map(lambda row, get=itemgetter(*[header.index(field) for field in present]): get(row), reader)
+            if len(present) == 1:
+                rows = ((value,) for value in rows)
+        else:
+            present = fields
+            rows = (
+                tuple(row.get(field, "") for field in fields)
+                for row in (json.loads(line) for line in f if line.strip())
+            )
+
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            columns = dict(zip(present, map(list, zip(*chunk))))
+            yield {field: columns.get(field) or [""] * len(chunk) for field in fields}
+
+
+class OperatorReport:
+    def __init__(self):
+        self.rows = 0
+        self.violations = 0
+        self.mandatory_rows = 0
+        self.violations_by_relay: dict[str, int] = {}
+        self.first_violation_block: int | None = None
+        self.last_violation_block: int | None = None
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "violations": self.violations,
+            "mandatory_coverage": self.mandatory_rows / self.rows if self.rows else 0.0,
+            "violations_by_relay": dict(sorted(self.violations_by_relay.items())),
+            "first_violation_block": self.first_violation_block,
+            "last_violation_block": self.last_violation_block,
+        }
+
+
+class ComplianceChecker:
+    def __init__(self, segments: AllowedSegments, operators_by_pubkey: dict[str, str] | None = None):
+        """
+        @param operators_by_pubkey Operator by the proposer public key. If set, only the rows of these keys
+               are checked and the others are skipped. Otherwise the operator is read from the rows
+        """
+        self.segments = segments
+        self.operators_by_pubkey = (
+            {pubkey.lower(): operator for pubkey, operator in operators_by_pubkey.items()}
+            if operators_by_pubkey is not None
+            else None
+        )
+        self.operators: dict[str, OperatorReport] = {}
+        self.rows = 0
+        self.skipped_rows = 0
+
+    @property
+    def fields(self) -> list[str]:
+        group_field = PROPOSER_PUBKEY_FIELD if self.operators_by_pubkey is not None else OPERATOR_FIELD
+        return [BLOCK_NUMBER_FIELD, RELAY_FIELD, group_field]
+
+    def check_file(self, path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        for chunk in read_chunks(path, self.fields, chunk_size):
+            self.check_chunk(chunk)
+
+    def check_chunk(self, chunk: dict[str, list]):
+        """Check a chunk of columns, see `fields`"""
+        blocks = np.fromiter(map(int, chunk[BLOCK_NUMBER_FIELD]), dtype=np.int64, count=len(chunk[BLOCK_NUMBER_FIELD]))
+        relays, relay_codes = factorize(chunk[RELAY_FIELD])
+        operators, operator_ids = factorize(chunk[self.fields[2]])
+        self.rows += len(blocks)
+
+        if self.operators_by_pubkey is not None:
+            # the public keys are grouped by the operators, the other validators are skipped
+            names = [self.operators_by_pubkey.get(pubkey.lower()) for pubkey in operators]
+            operators = sorted({name for name in names if name is not None})
+            position = {name: i for i, name in enumerate(operators)}
+            operator_ids = np.array([position.get(name, -1) for name in names], dtype=np.int64)[operator_ids]
+            checked = operator_ids >= 0
+            self.skipped_rows += int(np.count_nonzero(~checked))
+            blocks, relay_codes, operator_ids = blocks[checked], relay_codes[checked], operator_ids[checked]
+
+        # the proposer chooses the relays before the block, by the allowed list at the parent block
+        relay_ids = self.segments.relay_ids_of(relays)[relay_codes]
+        allowed, mandatory = self.segments.lookup(relay_ids, blocks - 1)
+
+        rows = np.bincount(operator_ids, minlength=len(operators))
+        violations = np.bincount(operator_ids, weights=~allowed, minlength=len(operators))
+        mandatory_rows = np.bincount(operator_ids, weights=mandatory, minlength=len(operators))
+        for i, operator in enumerate(operators):
+            if rows[i] == 0:
+                continue
+            report = self.operators.setdefault(operator, OperatorReport())
+            report.rows += int(rows[i])
+            report.violations += int(violations[i])
+            report.mandatory_rows += int(mandatory_rows[i])
+
+        # violations are expected to be rare, so go through them one by one
+        violating = np.flatnonzero(~allowed)
+        for operator_id, relay_code, block in zip(
+            operator_ids[violating].tolist(), relay_codes[violating].tolist(), blocks[violating].tolist()
+        ):
+            report = self.operators[operators[operator_id]]
+            relay = relays[relay_code]
+            report.violations_by_relay[relay] = report.violations_by_relay.get(relay, 0) + 1
+            if report.first_violation_block is None or block < report.first_violation_block:
+                report.first_violation_block = block
+            if report.last_violation_block is None or block > report.last_violation_block:
+                report.last_violation_block = block
+
+    def report(self) -> dict:
+        return {
+            "rows": self.rows,
+            "skipped_rows": self.skipped_rows,
+            "violations": sum(report.violations for report in self.operators.values()),
+            "operators": {operator: report.to_dict() for operator, report in sorted(self.operators.items())},
+        }
+
+
+def load_operators(path: str | Path) -> dict[str, str]:
+    """Load the operators by the validator public keys from a CSV file with `pubkey` and `operator` columns"""
+    with open(path, newline="") as f:
+        return {row["pubkey"]: row["operator"] for row in csv.DictReader(f)}
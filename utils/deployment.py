@@ -0,0 +1,180 @@
+"""
+Deployment of the allowed list at a predictable cost
+
+The gas is estimated with a dry run of the deployment transaction and the
+EIP-1559 fees are derived from the recent fee history, capped by a ceiling, so
+the cost is known before anything is sent. Optionally the contract is deployed
+through the deterministic deployment proxy with CREATE2, which gives the same
+address on every network for the same init code and salt. The init code includes
+the constructor arguments, so the CREATE2 deployment is owned by the deployer,
+the same on every network, and the ownership is handed over afterwards.
+"""
+
+from pathlib import Path
+from typing import NamedTuple
+
+from ape import chain
+from eth_utils import keccak, to_checksum_address
+from web3.utils.address import get_create2_address, get_create_address
+
+from utils.files import atomic_write_text
+
+PROJECT_ROOT = Path(__file__).parent.parent
+# https://github.com/Arachnid/deterministic-deployment-proxy, deployed at the same address on all the networks
+DETERMINISTIC_DEPLOYMENT_PROXY = "0x4e59b44847b379578588920cA78FbF26c0B4956C"
+FEE_HISTORY_BLOCKS = 20
+PRIORITY_FEE_PERCENTILE = 50
+# the max fee covers the base fee doubling, i.e. six full blocks in a row
+BASE_FEE_MULTIPLIER = 2
+# the deployment gas does not depend on the chain state, the margin is for the estimation rounding only
+GAS_LIMIT_MARGIN_PERCENT = 10
+
+
+class Fees(NamedTuple):
+    max_fee: int
+    max_priority_fee: int
+
+
+class DeploymentPlan(NamedTuple):
+    address: str
+    # the CREATE2 factory to send the transaction to, None for a plain deployment
+    factory: str | None
+    data: bytes
+    args: tuple
+    gas_limit: int
+    fees: Fees
+    already_deployed: bool
+
+    @property
+    def max_cost(self) -> int:
+        return self.gas_limit * self.fees.max_fee
+
+
+def suggest_fees(base_fees: list[int], rewards: list[list[int]], max_fee_ceiling: int) -> Fees:
+    """
+    @notice Derive the EIP-1559 fees from `eth_feeHistory` data
+    @param base_fees Base fees per gas of the recent blocks, the last one is the latest known
+    @param rewards Priority fees per gas at a percentile of the recent blocks, empty for an empty block
+    @dev The priority fee is the median over the blocks, the max fee covers the base fee growth
+         and is capped by the ceiling. Raises RuntimeError if the base fee is already above the ceiling
+    """
+    base_fee = base_fees[-1]
+    if base_fee >= max_fee_ceiling:
+        raise RuntimeError(f"base fee {base_fee} is not below the max fee ceiling {max_fee_ceiling}")
+
+    tips = sorted(reward[0] for reward in rewards if reward)
+    max_priority_fee = min(tips[len(tips) // 2] if tips else 0, max_fee_ceiling - base_fee)
+    max_fee = min(BASE_FEE_MULTIPLIER * base_fee + max_priority_fee, max_fee_ceiling)
+    return Fees(max_fee, max_priority_fee)
+
+
+def fetch_fees(
+    max_fee_ceiling: int, blocks: int = FEE_HISTORY_BLOCKS, percentile: int = PRIORITY_FEE_PERCENTILE
+) -> Fees:
+    """Suggest the fees from the fee history of the connected network, see `suggest_fees`"""
+    web3 = chain.provider.web3
+    history = web3.eth.fee_history(blocks, "latest", [percentile])
+    # a node returns the base fee of the next block last, the in-process test chain may return no base fees
+    base_fees = list(history["baseFeePerGas"]) or [web3.eth.get_block("latest")["baseFeePerGas"]]
+    return suggest_fees(base_fees, list(history.get("reward") or []), max_fee_ceiling)
+
+
+def salt_from_text(text: str) -> bytes:
+    """The 32 bytes hex salt as is, any other text is hashed"""
+    if text.startswith("0x") and len(text) == 66:
+        return bytes.fromhex(text[2:])
+    return keccak(text=text)
+
+
+def plan_deployment(
+    container,
+    args: tuple,
+    deployer: str,
+    fees: Fees,
+    salt: bytes | None = None,
+    factory: str = DETERMINISTIC_DEPLOYMENT_PROXY,
+) -> DeploymentPlan:
+    """
+    @notice Compute the address and estimate the gas of the deployment with a dry run
+    @param container Contract container, e.g. `project.MEVBoostRelayAllowedList`
+    @param salt CREATE2 salt to deploy through the `factory`, a plain deployment from the deployer if None
+    @dev A CREATE2 deployment with the contract already at the address needs no transaction
+    """
+    init_code = container.contract_type.deployment_bytecode.to_bytes() + bytes(
+        container.constructor.encode_input(*args)
+    )
+    web3 = chain.provider.web3
+
+    if salt is None:
+        address = get_create_address(deployer, web3.eth.get_transaction_count(deployer))
+        factory, data = None, init_code
+        transaction = {"from": deployer, "data": "0x" + data.hex()}
+    else:
+        if len(web3.eth.get_code(factory)) == 0:
+            raise RuntimeError(f"no CREATE2 factory at {factory}")
+        address = get_create2_address(factory, "0x" + salt.hex(), "0x" + init_code.hex())
+        if len(web3.eth.get_code(address)) > 0:
+            return DeploymentPlan(address, factory, b"", args, 0, fees, True)
+        data = salt + init_code
+        transaction = {"from": deployer, "to": factory, "data": "0x" + data.hex()}
+
+    gas_limit = web3.eth.estimate_gas(transaction) * (100 + GAS_LIMIT_MARGIN_PERCENT) // 100
+    return DeploymentPlan(to_checksum_address(address), factory, data, args, gas_limit, fees, False)
+
+
+def execute_deployment(container, plan: DeploymentPlan, deployer):
+    """
+    @notice Send the planned deployment from the deployer account
+    @return The deployed contract instance
+    """
+    if plan.already_deployed:
+        return container.at(plan.address)
+    if deployer.balance < plan.max_cost:
+        raise RuntimeError(f"deployer balance {deployer.balance} is below the max cost {plan.max_cost}")
+
+    fee_kwargs = {
+        "gas_limit": plan.gas_limit,
+        "max_fee": plan.fees.max_fee,
+        "max_priority_fee": plan.fees.max_priority_fee,
+    }
+    if plan.factory is None:
+        contract = container.deploy(*plan.args, sender=deployer, **fee_kwargs)
+    else:
+        deployer.transfer(plan.factory, 0, data=plan.data, **fee_kwargs)
+        contract = container.at(plan.address)
+
+    if contract.address != plan.address:
+        raise RuntimeError(f"contract is deployed at {contract.address} instead of {plan.address}")
+    return contract
+
+
+def hand_over_ownership(contract, owner: str, deployer, fees: Fees):
+    """
+    @notice Change the owner of the contract deployed with the deployer as the owner
+    @return The receipt, None if the contract is already owned by `owner`
+    @dev Raises RuntimeError if the contract is owned by neither, e.g. someone else deployed it first
+    """
+    current_owner = contract.get_owner()
+    if current_owner == owner:
+        return None
+    if current_owner != deployer.address:
+        raise RuntimeError(f"contract at {contract.address} is owned by {current_owner}, not by the deployer")
+    return contract.change_owner(owner, sender=deployer, max_fee=fees.max_fee, max_priority_fee=fees.max_priority_fee)
+
+
+def write_deployed_address(network: str, address: str, root=PROJECT_ROOT):
+    """Record the address in `deployed_<network>.txt`, read by the multi-network tools"""
+    atomic_write_text(root / f"deployed_{network}.txt", address + "\n")
+
+
+def save_deployed_address(network_name: str, address: str, network=None, root=PROJECT_ROOT) -> bool:
+    """
+    @notice Record the address of a deployment to a live network, see `write_deployed_address`
+    @param network Ape network deployed to, the connected one by default
+    @return False for the local chain or a fork, their deployments are throwaway and the file is left as is
+    """
+    network = network or chain.provider.network
+    if network.is_dev:
+        return False
+    write_deployed_address(network_name, address, root)
+    return True
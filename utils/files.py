@@ -0,0 +1,17 @@
+import os
+from pathlib import Path
+
+
+def atomic_write_text(path: Path, text: str):
+    """Write the text file atomically, see `atomic_write_bytes`"""
+    atomic_write_bytes(path, text.encode())
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write the file via a temporary one and rename, so readers never see a partially written file"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,208 @@
+"""
+SQLite history index of the MEV Boost Relay Allowed List
+
+Stores every version of the allowed list as per-relay block intervals, so the
+set of the allowed relays at any past block is answered from the local
+database instead of archive node `get_relays()` calls.
+
+A relay is allowed from the block it was added at inclusive till the block
+it was removed at exclusive.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import NamedTuple
+
+from ape import chain
+
+from utils.relay import Relay
+from utils.syncer import AllowedListSyncer, DEFAULT_CHUNK_SIZE, DEFAULT_CONFIRMATIONS, MAX_CHUNK_SIZE
+
+# the end of the relay intervals not closed yet, the largest value of the R*Tree 32-bit integer coordinates
+OPEN_END_BLOCK = 2**31 - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    version INTEGER PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_block_number ON versions (block_number);
+CREATE TABLE IF NOT EXISTS relay_intervals (
+    id INTEGER PRIMARY KEY,
+    uri TEXT NOT NULL,
+    operator TEXT NOT NULL,
+    is_mandatory INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    added_block INTEGER NOT NULL,
+    removed_block INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS relay_intervals_open_uri ON relay_intervals (uri) WHERE removed_block IS NULL;
+"""
+
+# R*Tree of the relay intervals, a B-tree index serves only one of the interval bounds and scans all the intervals
+# on the other side of the block, while the R*Tree finds the intervals containing the block by both bounds
+SPANS_SCHEMA = f"""
+CREATE VIRTUAL TABLE relay_interval_spans USING rtree_i32 (id, added_block, removed_block);
+INSERT INTO relay_interval_spans
+SELECT id, added_block, COALESCE(removed_block, {OPEN_END_BLOCK}) FROM relay_intervals;
+"""
+
+ALLOWED_AT_QUERY = """
+SELECT uri, operator, is_mandatory, description FROM relay_interval_spans JOIN relay_intervals USING (id)
+WHERE relay_interval_spans.added_block <= :block AND relay_interval_spans.removed_block > :block
+"""
+
+ALLOWED_BETWEEN_QUERY = """
+SELECT uri, operator, is_mandatory, description, relay_intervals.added_block, relay_intervals.removed_block
+FROM relay_interval_spans JOIN relay_intervals USING (id)
+WHERE relay_interval_spans.removed_block > :from_block AND relay_interval_spans.added_block <= :to_block
+    AND relay_interval_spans.added_block < relay_interval_spans.removed_block
+ORDER BY relay_intervals.added_block
+"""
+
+
+class RelayInterval(NamedTuple):
+    relay: Relay
+    added_block: int
+    # None if the relay is still allowed
+    removed_block: int | None
+
+
+class HistoryIndex:
+    def __init__(self, db_path: str | Path):
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+        if not self.db.execute("SELECT 1 FROM sqlite_master WHERE name = 'relay_interval_spans'").fetchone():
+            # also indexes the intervals of the databases built before the R*Tree
+            self.db.executescript(SPANS_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def get_meta(self, key: str) -> str | None:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def add_relay(self, relay: Relay, block: int):
+        cursor = self.db.execute(
+            "INSERT INTO relay_intervals (uri, operator, is_mandatory, description, added_block) VALUES (?, ?, ?, ?, ?)",
+            (relay.uri, relay.operator, relay.is_mandatory, relay.description, block),
+        )
+        self.db.execute(
+            "INSERT INTO relay_interval_spans (id, added_block, removed_block) VALUES (?, ?, ?)",
+            (cursor.lastrowid, block, OPEN_END_BLOCK),
+        )
+
+    def remove_relay(self, uri: str, block: int):
+        row = self.db.execute(
+            "SELECT id FROM relay_intervals WHERE uri = ? AND removed_block IS NULL", (uri,)
+        ).fetchone()
+        if row is None:
+            return
+        self.db.execute("UPDATE relay_intervals SET removed_block = ? WHERE id = ?", (block, row[0]))
+        self.db.execute("UPDATE relay_interval_spans SET removed_block = ? WHERE id = ?", (block, row[0]))
+
+    def set_version(self, version: int, block: int):
+        self.db.execute("INSERT INTO versions (version, block_number) VALUES (?, ?)", (version, block))
+
+    def commit(self):
+        self.db.commit()
+
+    def relays_at(self, block: int) -> list[Relay]:
+        """Return the relays allowed at the block"""
+        rows = self.db.execute(ALLOWED_AT_QUERY, {"block": block})
+        return [
+            Relay(uri, operator, bool(is_mandatory), description) for uri, operator, is_mandatory, description in rows
+        ]
+
+    def version_at(self, block: int) -> int:
+        """Return the allowed list version at the block, zero before the first update"""
+        row = self.db.execute(
+            "SELECT MAX(version) FROM versions WHERE block_number <= ?",
+            (block,),
+        ).fetchone()
+        return row[0] or 0
+
+    def versions_between(self, from_block: int, to_block: int) -> list[tuple[int, int]]:
+        """Return (version, block number) of the allowed list updates in the block range inclusive"""
+        return self.db.execute(
+            "SELECT version, block_number FROM versions WHERE block_number BETWEEN ? AND ? ORDER BY version",
+            (from_block, to_block),
+        ).fetchall()
+
+    def relays_between(self, from_block: int, to_block: int) -> list[RelayInterval]:
+        """Return the allowed intervals of the relays allowed at any block of the range inclusive"""
+        rows = self.db.execute(ALLOWED_BETWEEN_QUERY, {"from_block": from_block, "to_block": to_block})
+        return [
+            RelayInterval(Relay(uri, operator, bool(is_mandatory), description), added_block, removed_block)
+            for uri, operator, is_mandatory, description, added_block, removed_block in rows
+        ]
+
+    def intervals(self) -> list[RelayInterval]:
+        """Return the allowed intervals of all the relays ever allowed"""
+        rows = self.db.execute(
+            "SELECT uri, operator, is_mandatory, description, added_block, removed_block FROM relay_intervals "
+            "WHERE removed_block IS NULL OR added_block < removed_block ORDER BY added_block, id"
+        )
+        return [
+            RelayInterval(Relay(uri, operator, bool(is_mandatory), description), added_block, removed_block)
+            for uri, operator, is_mandatory, description, added_block, removed_block in rows
+        ]
+
+
+class HistorySyncer(AllowedListSyncer):
+    """
+    Fills the history index from the contract logs, checkpointing the synced block in the database.
+    The index is written as the logs are applied, so it is synced only up to the last confirmed block.
+    """
+
+    def __init__(
+        self,
+        contract,
+        index: HistoryIndex,
+        start_block: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunk_size: int = MAX_CHUNK_SIZE,
+        confirmations: int = DEFAULT_CONFIRMATIONS,
+        chain_id: int | None = None,
+    ):
+        self.index = index
+        super().__init__(contract, None, start_block, chunk_size, max_chunk_size, confirmations, chain_id)
+
+    def sync(self, to_block: int | None = None) -> int:
+        confirmed_block = chain.blocks.head.number - self.confirmations
+        return super().sync(confirmed_block if to_block is None else min(to_block, confirmed_block))
+
+    def _apply(self, log):
+        if log.event_name == "RelayAdded":
+            self.index.add_relay(Relay(*log.relay), log.block_number)
+        elif log.event_name == "RelayRemoved":
+            self.index.remove_relay(log.uri, log.block_number)
+        elif log.event_name == "AllowedListUpdated":
+            self.version = log.allowed_list_version
+            self.index.set_version(log.allowed_list_version, log.block_number)
+
+    def _load_checkpoint(self):
+        address = self.index.get_meta("address")
+        if address is None:
+            return
+        chain_id = self.index.get_meta("chain_id")
+        if chain_id != str(self.chain_id) or address != self.contract.address:
+            raise ValueError(f"history index is built for another contract {address} on chain {chain_id}")
+
+        self.block = int(self.index.get_meta("block"))
+        self.version = int(self.index.get_meta("version"))
+
+    def _save_checkpoint(self):
+        self.index.set_meta("chain_id", self.chain_id)
+        self.index.set_meta("address", self.contract.address)
+        self.index.set_meta("block", self.block)
+        self.index.set_meta("version", self.version)
+        self.index.commit()
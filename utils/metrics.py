@@ -0,0 +1,207 @@
+"""
+RPC and gas instrumentation of the allowed list contract calls
+
+`InstrumentedContract` wraps a contract instance, e.g.
+`project.MEVBoostRelayAllowedList.at(address)`, and records into `Metrics`
+per method: the number of calls and errors, the latency, the response size of
+the view calls and the gas used by the transactions. The metrics are read
+in-process or exposed in the Prometheus text format over HTTP, together with
+the allowed list gauges: the version, the number of relays and the number of
+mandatory relays.
+"""
+
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ape import chain
+from ape.contracts.base import ContractCallHandler, ContractTransactionHandler
+
+from utils.relay import Relay
+
+METRICS_PREFIX = "allowed_list_"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RESPONSE_BYTES_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+GAS_BUCKETS = (25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+
+
+class Histogram:
+    """Cumulative histogram of the observed values, the Prometheus way"""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        # the last count is for the values above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> list[int]:
+        counts, total = [], 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class Metrics:
+    """Thread-safe registry of the allowed list metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+        self.latency: dict[str, Histogram] = {}
+        self.response_bytes: dict[str, Histogram] = {}
+        self.gas_used: dict[str, Histogram] = {}
+        # gauge values by name and address
+        self.gauges: dict[tuple[str, str], int] = {}
+
+    def record_call(self, method: str, seconds: float, response_bytes: int):
+        with self._lock:
+            self._count(method, seconds)
+            self.response_bytes.setdefault(method, Histogram(RESPONSE_BYTES_BUCKETS)).observe(response_bytes)
+
+    def record_transaction(self, method: str, seconds: float, gas_used: int):
+        with self._lock:
+            self._count(method, seconds)
+            self.gas_used.setdefault(method, Histogram(GAS_BUCKETS)).observe(gas_used)
+
+    def record_error(self, method: str, seconds: float):
+        with self._lock:
+            self._count(method, seconds)
+            self.errors[method] = self.errors.get(method, 0) + 1
+
+    def set_allowed_list_gauges(self, address: str, version: int, relays: list[Relay]):
+        """Set the gauges from the relays already read, costs no RPC calls"""
+        with self._lock:
+            self.gauges[("version", address)] = version
+            self.gauges[("relays", address)] = len(relays)
+            self.gauges[("mandatory_relays", address)] = sum(1 for relay in relays if relay.is_mandatory)
+
+    def _count(self, method: str, seconds: float):
+        self.calls[method] = self.calls.get(method, 0) + 1
+        self.latency.setdefault(method, Histogram(LATENCY_BUCKETS)).observe(seconds)
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            _render_counter(lines, "calls_total", "Contract calls and transactions by method", self.calls)
+            _render_counter(lines, "call_errors_total", "Failed contract calls and transactions by method", self.errors)
+            _render_histograms(lines, "call_duration_seconds", "Contract call latency by method", self.latency)
+            _render_histograms(
+                lines, "call_response_bytes", "ABI encoded response size of the view calls", self.response_bytes
+            )
+            _render_histograms(lines, "transaction_gas_used", "Gas used by the transactions by method", self.gas_used)
+            for name, help_text in [
+                ("version", "Allowed list version"),
+                ("relays", "Number of the allowed relays"),
+                ("mandatory_relays", "Number of the mandatory allowed relays"),
+            ]:
+                values = {address: value for (gauge, address), value in self.gauges.items() if gauge == name}
+                if values:
+                    lines += [f"# HELP {METRICS_PREFIX}{name} {help_text}", f"# TYPE {METRICS_PREFIX}{name} gauge"]
+                    lines += [f'{METRICS_PREFIX}{name}{{address="{a}"}} {v}' for a, v in sorted(values.items())]
+        return "\n".join(lines) + "\n"
+
+
+def _render_counter(lines: list[str], name: str, help_text: str, values: dict[str, int]):
+    lines += [f"# HELP {METRICS_PREFIX}{name} {help_text}", f"# TYPE {METRICS_PREFIX}{name} counter"]
+    lines += [f'{METRICS_PREFIX}{name}{{method="{method}"}} {value}' for method, value in sorted(values.items())]
+
+
+def _render_histograms(lines: list[str], name: str, help_text: str, histograms: dict[str, Histogram]):
+    lines += [f"# HELP {METRICS_PREFIX}{name} {help_text}", f"# TYPE {METRICS_PREFIX}{name} histogram"]
+    for method, histogram in sorted(histograms.items()):
+        bounds = [str(bucket) for bucket in histogram.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, histogram.cumulative_counts()):
+            lines.append(f'{METRICS_PREFIX}{name}_bucket{{method="{method}",le="{bound}"}} {count}')
+        lines.append(f'{METRICS_PREFIX}{name}_sum{{method="{method}"}} {histogram.sum}')
+        lines.append(f'{METRICS_PREFIX}{name}_count{{method="{method}"}} {histogram.count}')
+
+
+class InstrumentedContract:
+    """
+    Drop-in wrapper of the contract instance recording the calls of its methods into the metrics,
+    the other attributes, e.g. the events, are passed through as is
+    """
+
+    def __init__(self, contract, metrics: Metrics):
+        self.contract = contract
+        self.metrics = metrics
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self.contract, name)
+        if isinstance(attribute, ContractCallHandler):
+            return lambda *args, **kwargs: self._call(name, attribute, args, kwargs)
+        if isinstance(attribute, ContractTransactionHandler):
+            return lambda *args, **kwargs: self._transact(name, attribute, args, kwargs)
+        return attribute
+
+    def _call(self, name: str, handler: ContractCallHandler, args: tuple, kwargs: dict):
+        start = time.perf_counter()
+        try:
+            # fetch the raw return data to know its size, then decode it the same way ape does
+            returndata = handler(*args, decode=False, **kwargs)
+            result = _decode_returndata(handler, args, returndata)
+        except Exception:
+            self.metrics.record_error(name, time.perf_counter() - start)
+            raise
+        self.metrics.record_call(name, time.perf_counter() - start, len(returndata))
+        return result
+
+    def _transact(self, name: str, handler: ContractTransactionHandler, args: tuple, kwargs: dict):
+        start = time.perf_counter()
+        try:
+            receipt = handler(*args, **kwargs)
+        except Exception:
+            self.metrics.record_error(name, time.perf_counter() - start)
+            raise
+        self.metrics.record_transaction(name, time.perf_counter() - start, receipt.gas_used)
+        return receipt
+
+
+def _decode_returndata(handler: ContractCallHandler, args: tuple, returndata: bytes):
+    ecosystem = chain.provider.network.ecosystem
+    # the overload is the one ape encodes the call with, told by the method selector of the calldata
+    calldata = handler.encode_input(*args)
+    abi = next(abi for abi in handler.abis if calldata.startswith(ecosystem.get_method_selector(abi)))
+    decoded = ecosystem.decode_returndata(abi, returndata)
+    # a single output is returned as is and no output as None, like ape's contract calls do
+    if isinstance(decoded, (list, tuple)) and len(decoded) < 2:
+        return decoded[0] if decoded else None
+    return decoded
+
+
+def start_metrics_server(metrics: Metrics, host: str = "127.0.0.1", port: int = 9100) -> ThreadingHTTPServer:
+    """
+    @notice Serve the metrics at `/metrics` for Prometheus in a daemon thread
+    @dev Port 0 binds a free port, see `server.server_address`. Stop with `server.shutdown()`
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
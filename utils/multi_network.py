@@ -0,0 +1,130 @@
+"""
+Parallel reader of the allowed list deployments on all the networks
+
+Loads every `deployed_<network>.txt` with its `config_<network>.py`, reads all
+the deployments concurrently over JSON-RPC and diffs the relays across the
+networks. Every network is read at a single block, so its snapshot is consistent.
+"""
+
+import importlib.util
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import ModuleType
+from typing import NamedTuple
+
+from eth_utils import to_checksum_address
+
+from utils.reader import read_allowed_list
+from utils.relay import Relay
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# RPC URL of the network is read from `RPC_URL_<NETWORK>`, mainnet falls back to `RPC_URL` used by ape config
+RPC_URL_ENV_VAR_PREFIX = "RPC_URL_"
+MAINNET_RPC_URL_ENV_VAR = "RPC_URL"
+
+
+class Deployment(NamedTuple):
+    network: str
+    address: str
+    # None if the network has no config_<network>.py
+    config: ModuleType | None
+    # None if no RPC URL is configured for the network
+    rpc_url: str | None
+
+
+class NetworkSnapshot(NamedTuple):
+    network: str
+    address: str
+    block: int
+    owner: str
+    manager: str
+    version: int
+    relays: list[Relay]
+    # differences of the owner and manager from the network config
+    config_mismatches: list[str]
+
+
+def load_deployments(root: Path = PROJECT_ROOT, rpc_urls: dict[str, str] | None = None) -> list[Deployment]:
+    """
+    @param root Directory with `deployed_<network>.txt` and `config_<network>.py` files
+    @param rpc_urls RPC URLs by network name, override the env variables
+    """
+    rpc_urls = rpc_urls or {}
+    deployments = []
+    for deployed_file in sorted(root.glob("deployed_*.txt")):
+        network = deployed_file.stem.removeprefix("deployed_")
+        rpc_url = rpc_urls.get(network) or os.environ.get(RPC_URL_ENV_VAR_PREFIX + network.upper())
+        if rpc_url is None and network == "mainnet":
+            rpc_url = os.environ.get(MAINNET_RPC_URL_ENV_VAR)
+        deployments.append(
+            Deployment(network, deployed_file.read_text().strip(), _load_config(root / f"config_{network}.py"), rpc_url)
+        )
+    return deployments
+
+
+def _load_config(path: Path) -> ModuleType | None:
+    """Load the network config by path, not via `config.py` which selects a single network on import"""
+    if not path.exists():
+        return None
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(config)
+    return config
+
+
+def read_snapshot(deployment: Deployment) -> NetworkSnapshot:
+    state = read_allowed_list(deployment.rpc_url, deployment.address)
+    owner, manager = to_checksum_address(state.owner), to_checksum_address(state.manager)
+    config_mismatches = []
+    if deployment.config is not None:
+        if owner != to_checksum_address(deployment.config.LIDO_DAO_AGENT_ADDRESS):
+            config_mismatches.append(f"owner {owner} is not LIDO_DAO_AGENT_ADDRESS")
+        if manager != to_checksum_address(deployment.config.LIDO_EASY_TRACK_SCRIPT_EXECUTOR_ADDRESS):
+            config_mismatches.append(f"manager {manager} is not LIDO_EASY_TRACK_SCRIPT_EXECUTOR_ADDRESS")
+
+    return NetworkSnapshot(
+        deployment.network,
+        deployment.address,
+        state.block,
+        owner,
+        manager,
+        state.version,
+        state.relays,
+        config_mismatches,
+    )
+
+
+def read_all(deployments: list[Deployment]) -> tuple[dict[str, NetworkSnapshot], dict[str, str]]:
+    """
+    @notice Read all the deployments with an RPC URL concurrently
+    @return Snapshots by network and errors by network, networks with no RPC URL are reported as errors
+    """
+    snapshots = {}
+    errors = {d.network: "no RPC URL configured" for d in deployments if d.rpc_url is None}
+    readable = [d for d in deployments if d.rpc_url is not None]
+    if not readable:
+        return snapshots, errors
+
+    with ThreadPoolExecutor(max_workers=len(readable)) as executor:
+        futures = {d.network: executor.submit(read_snapshot, d) for d in readable}
+        for network, future in futures.items():
+            try:
+                snapshots[network] = future.result()
+            except Exception as error:
+                errors[network] = f"{type(error).__name__}: {error}"
+    return snapshots, errors
+
+
+def diff_relays(snapshots: dict[str, NetworkSnapshot]) -> dict[str, dict[str, Relay | None]]:
+    """Return the relays which differ across the networks by URI, with the relay on every network or None if missing"""
+    uris = sorted({relay.uri for snapshot in snapshots.values() for relay in snapshot.relays})
+    by_network = {network: {relay.uri: relay for relay in s.relays} for network, s in snapshots.items()}
+
+    diff = {}
+    for uri in uris:
+        relays = {network: relays.get(uri) for network, relays in by_network.items()}
+        if len(set(relays.values())) > 1:
+            diff[uri] = relays
+    return diff
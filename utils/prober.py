@@ -0,0 +1,181 @@
+"""
+Concurrent health prober of the allowed relays
+
+Hits the mev-boost status endpoint of every relay concurrently over keep-alive
+HTTP/1.1 connections, records the latency percentiles and ranks the relays by
+latency. The ranking never drops mandatory relays, even unreachable ones.
+"""
+
+import asyncio
+import math
+import ssl
+import time
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+from utils.relay import Relay
+
+STATUS_PATH = "/eth/v1/builder/status"
+DEFAULT_SAMPLES = 5
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_CONCURRENCY = 16
+
+
+class RelayEndpoint(NamedTuple):
+    scheme: str
+    pubkey: str
+    host: str
+    port: int
+
+
+class ProbeResult(NamedTuple):
+    relay: Relay
+    # latencies of the successful requests in seconds
+    latencies: list[float]
+    errors: int
+    last_error: str | None
+
+    @property
+    def is_reachable(self) -> bool:
+        return len(self.latencies) > 0
+
+    @property
+    def p50(self) -> float | None:
+        return percentile(self.latencies, 50)
+
+    @property
+    def p99(self) -> float | None:
+        return percentile(self.latencies, 99)
+
+
+def parse_relay_uri(uri: str) -> RelayEndpoint:
+    """Parse relay URI of `scheme://pubkey@host[:port]` format"""
+    parts = urlsplit(uri)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"invalid relay URI {uri}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return RelayEndpoint(parts.scheme, parts.username or "", parts.hostname, port)
+
+
+def percentile(values: list[float], p: float) -> float | None:
+    """Nearest-rank percentile, None for no values"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+class _Connection:
+    """Keep-alive HTTP/1.1 connection to a relay"""
+
+    def __init__(self, endpoint: RelayEndpoint):
+        self.endpoint = endpoint
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def get_status(self) -> int:
+        if self.writer is None:
+            ssl_context = ssl.create_default_context() if self.endpoint.scheme == "https" else None
+            self.reader, self.writer = await asyncio.open_connection(
+                self.endpoint.host, self.endpoint.port, ssl=ssl_context
+            )
+
+        host = self.endpoint.host if self.endpoint.port in (80, 443) else f"{self.endpoint.host}:{self.endpoint.port}"
+        self.writer.write(f"GET {STATUS_PATH} HTTP/1.1\r\nHost: {host}\r\nAccept: */*\r\n\r\n".encode())
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the relay")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip().lower()
+
+        keep_alive = headers.get("connection") != "close"
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            while chunk_size := int((await self.reader.readline()).split(b";")[0], 16):
+                await self.reader.readexactly(chunk_size + 2)
+            await self.reader.readline()
+        else:
+            await self.reader.read()
+            keep_alive = False
+
+        if not keep_alive:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def probe_relay(
+    relay: Relay,
+    samples: int = DEFAULT_SAMPLES,
+    timeout: float = DEFAULT_TIMEOUT,
+    connections: asyncio.Semaphore | None = None,
+) -> ProbeResult:
+    """Request the relay status `samples` times over a single connection"""
+    latencies = []
+    errors = 0
+    last_error = None
+    connections = connections or asyncio.Semaphore(1)
+
+    async with connections:
+        try:
+            connection = _Connection(parse_relay_uri(relay.uri))
+        except ValueError as error:
+            return ProbeResult(relay, [], samples, str(error))
+
+        for _ in range(samples):
+            started = time.perf_counter()
+            try:
+                status = await asyncio.wait_for(connection.get_status(), timeout)
+                if status != 200:
+                    raise ConnectionError(f"status {status}")
+                latencies.append(time.perf_counter() - started)
+            except (OSError, asyncio.TimeoutError, ValueError, IndexError, asyncio.IncompleteReadError) as error:
+                errors += 1
+                last_error = str(error) or type(error).__name__
+                # the connection state is unknown after a failure, reconnect on the next sample
+                connection.close()
+        connection.close()
+
+    return ProbeResult(relay, latencies, errors, last_error)
+
+
+async def probe_relays(
+    relays: list[Relay],
+    samples: int = DEFAULT_SAMPLES,
+    timeout: float = DEFAULT_TIMEOUT,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> list[ProbeResult]:
+    """Probe the relays concurrently keeping at most `concurrency` connections open"""
+    connections = asyncio.Semaphore(concurrency)
+    return list(await asyncio.gather(*[probe_relay(relay, samples, timeout, connections) for relay in relays]))
+
+
+def rank_relays(results: list[ProbeResult], max_optional: int | None = None) -> list[ProbeResult]:
+    """
+    @notice Rank the relays by p50 then p99 latency
+    @dev Unreachable optional relays are dropped, unreachable mandatory relays go last.
+         `max_optional` limits the number of the optional relays, mandatory ones are always kept
+    """
+    reachable = sorted((r for r in results if r.is_reachable), key=lambda r: (r.p50, r.p99))
+    unreachable_mandatory = [r for r in results if not r.is_reachable and r.relay.is_mandatory]
+
+    ranked = []
+    optional_left = len(results) if max_optional is None else max_optional
+    for result in reachable:
+        if not result.relay.is_mandatory:
+            if optional_left == 0:
+                continue
+            optional_left -= 1
+        ranked.append(result)
+    return ranked + unreachable_mandatory
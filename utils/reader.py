@@ -0,0 +1,167 @@
+"""
+Lightweight reader of the allowed list, stdlib only
+
+Reads the full state of a deployment with raw `eth_call` requests, without ape,
+eth-abi and the network configs of `config.py`, so it starts in well under
+100 ms. The five views are read in a single round trip pinned to one block:
+as one Multicall3 `aggregate` call, or as one JSON-RPC batch on the chains
+without Multicall3, which takes one more round trip for the latest block number
+unless the block is given. Usage:
+
+    python -m utils.reader --rpc-url <url> --network mainnet
+    python -m utils.reader --rpc-url <url> --address <allowed-list-address> --block <number>
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+from utils.relay import Relay
+from utils.relay_decoder import decode_relays, read_word, WORD_SIZE
+from utils.rpc import eth_block_number, eth_call, eth_call_params, rpc_batch, RpcError
+
+PROJECT_ROOT = Path(__file__).parent.parent
+RPC_URL_ENV_VAR = "RPC_URL"
+
+# the same address on all the networks, see https://www.multicall3.com
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# 4-byte selectors, keccak is not in the stdlib
+GET_OWNER_SELECTOR = bytes.fromhex("0ac298dc")  # get_owner()
+GET_MANAGER_SELECTOR = bytes.fromhex("9e4a0fc4")  # get_manager()
+GET_ALLOWED_LIST_VERSION_SELECTOR = bytes.fromhex("76650ad3")  # get_allowed_list_version()
+GET_RELAYS_AMOUNT_SELECTOR = bytes.fromhex("312c3165")  # get_relays_amount()
+GET_RELAYS_SELECTOR = bytes.fromhex("04e469ea")  # get_relays()
+AGGREGATE_SELECTOR = bytes.fromhex("252dba42")  # aggregate((address,bytes)[])
+
+STATE_SELECTORS = [
+    GET_OWNER_SELECTOR,
+    GET_MANAGER_SELECTOR,
+    GET_ALLOWED_LIST_VERSION_SELECTOR,
+    GET_RELAYS_AMOUNT_SELECTOR,
+    GET_RELAYS_SELECTOR,
+]
+
+
+class AllowedListState(NamedTuple):
+    address: str
+    block: int
+    owner: str
+    manager: str
+    version: int
+    relays_amount: int
+    relays: list[Relay]
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(WORD_SIZE, "big")
+
+
+def _padded(data: bytes) -> bytes:
+    return data + b"\x00" * (-len(data) % WORD_SIZE)
+
+
+def encode_aggregate(target: str, calls_data: list[bytes]) -> bytes:
+    """Encode the call of Multicall3 `aggregate` calling `target` with every calldata"""
+    address = _word(int(target, 16))
+    calls = [address + _word(2 * WORD_SIZE) + _word(len(data)) + _padded(data) for data in calls_data]
+    offsets, offset = [], len(calls) * WORD_SIZE
+    for call in calls:
+        offsets.append(_word(offset))
+        offset += len(call)
+    return AGGREGATE_SELECTOR + _word(WORD_SIZE) + _word(len(calls)) + b"".join(offsets) + b"".join(calls)
+
+
+def decode_aggregate(data: bytes) -> tuple[int, list[bytes]]:
+    """Decode the block number and the return data of every call from the Multicall3 `aggregate` return data"""
+    view = memoryview(data)
+    array = read_word(view, WORD_SIZE)
+    elements = array + WORD_SIZE
+    results = []
+    for i in range(read_word(view, array)):
+        position = elements + read_word(view, elements + i * WORD_SIZE)
+        length = read_word(view, position)
+        if position + WORD_SIZE + length > len(view):
+            raise ValueError(f"return data of the call {i} is out of {len(view)} bytes")
+        results.append(bytes(view[position + WORD_SIZE : position + WORD_SIZE + length]))
+    return read_word(view, 0), results
+
+
+def _decode_state(address: str, block: int, results: list[bytes]) -> AllowedListState:
+    owner, manager, version, relays_amount, relays = results
+    return AllowedListState(
+        address,
+        block,
+        "0x" + owner[-20:].hex(),
+        "0x" + manager[-20:].hex(),
+        int.from_bytes(version, "big"),
+        int.from_bytes(relays_amount, "big"),
+        decode_relays(relays),
+    )
+
+
+def read_allowed_list(
+    rpc_url: str, address: str, block: int | None = None, multicall: str | None = MULTICALL3_ADDRESS
+) -> AllowedListState:
+    """
+    @notice Read the owner, the manager, the version, the relays amount and the relays at a single block
+    @param block Block to read at, the latest one by default
+    @param multicall Multicall3 address, None to read with a JSON-RPC batch.
+           If Multicall3 is not deployed, the batch is used as well
+    @dev Multicall3 reads in one round trip at any block, since `aggregate` returns the block number.
+         The batch needs the block in advance to pin the calls, so reading the latest block takes two round trips
+    """
+    if multicall is not None:
+        data = eth_call(
+            rpc_url, multicall, encode_aggregate(address, STATE_SELECTORS), "latest" if block is None else block
+        )
+        # a call to an address without code returns nothing
+        if data:
+            block, results = decode_aggregate(data)
+            return _decode_state(address, block, results)
+
+    if block is None:
+        block = eth_block_number(rpc_url)
+    results = rpc_batch(
+        rpc_url, [("eth_call", eth_call_params(address, selector, block)) for selector in STATE_SELECTORS]
+    )
+    return _decode_state(address, block, [bytes.fromhex(result[2:]) for result in results])
+
+
+def deployed_address(network: str, root: Path = PROJECT_ROOT) -> str:
+    """Read the allowed list address from `deployed_<network>.txt`"""
+    return (root / f"deployed_{network}.txt").read_text().strip()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.reader", description="Print the allowed list as JSON")
+    parser.add_argument("--rpc-url", default=os.environ.get(RPC_URL_ENV_VAR), help="defaults to RPC_URL env")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--network", help="read the address from deployed_<network>.txt")
+    target.add_argument("--address", help="allowed list address")
+    parser.add_argument("--root", type=Path, default=PROJECT_ROOT, help="directory with deployed_<network>.txt")
+    parser.add_argument("--block", type=int, help="block to read at, the latest one by default")
+    parser.add_argument("--multicall", default=MULTICALL3_ADDRESS, help="Multicall3 address")
+    parser.add_argument("--no-multicall", action="store_true", help="read with a JSON-RPC batch instead of Multicall3")
+    args = parser.parse_args(argv)
+
+    if args.rpc_url is None:
+        parser.error(f"--rpc-url or {RPC_URL_ENV_VAR} env is required")
+    try:
+        address = args.address or deployed_address(args.network, args.root)
+        state = read_allowed_list(args.rpc_url, address, args.block, None if args.no_multicall else args.multicall)
+    except (OSError, ValueError, RpcError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+
+    result = state._asdict()
+    result["relays"] = [relay._asdict() for relay in state.relays]
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
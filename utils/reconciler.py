@@ -0,0 +1,184 @@
+"""
+Declarative reconciler of the allowed list
+
+Diffs the desired relays from a YAML or JSON file against the on-chain relays by
+URI and plans the fewest calls bringing the contract to the desired state: the
+removals, then the additions, batched as long as the estimated gas of a call
+fits the limit. An edited relay is removed and added again, as the contract has
+no update, unchanged relays are never touched. The plan is verified by applying it to an isolated local or
+forked chain, which also measures the gas of every call.
+"""
+
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+import yaml
+from ape import accounts, chain
+
+from utils.relay import Relay
+
+MAX_NUM_RELAYS = 40  # supposed to correspond to the limit in the contract
+MAX_STRING_LENGTH = 1024  # supposed to correspond to the limit in the contract
+# the simulated sender needs some ether for the gas
+SIMULATION_BALANCE = 10**18
+
+# upper bounds of the gas, every storage slot of an added relay is counted as written from zero
+FRESH_SLOT_GAS = 22_100
+# the transaction, plus the version, the content hash and the list length which may be written from zero
+CALL_GAS = 21_000 + 3 * FRESH_SLOT_GAS
+# calldata, the event data and the memory copies of the relay strings
+RELAY_BYTE_GAS = 40
+# the relay length slots, `is_mandatory`, the URI hash entry, the index and the content hash
+ADD_RELAY_SLOTS = 3 + 1 + 3
+ADD_RELAY_GAS = 15_000
+REMOVE_RELAY_GAS = 45_000
+# a call of half the block gas limit still leaves room for the other transactions of the block
+BLOCK_GAS_LIMIT_SHARE = 2
+DEFAULT_MAX_CALL_GAS = 15_000_000
+
+
+class Call(NamedTuple):
+    method: str
+    args: tuple
+
+
+class PlannedCall(NamedTuple):
+    call: Call
+    calldata: str
+    gas: int
+
+
+def parse_desired_relays(entries) -> list[Relay]:
+    """
+    @notice Validate the desired relays, a list of mappings or a mapping with such `relays` list
+    @dev Raises ValueError on a missing or unknown field, a duplicate URI, too many relays or too long strings,
+         so an invalid file never produces a plan reverting halfway
+    """
+    if isinstance(entries, dict):
+        entries = entries.get("relays")
+    if not isinstance(entries, list):
+        raise ValueError("desired relays must be a list or a mapping with `relays` list")
+
+    relays = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict) or set(entry) != set(Relay._fields):
+            raise ValueError(f"relay #{i} must have exactly the fields {', '.join(Relay._fields)}")
+        relay = Relay(**entry)
+        if not all(isinstance(value, str) for value in (relay.uri, relay.operator, relay.description)):
+            raise ValueError(f"relay #{i}: uri, operator and description must be strings")
+        if not isinstance(relay.is_mandatory, bool):
+            raise ValueError(f"relay #{i}: is_mandatory must be a boolean")
+        if relay.uri == "":
+            raise ValueError(f"relay #{i}: URI must not be empty")
+        if any(len(value.encode()) > MAX_STRING_LENGTH for value in (relay.uri, relay.operator, relay.description)):
+            raise ValueError(f"relay #{i}: strings must be at most {MAX_STRING_LENGTH} bytes")
+        relays.append(relay)
+
+    uris = [relay.uri for relay in relays]
+    duplicates = sorted({uri for uri in uris if uris.count(uri) > 1})
+    if duplicates:
+        raise ValueError(f"duplicate relay URIs: {', '.join(duplicates)}")
+    if len(relays) > MAX_NUM_RELAYS:
+        raise ValueError(f"{len(relays)} relays is more than the limit of {MAX_NUM_RELAYS}")
+    return relays
+
+
+def load_desired_relays(path: str | Path) -> list[Relay]:
+    """Load the desired relays from a `.json` file, or a YAML file otherwise"""
+    path = Path(path)
+    text = path.read_text()
+    return parse_desired_relays(json.loads(text) if path.suffix == ".json" else yaml.safe_load(text))
+
+
+def estimate_add_gas(relay: Relay) -> int:
+    """Upper bound of the gas a relay adds to `add_relay` or `add_relays`, without `CALL_GAS`"""
+    lengths = [len(value.encode()) for value in (relay.uri, relay.operator, relay.description)]
+    data_slots = sum((length + 31) // 32 for length in lengths)
+    return ADD_RELAY_GAS + FRESH_SLOT_GAS * (ADD_RELAY_SLOTS + data_slots) + RELAY_BYTE_GAS * sum(lengths)
+
+
+def estimate_remove_gas(uri: str) -> int:
+    """Upper bound of the gas a relay adds to `remove_relay` or `remove_relays`, without `CALL_GAS`"""
+    return REMOVE_RELAY_GAS + RELAY_BYTE_GAS * len(uri.encode())
+
+
+def plan_calls(current: list[Relay], desired: list[Relay], max_gas: int = DEFAULT_MAX_CALL_GAS) -> list[Call]:
+    """
+    @notice Plan the calls turning the current relays into the desired ones, in the execution order
+    @param max_gas Limit of the estimated gas of a call, see `estimate_add_gas` and `estimate_remove_gas`
+    @dev Removals go first, so the edited relays can be added again and the list never overflows.
+         A single relay uses `remove_relay` or `add_relay`, which cost less than a batch of one
+    """
+    desired_by_uri = {relay.uri: relay for relay in desired}
+    current_by_uri = {relay.uri: relay for relay in current}
+
+    # the removed relay is replaced by the last one, removing from the end first moves fewer relays
+    to_remove = [relay.uri for relay in reversed(current) if desired_by_uri.get(relay.uri) != relay]
+    to_add = [relay for relay in desired if current_by_uri.get(relay.uri) != relay]
+
+    calls = []
+    for batch in _split_batches(to_remove, estimate_remove_gas, max_gas):
+        calls.append(Call("remove_relay", (batch[0],)) if len(batch) == 1 else Call("remove_relays", (batch,)))
+    for batch in _split_batches(to_add, estimate_add_gas, max_gas):
+        if len(batch) == 1:
+            calls.append(Call("add_relay", tuple(batch[0])))
+        else:
+            calls.append(Call("add_relays", ([tuple(relay) for relay in batch],)))
+    return calls
+
+
+def _split_batches(items: list, estimate_gas, max_gas: int) -> list[list]:
+    """Split the items in order into the fewest batches with the estimated gas within `max_gas`"""
+    batches, batch_gas = [], CALL_GAS
+    for item in items:
+        gas = estimate_gas(item)
+        if CALL_GAS + gas > max_gas:
+            raise ValueError(f"estimated gas {CALL_GAS + gas} of a single relay call exceeds {max_gas}")
+        if not batches or batch_gas + gas > max_gas:
+            batches.append([])
+            batch_gas = CALL_GAS
+        batches[-1].append(item)
+        batch_gas += gas
+    return batches
+
+
+def simulate_calls(contract, calls: list[Call], sender: str) -> tuple[list[PlannedCall], list[Relay]]:
+    """
+    @notice Apply the calls from the impersonated sender on an isolated chain
+    @dev Needs a local or forked chain, the chain state is reverted afterwards
+    @return The calls with the calldata and the gas used, and the relays after the calls
+    """
+    planned = []
+    # not `chain.isolate()`: it swallows the errors, and the in-process test chain identifies a snapshot by the head
+    # block hash, so ape's snapshot stack drops an outer snapshot of the same block, e.g. the test isolation one,
+    # on restore. The provider snapshot is reverted without touching the stack
+    snapshot_id = chain.provider.snapshot()
+    try:
+        account = accounts[sender]
+        if account.balance < SIMULATION_BALANCE:
+            account.balance = SIMULATION_BALANCE
+        for call in calls:
+            method = getattr(contract, call.method)
+            receipt = method(*call.args, sender=account)
+            planned.append(PlannedCall(call, "0x" + bytes(method.encode_input(*call.args)).hex(), receipt.gas_used))
+        final_relays = [Relay(*relay) for relay in contract.get_relays()]
+    finally:
+        chain.provider.restore(snapshot_id)
+        chain.history.revert_to_block(chain.blocks.height)
+    return planned, final_relays
+
+
+def reconcile(contract, desired: list[Relay], sender: str, max_gas: int | None = None) -> list[PlannedCall]:
+    """
+    @notice Plan the calls bringing the contract to the desired relays, verified on an isolated chain
+    @param sender Owner or manager of the contract the calls are to be sent from
+    @param max_gas Limit of the estimated gas of a call, half of the block gas limit by default
+    """
+    if max_gas is None:
+        max_gas = chain.blocks.head.gas_limit // BLOCK_GAS_LIMIT_SHARE
+    current = [Relay(*relay) for relay in contract.get_relays()]
+    planned, final_relays = simulate_calls(contract, plan_calls(current, desired, max_gas), sender)
+    if sorted(final_relays) != sorted(desired):
+        raise RuntimeError("the planned calls do not bring the allowed list to the desired relays")
+    return planned
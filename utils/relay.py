@@ -0,0 +1,10 @@
+from typing import NamedTuple
+
+
+class Relay(NamedTuple):
+    """Python counterpart of the contract `Relay` struct"""
+
+    uri: str
+    operator: str
+    is_mandatory: bool
+    description: str
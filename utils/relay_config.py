@@ -0,0 +1,95 @@
+"""
+MEV-Boost relays config generated from the allowed list
+
+Renders the value of the mev-boost `-relays` flag (or the `RELAYS` env variable)
+from the allowed relays, mandatory relays first, and keeps the config file up to
+date, regenerating it only when the allowed list version changes.
+"""
+
+import hashlib
+import subprocess
+from pathlib import Path
+
+from utils.client import CachedAllowedList
+from utils.files import atomic_write_text
+from utils.relay import Relay
+
+PLAIN_FORMAT = "plain"
+ENV_FORMAT = "env"
+OUTPUT_FORMATS = [PLAIN_FORMAT, ENV_FORMAT]
+
+
+def render_relays_config(relays: list[Relay], output_format: str = PLAIN_FORMAT) -> str:
+    """
+    @notice Render comma separated relay URIs, mandatory relays first
+    @dev The relays are sorted by URI within the groups, so the config does not change
+         when the relays order in the contract does
+    """
+    mandatory = sorted(relay.uri for relay in relays if relay.is_mandatory)
+    optional = sorted(relay.uri for relay in relays if not relay.is_mandatory)
+    value = ",".join(mandatory + optional)
+
+    if output_format == PLAIN_FORMAT:
+        return value + "\n"
+    if output_format == ENV_FORMAT:
+        return f"RELAYS={value}\n"
+    raise ValueError(f"unknown output format {output_format}, must be one of {','.join(OUTPUT_FORMATS)}")
+
+
+class RelayConfigGenerator:
+    def __init__(
+        self,
+        allowed_list: CachedAllowedList,
+        output_file: str | Path,
+        output_format: str = PLAIN_FORMAT,
+        hook: str | None = None,
+    ):
+        """
+        @param allowed_list Reader of the allowed list
+        @param output_file Path of the generated config
+        @param output_format One of `OUTPUT_FORMATS`
+        @param hook Optional shell command to run after the config is updated, e.g. mev-boost restart
+        """
+        self.allowed_list = allowed_list
+        self.output_file = Path(output_file)
+        self.output_format = output_format
+        self.hook = hook
+        # sha256 of the config the hook last succeeded on, kept next to the config to survive restarts
+        self.applied_file = self.output_file.with_name(self.output_file.name + ".applied")
+
+    def update(self) -> bool:
+        """
+        @notice Regenerate the config if the allowed list version changed
+        @dev The update is applied only once the hook succeeds. If the hook fails, the config is already
+             written and the hook is retried on the next update, even after a restart
+        @return True if the config was updated and the hook run
+        """
+        if not self.allowed_list.refresh() and self._is_applied():
+            return False
+
+        config = render_relays_config(self.allowed_list.relays, self.output_format)
+        if self._is_applied(config):
+            # e.g. a relay was removed and added back
+            return False
+
+        if not self.output_file.exists() or self.output_file.read_text() != config:
+            atomic_write_text(self.output_file, config)
+        if self.hook is not None:
+            subprocess.run(self.hook, shell=True, check=True)
+            atomic_write_text(self.applied_file, _config_hash(config))
+        return True
+
+    def _is_applied(self, config: str | None = None) -> bool:
+        """Tell if the config file is up to date, with `config` if set, and the hook succeeded on it"""
+        if not self.output_file.exists():
+            return False
+        current = self.output_file.read_text()
+        if config is not None and current != config:
+            return False
+        if self.hook is None:
+            return True
+        return self.applied_file.exists() and self.applied_file.read_text() == _config_hash(current)
+
+
+def _config_hash(config: str) -> str:
+    return hashlib.sha256(config.encode()).hexdigest()
@@ -0,0 +1,68 @@
+"""
+Fast decoder of the relays returned by the allowed list views
+
+Decodes the ABI encoding of `DynArray[Relay, MAX_NUM_RELAYS]`, that is
+`(string,string,bool,string)[]`, straight from the raw eth_call return data.
+The strings are decoded from `memoryview` slices without intermediate bytes
+copies, and the relays come out as `Relay` named tuples, which carry no
+per-instance `__dict__`. Stdlib only. Every offset and length is bounds-checked,
+so malformed data raises `ValueError` instead of decoding garbage.
+"""
+
+from utils.relay import Relay
+
+WORD_SIZE = 32
+# head of the `Relay` tuple: uri offset, operator offset, is_mandatory, description offset
+RELAY_HEAD_SIZE = 4 * WORD_SIZE
+
+
+def decode_relays(data: bytes) -> list[Relay]:
+    """Decode the return data of `get_relays()`, `get_relays_page()` and `get_relays_by_mandatory()`"""
+    view = memoryview(data)
+    return _decode_relays_array(view, read_word(view, 0))
+
+
+def decode_relays_if_changed(data: bytes) -> tuple[int, list[Relay]]:
+    """Decode the return data of `get_relays_if_changed()` into the version and the relays"""
+    view = memoryview(data)
+    return read_word(view, 0), _decode_relays_array(view, read_word(view, WORD_SIZE))
+
+
+def read_word(view: memoryview, position: int) -> int:
+    if position + WORD_SIZE > len(view):
+        raise ValueError(f"word at {position} is out of {len(view)} bytes")
+    return int.from_bytes(view[position : position + WORD_SIZE], "big")
+
+
+def _decode_relays_array(view: memoryview, array_position: int) -> list[Relay]:
+    length = read_word(view, array_position)
+    # element offsets are relative to the start of the array elements, right after the length
+    elements = array_position + WORD_SIZE
+    if elements + length * WORD_SIZE > len(view):
+        raise ValueError(f"array of {length} relays is out of {len(view)} bytes")
+    return [_decode_relay(view, elements + read_word(view, elements + i * WORD_SIZE)) for i in range(length)]
+
+
+def _decode_relay(view: memoryview, position: int) -> Relay:
+    if position + RELAY_HEAD_SIZE > len(view):
+        raise ValueError(f"relay at {position} is out of {len(view)} bytes")
+
+    is_mandatory = read_word(view, position + 2 * WORD_SIZE)
+    if is_mandatory > 1:
+        raise ValueError(f"invalid bool {is_mandatory} at {position + 2 * WORD_SIZE}")
+
+    # string offsets are relative to the start of the relay tuple
+    return Relay(
+        _decode_string(view, position + read_word(view, position)),
+        _decode_string(view, position + read_word(view, position + WORD_SIZE)),
+        is_mandatory == 1,
+        _decode_string(view, position + read_word(view, position + 3 * WORD_SIZE)),
+    )
+
+
+def _decode_string(view: memoryview, position: int) -> str:
+    length = read_word(view, position)
+    start = position + WORD_SIZE
+    if start + length > len(view):
+        raise ValueError(f"string of {length} bytes at {position} is out of {len(view)} bytes")
+    return str(view[start : start + length], "utf-8")
@@ -0,0 +1,131 @@
+"""
+Minimal JSON-RPC over HTTP client, stdlib only
+
+The requests go over a plain socket, one connection per request: `urllib.request`
+takes longer to import than the whole stdlib reader CLI which uses this client.
+"""
+
+import json
+import socket
+from binascii import b2a_base64
+
+DEFAULT_TIMEOUT = 30
+
+
+class RpcError(Exception):
+    def __init__(self, error: dict):
+        super().__init__(error.get("message", str(error)))
+        self.code = error.get("code")
+        self.data = error.get("data")
+
+
+def split_url(url: str) -> tuple[str, str, int, str, str | None]:
+    """Split `scheme://[user:password@]host[:port][/path]` into scheme, host, port, path and userinfo"""
+    scheme, separator, rest = url.partition("://")
+    if not separator or scheme not in ("http", "https"):
+        raise ValueError(f"invalid RPC URL {url}")
+    netloc, _, path = rest.partition("/")
+    userinfo, _, hostport = netloc.rpartition("@")
+    if hostport.startswith("["):
+        # IPv6 literal
+        host, _, port = hostport[1:].partition("]")
+        port = port.removeprefix(":")
+    else:
+        host, _, port = hostport.partition(":")
+    if not host:
+        raise ValueError(f"invalid RPC URL {url}")
+    return scheme, host, int(port) if port else (443 if scheme == "https" else 80), "/" + path, userinfo or None
+
+
+def _decode_chunked(body: bytes) -> bytes:
+    chunks = []
+    while True:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line.split(b";")[0], 16)
+        if size == 0:
+            return b"".join(chunks)
+        chunks.append(body[:size])
+        body = body[size + 2 :]
+
+
+def http_post(url: str, body: bytes, timeout: float = DEFAULT_TIMEOUT) -> bytes:
+    """POST the JSON body over HTTP/1.1 and return the response body. Raise OSError on non-200 status"""
+    scheme, host, port, path, userinfo = split_url(url)
+    headers = [
+        f"POST {path} HTTP/1.1",
+        f"Host: {host}" if port in (80, 443) else f"Host: {host}:{port}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(body)}",
+        "Connection: close",
+    ]
+    if userinfo is not None:
+        headers.append(f"Authorization: Basic {b2a_base64(userinfo.encode(), newline=False).decode()}")
+
+    with socket.create_connection((host, port), timeout) as connection:
+        if scheme == "https":
+            # imported on use, plain HTTP to a local node does not pay for it
+            import ssl
+
+            connection = ssl.create_default_context().wrap_socket(connection, server_hostname=host)
+        connection.sendall("\r\n".join(headers).encode() + b"\r\n\r\n" + body)
+        # the server closes the connection after the response
+        response = b"".join(iter(lambda: connection.recv(65536), b""))
+
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    status = int(status_line.split()[1]) if len(status_line.split()) > 1 else 0
+    if status != 200:
+        raise OSError(f"RPC HTTP status {status}")
+    headers = {
+        name.strip().lower(): value.strip().lower() for name, _, value in (h.partition(":") for h in header_lines)
+    }
+    if headers.get("transfer-encoding") == "chunked":
+        return _decode_chunked(response_body)
+    return response_body
+
+
+def rpc_request(url: str, method: str, params: list, timeout: float = DEFAULT_TIMEOUT):
+    """Send a single JSON-RPC request and return its result. Raise RpcError if the node returns an error"""
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode()
+    reply = json.loads(http_post(url, body, timeout))
+    if "error" in reply:
+        raise RpcError(reply["error"])
+    return reply["result"]
+
+
+def rpc_batch(url: str, requests: list[tuple[str, list]], timeout: float = DEFAULT_TIMEOUT) -> list:
+    """
+    @notice Send the requests as a single JSON-RPC batch, that is one HTTP round trip
+    @param requests Method and params of every request
+    @return Results in the order of the requests. Raise RpcError if the node returns an error for any of them
+    """
+    body = json.dumps(
+        [{"jsonrpc": "2.0", "id": i, "method": method, "params": params} for i, (method, params) in enumerate(requests)]
+    ).encode()
+    reply = json.loads(http_post(url, body, timeout))
+    if not isinstance(reply, list):
+        # a node without batch support replies with a single error
+        raise RpcError(reply.get("error") or {"message": "invalid batch reply"})
+
+    # the replies may come in any order
+    by_id = {item.get("id"): item for item in reply}
+    results = []
+    for i in range(len(requests)):
+        item = by_id.get(i, {"error": {"message": f"no reply to the request {i}"}})
+        if "error" in item:
+            raise RpcError(item["error"])
+        results.append(item["result"])
+    return results
+
+
+def eth_call_params(to: str, data: bytes, block: int | str = "latest") -> list:
+    return [{"to": to, "data": "0x" + data.hex()}, hex(block) if isinstance(block, int) else block]
+
+
+def eth_call(url: str, to: str, data: bytes, block: int | str = "latest", timeout: float = DEFAULT_TIMEOUT) -> bytes:
+    result = rpc_request(url, "eth_call", eth_call_params(to, data, block), timeout)
+    return bytes.fromhex(result[2:])
+
+
+def eth_block_number(url: str, timeout: float = DEFAULT_TIMEOUT) -> int:
+    return int(rpc_request(url, "eth_blockNumber", [], timeout), 16)
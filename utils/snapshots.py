@@ -0,0 +1,207 @@
+"""
+Static snapshots of the allowed list for the node operators
+
+Publishes the relays and the version as content-addressed files, canonical JSON
+and deterministic CBOR, both gzip-precompressed, and serves them over HTTP. The
+latest snapshot is served with `ETag` and `If-None-Match`, and a conditional
+request with `?wait=<seconds>` is held until the snapshot changes (long-poll),
+so an operator makes one cheap conditional GET instead of RPC calls.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from utils import cbor
+from utils.client import CachedAllowedList
+from utils.files import atomic_write_bytes, atomic_write_text
+from utils.relay import Relay
+
+JSON_FORMAT = "json"
+CBOR_FORMAT = "cbor"
+CONTENT_TYPES = {JSON_FORMAT: "application/json", CBOR_FORMAT: "application/cbor"}
+# holds the hash of the latest published snapshot
+LATEST_FILE = "latest"
+MAX_WAIT = 300.0
+# max seconds to wait for each line of a request, and for the next request on a kept-alive connection
+READ_TIMEOUT = 30.0
+
+
+class Snapshot(NamedTuple):
+    # sha256 of the canonical JSON, names the files of all the formats
+    hash: str
+    version: int
+    # gzip-compressed content by format
+    files: dict[str, bytes]
+
+
+def snapshot_content(address: str, version: int, relays: list[Relay]) -> dict:
+    """The relays are sorted by URI, so the content does not depend on the relays order in the contract"""
+    return {"address": address, "version": version, "relays": [relay._asdict() for relay in sorted(relays)]}
+
+
+def canonical_json(content: dict) -> bytes:
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def build_snapshot(address: str, version: int, relays: list[Relay]) -> Snapshot:
+    content = snapshot_content(address, version, relays)
+    data = canonical_json(content)
+    # zero mtime keeps the compressed files deterministic too
+    files = {
+        JSON_FORMAT: gzip.compress(data, mtime=0),
+        CBOR_FORMAT: gzip.compress(cbor.encode(content), mtime=0),
+    }
+    return Snapshot(hashlib.sha256(data).hexdigest(), version, files)
+
+
+def allowed_list_snapshot(allowed_list: CachedAllowedList) -> Snapshot:
+    """Snapshot of the cached allowed list, refresh it first"""
+    return build_snapshot(allowed_list.contract.address, allowed_list.version, allowed_list.relays)
+
+
+def snapshot_file_name(snapshot_hash: str, snapshot_format: str) -> str:
+    return f"{snapshot_hash}.{snapshot_format}.gz"
+
+
+def publish_snapshot(directory: Path, snapshot: Snapshot):
+    """Write the snapshot files, then point the latest file to them, so a static server can serve the directory too"""
+    for snapshot_format, data in snapshot.files.items():
+        path = directory / snapshot_file_name(snapshot.hash, snapshot_format)
+        # content-addressed files never change
+        if not path.exists():
+            atomic_write_bytes(path, data)
+    atomic_write_text(directory / LATEST_FILE, snapshot.hash + "\n")
+
+
+def load_latest_snapshot(directory: Path) -> Snapshot | None:
+    latest_file = directory / LATEST_FILE
+    if not latest_file.exists():
+        return None
+    snapshot_hash = latest_file.read_text().strip()
+    files = {f: (directory / snapshot_file_name(snapshot_hash, f)).read_bytes() for f in CONTENT_TYPES}
+    version = json.loads(gzip.decompress(files[JSON_FORMAT]))["version"]
+    return Snapshot(snapshot_hash, version, files)
+
+
+class _Response(NamedTuple):
+    status: int
+    reason: str
+    headers: dict[str, str]
+    body: bytes = b""
+
+
+class SnapshotServer:
+    """
+    Serves `/latest.json` and `/latest.cbor` with long-poll, and the immutable `/<hash>.json` and `/<hash>.cbor`.
+    Responses are gzip-encoded for the clients accepting it, the ETag differs per format and encoding
+    """
+
+    def __init__(self, directory: str | Path, read_timeout: float = READ_TIMEOUT):
+        self.directory = Path(directory)
+        self.read_timeout = read_timeout
+        self.snapshot = load_latest_snapshot(self.directory)
+        self._updated = asyncio.Event()
+
+    def publish(self, snapshot: Snapshot) -> bool:
+        """Publish the snapshot and wake up the long-polls. Return False if it is the current one"""
+        if self.snapshot is not None and snapshot.hash == self.snapshot.hash:
+            return False
+        publish_snapshot(self.directory, snapshot)
+        self.snapshot = snapshot
+        self._updated.set()
+        self._updated = asyncio.Event()
+        return True
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while request_line := await self._read(reader.readline()):
+                method, target, version = (request_line.decode("latin-1").split() + ["", "", ""])[:3]
+                headers = {}
+                while (line := await self._read(reader.readline())) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await self._read(reader.readexactly(int(headers["content-length"])))
+
+                response = await self._respond(method, target, headers)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                response.headers["Content-Length"] = str(len(response.body))
+                response.headers["Connection"] = "keep-alive" if keep_alive else "close"
+                head = f"HTTP/1.1 {response.status} {response.reason}\r\n" + "".join(
+                    f"{name}: {value}\r\n" for name, value in response.headers.items()
+                )
+                writer.write(head.encode("latin-1") + b"\r\n" + (response.body if method == "GET" else b""))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read(self, read):
+        # an idle or slow client must not hold the connection forever, it is closed on the timeout
+        return await asyncio.wait_for(read, self.read_timeout)
+
+    async def _respond(self, method: str, target: str, headers: dict[str, str]) -> _Response:
+        if method not in ("GET", "HEAD"):
+            return _Response(405, "Method Not Allowed", {"Allow": "GET, HEAD"})
+
+        url = urlsplit(target)
+        name, _, snapshot_format = url.path.lstrip("/").partition(".")
+        if snapshot_format not in CONTENT_TYPES:
+            return _Response(404, "Not Found", {})
+        gzip_encoding = "gzip" in headers.get("accept-encoding", "")
+        if_none_match = {tag.strip() for tag in headers.get("if-none-match", "").split(",") if tag.strip()}
+
+        if name == "latest":
+            snapshot = self.snapshot
+            try:
+                wait = min(float(parse_qs(url.query).get("wait", ["0"])[0]), MAX_WAIT)
+            except ValueError:
+                return _Response(400, "Bad Request", {})
+            if (
+                snapshot is not None
+                and wait > 0
+                and self._etag(snapshot.hash, snapshot_format, gzip_encoding) in if_none_match
+            ):
+                # long-poll: hold the request until a new snapshot is published or the wait is over
+                try:
+                    await asyncio.wait_for(self._updated.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                snapshot = self.snapshot
+            if snapshot is None:
+                return _Response(503, "Service Unavailable", {"Retry-After": "60"})
+            snapshot_hash, data = snapshot.hash, snapshot.files[snapshot_format]
+            cache_control = "no-cache"
+        else:
+            path = self.directory / snapshot_file_name(name, snapshot_format)
+            if len(name) != 64 or not all(c in "0123456789abcdef" for c in name) or not path.exists():
+                return _Response(404, "Not Found", {})
+            snapshot_hash, data = name, path.read_bytes()
+            cache_control = "public, max-age=31536000, immutable"
+
+        etag = self._etag(snapshot_hash, snapshot_format, gzip_encoding)
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if etag in if_none_match or "*" in if_none_match:
+            return _Response(304, "Not Modified", headers)
+
+        headers["Content-Type"] = CONTENT_TYPES[snapshot_format]
+        if gzip_encoding:
+            headers["Content-Encoding"] = "gzip"
+        else:
+            data = gzip.decompress(data)
+        return _Response(200, "OK", headers, data)
+
+    @staticmethod
+    def _etag(snapshot_hash: str, snapshot_format: str, gzip_encoding: bool) -> str:
+        return f'"{snapshot_hash}.{snapshot_format}' + ('.gz"' if gzip_encoding else '"')
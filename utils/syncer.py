@@ -0,0 +1,157 @@
+"""
+Event-sourced sync of the MEV Boost Relay Allowed List
+
+Rebuilds the allowed list by replaying the `RelayAdded`, `RelayRemoved` and
+`AllowedListUpdated` logs of the contract. The replay mirrors the contract's
+append and swap-and-pop, so the relays come out in the `get_relays()` order.
+The synced state can be checkpointed to a JSON file, so later runs fetch only
+the logs emitted after the checkpointed block. The checkpoint is kept a number
+of confirmations behind the chain head, so it never holds the logs of the
+blocks that can still be reorged out.
+"""
+
+import json
+from pathlib import Path
+
+from ape import chain
+from eth_utils import encode_hex, keccak
+
+from utils.files import atomic_write_text
+from utils.relay import Relay
+
+DEFAULT_CHUNK_SIZE = 10_000
+MAX_CHUNK_SIZE = 100_000
+# two epochs, the blocks older than that are finalized
+DEFAULT_CONFIRMATIONS = 64
+
+
+class AllowedListSyncer:
+    def __init__(
+        self,
+        contract,
+        checkpoint_file: str | Path | None = None,
+        start_block: int = 0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_chunk_size: int = MAX_CHUNK_SIZE,
+        confirmations: int = DEFAULT_CONFIRMATIONS,
+        chain_id: int | None = None,
+    ):
+        """
+        @param contract The allowed list contract, e.g. `project.MEVBoostRelayAllowedList.at(address)`
+        @param checkpoint_file Optional path of the JSON file to persist the synced state between runs
+        @param start_block Block to start the replay from, e.g. the contract deployment block
+        @param chunk_size Initial number of blocks requested in a single `eth_getLogs`
+        @param max_chunk_size Limit of the chunk size growth
+        @param confirmations Number of the latest blocks the checkpoint is kept behind the chain head
+        @param chain_id Chain id the checkpoint is keyed by along with the address, the connected chain by default.
+            CREATE2 deployments share the address across the chains, so the address alone is not enough.
+        """
+        self.contract = contract
+        self.chain_id = chain_id if chain_id is not None else chain.chain_id
+        self.confirmations = confirmations
+        self.checkpoint_file = Path(checkpoint_file) if checkpoint_file is not None else None
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.events = [contract.RelayAdded.abi, contract.RelayRemoved.abi, contract.AllowedListUpdated.abi]
+        self.topics = [encode_hex(keccak(text=event.selector)) for event in self.events]
+
+        # the last block the logs are applied for
+        self.block = start_block - 1
+        self.version = 0
+        self.relays: list[Relay] = []
+        self._index_by_uri: dict[str, int] = {}
+        self._load_checkpoint()
+        # the state to checkpoint, synced up to the last confirmed block
+        self._confirmed = (self.block, self.version, list(self.relays))
+
+    def sync(self, to_block: int | None = None) -> int:
+        """
+        @notice Apply the logs emitted after the last synced block up to `to_block` inclusive
+        @param to_block The last block to sync, the chain head by default
+        @return Number of the applied logs
+        @dev The state is synced up to `to_block`, but checkpointed only up to the last confirmed block
+        """
+        head = chain.blocks.head.number
+        if to_block is None:
+            to_block = head
+        confirmed_block = head - self.confirmations
+
+        applied = 0
+        while self.block < to_block:
+            from_block = self.block + 1
+            chunk_to_block = min(from_block + self.chunk_size - 1, to_block)
+            if from_block <= confirmed_block < chunk_to_block:
+                # stop the chunk at the last confirmed block to take the state to checkpoint
+                chunk_to_block = confirmed_block
+            try:
+                logs = self._get_logs(from_block, chunk_to_block)
+            except Exception:
+                if self.chunk_size == 1:
+                    raise
+                # most likely the node limits the block range or the response size, retry with smaller chunks
+                self.chunk_size = max(self.chunk_size // 2, 1)
+                continue
+
+            for log in logs:
+                self._apply(log)
+            applied += len(logs)
+            self.block = chunk_to_block
+            self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+            if self.block <= confirmed_block:
+                self._confirmed = (self.block, self.version, list(self.relays))
+
+        self._save_checkpoint()
+        return applied
+
+    def _get_logs(self, from_block: int, to_block: int) -> list:
+        raw_logs = chain.provider.web3.eth.get_logs(
+            {
+                "address": self.contract.address,
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                # topics in a nested list are OR-ed, so all the events come in the emission order
+                "topics": [self.topics],
+            }
+        )
+        return list(chain.provider.network.ecosystem.decode_logs(raw_logs, *self.events))
+
+    def _apply(self, log):
+        if log.event_name == "RelayAdded":
+            relay = Relay(*log.relay)
+            self._index_by_uri[relay.uri] = len(self.relays)
+            self.relays.append(relay)
+        elif log.event_name == "RelayRemoved":
+            # mirror the swap-and-pop of the contract to keep the relays order
+            index = self._index_by_uri.pop(log.uri)
+            last_relay = self.relays.pop()
+            if index != len(self.relays):
+                self.relays[index] = last_relay
+                self._index_by_uri[last_relay.uri] = index
+        elif log.event_name == "AllowedListUpdated":
+            self.version = log.allowed_list_version
+
+    def _load_checkpoint(self):
+        if self.checkpoint_file is None or not self.checkpoint_file.exists():
+            return
+
+        checkpoint = json.loads(self.checkpoint_file.read_text())
+        if checkpoint.get("chain_id") != self.chain_id or checkpoint["address"] != self.contract.address:
+            return
+        self.block = checkpoint["block"]
+        self.version = checkpoint["version"]
+        self.relays = [Relay(*relay) for relay in checkpoint["relays"]]
+        self._index_by_uri = {relay.uri: i for i, relay in enumerate(self.relays)}
+
+    def _save_checkpoint(self):
+        if self.checkpoint_file is None:
+            return
+
+        block, version, relays = self._confirmed
+        checkpoint = {
+            "chain_id": self.chain_id,
+            "address": self.contract.address,
+            "block": block,
+            "version": version,
+            "relays": relays,
+        }
+        atomic_write_text(self.checkpoint_file, json.dumps(checkpoint))